@@ -1,57 +1,76 @@
-"""from asyncio import tasks
-import json
+from __future__ import annotations
+
 from textwrap import dedent
 import pendulum
-import os
+
 from airflow import DAG
 from airflow.operators.python import PythonOperator
 
+# Inbox -> prediction -> outbox/archive service (manifest + per-file checkpoints)
+from src.pipeline.batch_prediction import BatchPrediction, BatchPredictionConfig
+from src.utils.thread_budget import apply_thread_budget
+
 with DAG(
     'batch_prediction',
-    default_args={'retries': 2},
-    # [END default_args]
+    default_args={'retries': 2},   # a retried prediction task resumes from its checkpoint
     description='gemstone batch prediction',
-    schedule_interval="@weekly", # here you can test based on hour or mints but make sure here you container is up and running
-    start_date=pendulum.datetime(2023,4, 11, tz="UTC"),
+    schedule="*/10 * * * *",       # Scan the inbox every 10 minutes; only new files are scored
+    start_date=pendulum.datetime(2023, 4, 11, tz="UTC"),
     catchup=False,
+    max_active_runs=1,
     tags=['example'],
 ) as dag:
+
+    # ------------------ Task 1: Pull new input files ------------------
     def download_files(**kwargs):
-        bucket_name = os.getenv("BUCKET_NAME")# download the file from the repo
-        input_dir = "/app/input_files"
-        #creating directory
-        os.makedirs(input_dir,exist_ok=True)
-        #os.system(f"aws s3 sync s3://{bucket_name}/inbox {config.inbox_dir}")
+        # BATCH_REMOTE_DIR is a local directory standing in for the bucket
+        # e.g. os.system(f"aws s3 sync s3://{bucket_name}/inbox {config.inbox_dir}")
+        downloaded = BatchPrediction(BatchPredictionConfig()).download_files()
+        kwargs["ti"].xcom_push(key="downloaded_files", value=downloaded)
 
+    # ------------------ Task 2: Score pending files ------------------
     def batch_prediction(**kwargs):
-        config = BatchPredictionConfig()
-        sensor_batch_prediction = SensorBatchPrediction(batch_config=config)
-        sensor_batch_prediction.start_prediction()
-       
-    def upload_files(**kwargs):
-        #bucket_name = os.getenv("BUCKET_NAME")
-        #os.system(f"aws s3 sync {config.archive_dir} s3://{bucket_name}/archive")
-        #os.system(f"aws s3 sync {config.outbox_dir} s3://{bucket_name}/outbox")
-
+        apply_thread_budget(role="batch prediction")
+        scored = BatchPrediction(BatchPredictionConfig()).start_prediction()
+        kwargs["ti"].xcom_push(key="scored_files", value=scored or [])
 
-   # download_input_files  = PythonOperator(
-            task_id="download_file",
-            python_callable=download_files
+    # ------------------ Task 3: Push results ------------------
+    def upload_files(**kwargs):
+        # e.g. os.system(f"aws s3 sync {config.outbox_dir} s3://{bucket_name}/outbox")
+        BatchPrediction(BatchPredictionConfig()).upload_files()
 
+    download_input_files = PythonOperator(
+        task_id="download_file",
+        python_callable=download_files
+    )
+    download_input_files.doc_md = dedent(
+        """\
+        #### Download task
+        This task copies new files from the remote inbox into the local inbox.
+        """
     )
 
     generate_prediction_files = PythonOperator(
-            task_id="prediction",
-            python_callable=batch_prediction
-
+        task_id="prediction",
+        python_callable=batch_prediction
+    )
+    generate_prediction_files.doc_md = dedent(
+        """\
+        #### Prediction task
+        This task scores every inbox file not yet in the manifest, checkpointing each chunk,
+        and moves finished inputs to the archive (inputs that cannot be scored to the error directory).
+        """
     )
 
     upload_prediction_files = PythonOperator(
-            task_id="upload_prediction_files",
-            python_callable=upload_files
-
+        task_id="upload_prediction_files",
+        python_callable=upload_files
+    )
+    upload_prediction_files.doc_md = dedent(
+        """\
+        #### Upload task
+        This task mirrors the outbox, archive and error directories to the remote storage.
+        """
     )
 
     download_input_files >> generate_prediction_files >> upload_prediction_files
-    
-    """
\ No newline at end of file
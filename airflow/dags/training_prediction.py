@@ -8,10 +8,17 @@ import pendulum   # Better datetime handling (timezone-aware)
 
 # Airflow imports
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
+from airflow.utils.trigger_rule import TriggerRule
 
 # Import your custom ML training pipeline
 from src.pipeline.training_pipeline import TrainingPipeline
+from src.components.retrain_trigger import RetrainTrigger
+from src.utils.artifact_store import acquire_training_lease, release_training_lease
+from src.utils.thread_budget import apply_thread_budget
+
+# Every task process limits its native thread pools to the budget (one training per worker slot)
+apply_thread_budget(role="training")
 
 # Initialize your ML pipeline object
 training_pipeline = TrainingPipeline()
@@ -21,16 +28,50 @@ with DAG(
     "gemstone_training_pipeline",   # Unique DAG ID (name of your workflow)
     default_args={"retries": 2},
     description="It is my training pipeline",    # Retry failed tasks 2 times
-    schedule="*/5 * * * *",  # Run every 5 minutes
+    schedule="*/5 * * * *",  # Poll every 5 minutes; training only runs when the retrain trigger fires
     # schedule="@weekly",             # Run this DAG once every week
     start_date=pendulum.datetime(2025, 8, 23, tz="UTC"),  # First execution date
     catchup=False,                  # Don't backfill old runs
+    max_active_runs=1,              # No overlapping runs; due runs wait and are coalesced by the scheduler
     tags=["machine_learning", "classification", "gemstone"], # Metadata tags
 ) as dag:
 
     # Attach documentation to DAG (visible in Airflow UI)
     dag.doc_md = __doc__
 
+    # ------------------ Task 0: Retrain only on new data or drift ------------------
+    def check_retrain_trigger(**kwargs):
+        # Cheap size/mtime check first; the checksum only runs when the source file changed
+        decision = RetrainTrigger().check()
+        print("Retrain trigger:", decision["reason"])
+        # The returned decision (pushed to XCom) carries the source watermark for the publish task
+        return decision if decision["retrain"] else False
+
+    # ------------------ Task 0b: Skip unchanged runs ------------------
+    def check_run_fingerprint(**kwargs):
+        ti = kwargs["ti"]
+        decision = ti.xcom_pull(task_ids="check_retrain_trigger")
+        # Fingerprint of the data as it is now, before ingestion reads it; evaluation records
+        # this one, so rows appended while training are not taken as trained
+        fingerprint = training_pipeline.current_fingerprint()
+        ti.xcom_push(key="run_fingerprint", value=fingerprint)
+        # Drift leaves config, data and code unchanged, so it always trains
+        if decision.get("drift"):
+            return True
+        # Returning False skips every downstream task: config, data and code are unchanged
+        if training_pipeline.is_up_to_date(fingerprint):
+            # Nothing trained; advance the watermark so the trigger does not refire,
+            # without restarting the drift cooldown
+            RetrainTrigger().record_source(decision["observation"])
+            return False
+        return True
+
+    # ------------------ Task 0c: Take the training lease ------------------
+    def acquire_lease(**kwargs):
+        # Same lock as `python -m src.pipeline.training_pipeline` / --watch: they wait while this run holds it.
+        # Returning False skips the run when one of them is training; the trigger fires again next poll.
+        return acquire_training_lease(kwargs["run_id"])
+
     # ------------------ Task 1: Data Ingestion ------------------
     def data_ingestion(**kwargs):
         ti = kwargs["ti"]  # TaskInstance object, used for XCom communication
@@ -58,6 +99,9 @@ with DAG(
             data_ingestion_artifact["test_data_path"],
         )
 
+        # KD-tree over the transformed training stones, served as comparables next to predictions
+        training_pipeline.start_comparables_index(data_ingestion_artifact["train_data_path"])
+
         # Push results for next task
         ti.xcom_push(
             key="data_transformations_artifact",
@@ -78,13 +122,32 @@ with DAG(
         train_arr = np.array(data_transformation_artifact["train_arr"])
         test_arr = np.array(data_transformation_artifact["test_arr"])
 
+        # Raw training data is only used for cross-validation (run.cv_folds > 1)
+        data_ingestion_artifact = ti.xcom_pull(
+            task_ids="data_ingestion", key="data_ingestion_artifact"
+        )
+
         # Train model and return path
-        model_path = training_pipeline.start_model_training(train_arr, test_arr)
+        model_path = training_pipeline.start_model_training(
+            train_arr, test_arr, data_ingestion_artifact["train_data_path"]
+        )
+
+        # Distill a large winner into a compact serving model (no-op unless run.distill is set)
+        serving_path = training_pipeline.start_model_distillation(train_arr, test_arr, model_path)
+
+        # Decide whether inference may run in float32 (no-op unless run.float32 is set)
+        # (a refused float32 model is replaced by its float64-trained fallback)
+        serving_path = training_pipeline.start_precision_check(
+            data_ingestion_artifact["train_data_path"], data_ingestion_artifact["test_data_path"], serving_path
+        )
+
+        # Combination-table scorer when the served model is linear (checked for parity)
+        training_pipeline.start_linear_scorer_export(data_ingestion_artifact["test_data_path"], serving_path)
 
         # Push model artifact (so evaluation can use it)
         ti.xcom_push(
             key="model_training_artifact",
-            value={"model_path": model_path}
+            value={"model_path": model_path, "serving_path": serving_path}
         )
 
     # ------------------ Task 4: Model Evaluation ------------------
@@ -109,15 +172,43 @@ with DAG(
         )
         model_path = model_training_artifact["model_path"]
 
+        # Reuse the test predictions saved by the trainer instead of predicting again
+        # (None, so evaluation predicts, if model.pkl was replaced since)
+        from src.components.model_trainer import ModelTrainerConfig, load_test_predictions
+        test_predictions = load_test_predictions(ModelTrainerConfig.test_predictions_file_path, model_path)
+
         # Run evaluation
+        # Metrics of the served model (a distilled student), plus the winner's as teacher_*
         metrics = training_pipeline.start_model_evaluation(
-            model_path=model_path, train_arr=train_arr, test_arr=test_arr
+            model_path=model_path, train_arr=train_arr, test_arr=test_arr,
+            test_predictions=test_predictions,
+            serving_path=model_training_artifact["serving_path"],
         )
 
+        # Record the fingerprint taken before ingestion; it is published with the artifacts,
+        # so the next unchanged run is skipped
+        fingerprint = ti.xcom_pull(task_ids="check_run_fingerprint", key="run_fingerprint")
+        training_pipeline.record_run(metrics, fingerprint)
+
         # Push metrics
         ti.xcom_push(key="evaluation_metrics", value=metrics)
 
-    # ------------------ Task 5: Push Data to Cloud ------------------
+    # ------------------ Task 5: Publish Artifacts ------------------
+    def publish_artifacts(**kwargs):
+        # Versioned copy + atomic CURRENT pointer swap; the Flask app picks it up on its next request
+        ti = kwargs["ti"]
+        version = training_pipeline.start_artifact_publishing()
+        ti.xcom_push(key="artifact_version", value=version)
+
+        # Advance the retrain watermark to the data this run was triggered on
+        decision = ti.xcom_pull(task_ids="check_retrain_trigger")
+        RetrainTrigger().mark_trained(decision["observation"])
+
+    # ------------------ Task 5b: Release the training lease ------------------
+    def release_lease(**kwargs):
+        release_training_lease(kwargs["run_id"])
+
+    # ------------------ Task 6: Push Data to Cloud ------------------
     def push_data_to_s3(**kwargs):
         import os
         bucket_name = "repository_name"
@@ -126,6 +217,37 @@ with DAG(
         # os.system(f"aws s3 sync {artifact_folder} s3://{bucket_name}/artifact")
 
     # ------------------ Define Operators (Tasks) ------------------
+    check_retrain_trigger_task = ShortCircuitOperator(
+        task_id="check_retrain_trigger", python_callable=check_retrain_trigger
+    )
+    check_retrain_trigger_task.doc_md = dedent(
+        """\
+        #### Retrain trigger
+        This task skips the run unless new source data has settled (debounced) or serving drift crossed its threshold.
+        """
+    )
+
+    check_run_fingerprint_task = ShortCircuitOperator(
+        task_id="check_run_fingerprint", python_callable=check_run_fingerprint
+    )
+    check_run_fingerprint_task.doc_md = dedent(
+        """\
+        #### Fingerprint check
+        This task skips the run when the config, data and code match the last recorded run,
+        unless the run was triggered by drift.
+        """
+    )
+
+    acquire_lease_task = ShortCircuitOperator(
+        task_id="acquire_training_lease", python_callable=acquire_lease
+    )
+    acquire_lease_task.doc_md = dedent(
+        """\
+        #### Training lease
+        This task takes the training lease, so no other training run writes the artifacts until this run releases it.
+        """
+    )
+
     data_ingestion_task = PythonOperator(
         task_id="data_ingestion",        # Task name
         python_callable=data_ingestion   # Function to execute
@@ -166,10 +288,31 @@ with DAG(
         and computes performance metrics (e.g., accuracy, precision, recall).
         """
     )
+    publish_artifacts_task = PythonOperator(
+        task_id="publish_artifacts", python_callable=publish_artifacts
+    )
+    publish_artifacts_task.doc_md = dedent(
+        """\
+        #### Publish Artifacts Task
+        This task publishes the trained artifacts as a new version and switches the serving pointer to it.
+        """
+    )
+    release_lease_task = PythonOperator(
+        task_id="release_training_lease", python_callable=release_lease,
+        trigger_rule=TriggerRule.ALL_DONE,   # also after a failed task, once the lease was taken
+    )
+    release_lease_task.doc_md = dedent(
+        """\
+        #### Release Training Lease
+        This task releases the training lease, whether or not the training tasks succeeded.
+        """
+    )
     push_data_to_s3_task = PythonOperator(
         task_id="push_data_to_s3", python_callable=push_data_to_s3
     )
 
 # ------------------ Task Dependencies ------------------
-# Run pipeline in order: ingestion → transformation → training → evaluating → upload
-data_ingestion_task >> data_transform_task >> model_trainer_task >> model_evaluation_task >> push_data_to_s3_task
+# Run pipeline in order: retrain trigger → fingerprint check → lease → ingestion → transformation → training → evaluating → publish → upload,
+# and the lease is released after publishing (or after any training task failed)
+check_retrain_trigger_task >> check_run_fingerprint_task >> acquire_lease_task >> data_ingestion_task >> data_transform_task >> model_trainer_task >> model_evaluation_task >> publish_artifacts_task >> push_data_to_s3_task
+publish_artifacts_task >> release_lease_task
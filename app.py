@@ -6,14 +6,40 @@ This is the main Flask application that handles:
 - Showing the prediction form
 - Handling form submissions
 - Displaying prediction results
+- Comparable historical stones next to each prediction (KD-tree lookup)
+- Bulk predictions in JSON, Arrow IPC or NumPy .npy (negotiated via Content-Type / Accept)
+- Reporting input drift against the training data
+- Optionally capturing a sample of requests for replay (REQUEST_CAPTURE_SAMPLE_RATE)
+- On-demand sampling profiles of a live worker (PROFILER_TOKEN, or SIGUSR2)
+
+Native thread pools are limited to cores // workers per process; set
+THREAD_BUDGET_WORKERS (or WEB_CONCURRENCY) to the number of server workers.
 """
 
-from flask import Flask, request, render_template
+import hmac
+
+from flask import Flask, request, render_template, jsonify, Response
+
+from src.pipeline.prediction_pipeline import PredictPipeline, CustomData, get_drift_monitor
+from src.utils.request_capture import RequestCaptureConfig, RequestCaptureWriter
+from src.utils.bulk_formats import (
+    JSON_MIMETYPE, UnsupportedFormatError, supported_mimetypes, decode_features, encode_predictions
+)
+from src.utils.thread_budget import apply_thread_budget
+from src.utils.sampling_profiler import SamplingProfiler, SamplingProfilerConfig, ProfilerBusyError
+from src.exception.exception import customexception
 
-from src.pipeline.prediction_pipeline import PredictPipeline, CustomData
+apply_thread_budget(role="serving")
 
 app = Flask(__name__)
 
+# Sampled request log, written in the background (disabled unless a sample rate is set)
+request_capture = RequestCaptureWriter(RequestCaptureConfig.from_env())
+
+# Idle until asked for a profile; `kill -USR2 <pid>` writes one to profiles/
+profiler = SamplingProfiler(SamplingProfilerConfig.from_env())
+profiler.install_signal_handler()
+
 # -------------------------------
 # Route 1: Homepage
 # -------------------------------
@@ -45,13 +71,118 @@ def predict_datapoint():
         # Convert to dataframe
         final_data = data.get_data_as_dataframe()
 
-        # Prediction pipeline
+        # Prediction pipeline (also finds the most similar stones from the training data)
         predict_pipeline = PredictPipeline()
-        pred = predict_pipeline.predict(final_data)
+        pred, comparables = predict_pipeline.predict_with_comparables(final_data)
+        request_capture.capture(final_data, pred)
 
         result = round(pred[0], 3)
 
-        return render_template("result.html", final_result=result)
+        return render_template(
+            "result.html", final_result=result, comparables=comparables[0] if comparables else None
+        )
+
+
+# -------------------------------
+# Route 3: Bulk predictions
+# -------------------------------
+
+def is_invalid_features(error):
+    """True if prediction failed on the payload itself (unknown category, missing column)."""
+    return isinstance(error.error_message, (ValueError, KeyError))
+
+
+@app.route("/predict/bulk", methods=["POST"])
+def predict_bulk():
+    # Request format from Content-Type; response format from Accept, JSON unless a binary type is asked for
+    response_type = request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE] + [m for m in supported_mimetypes() if m != JSON_MIMETYPE]
+    ) if request.accept_mimetypes else JSON_MIMETYPE
+    if response_type is None:
+        return jsonify({"error": "none of the Accept types is supported", "supported": supported_mimetypes()}), 406
+
+    try:
+        features = decode_features(request.get_data(), request.content_type)
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e), "supported": supported_mimetypes()}), 415
+    except Exception as e:
+        return jsonify({"error": f"could not decode request: {e}"}), 400
+
+    try:
+        pred = PredictPipeline().predict(features)
+    except customexception as e:
+        if not is_invalid_features(e):
+            raise
+        return jsonify({"error": f"invalid features: {e.error_message}"}), 400
+    request_capture.capture(features, pred)
+
+    return Response(encode_predictions(pred, response_type), mimetype=response_type)
+
+
+# -------------------------------
+# Route 4: Comparable stones
+# -------------------------------
+
+@app.route("/comparables", methods=["POST"])
+def comparables():
+    # Same request formats as /predict/bulk; ?k= sets how many comparables per stone
+    k = request.args.get("k", default=5, type=int)
+    if not 1 <= k <= 100:
+        return jsonify({"error": "k must be between 1 and 100"}), 400
+
+    try:
+        features = decode_features(request.get_data(), request.content_type)
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e), "supported": supported_mimetypes()}), 415
+    except Exception as e:
+        return jsonify({"error": f"could not decode request: {e}"}), 400
+
+    try:
+        pred, comparables = PredictPipeline().predict_with_comparables(features, k=k)
+    except customexception as e:
+        if not is_invalid_features(e):
+            raise
+        return jsonify({"error": f"invalid features: {e.error_message}"}), 400
+    if comparables is None:
+        return jsonify({"error": "no comparables index found, train the model first"}), 404
+    return jsonify({"predictions": pred.tolist(), "comparables": comparables})
+
+
+# -------------------------------
+# Route 5: Input drift report
+# -------------------------------
+
+@app.route("/drift", methods=["GET"])
+def drift_report():
+    # PSI per feature, merged over every worker's snapshot; drift_detected can trigger retraining
+    drift_monitor = get_drift_monitor()
+    if drift_monitor is None:
+        return jsonify({"error": "no drift baseline found, train the model first"}), 404
+    return jsonify(drift_monitor.merged_drift_scores())
+
+
+# -------------------------------
+# Route 6: Sampling profile of this worker (admin)
+# -------------------------------
+
+@app.route("/admin/profile", methods=["POST"])
+def admin_profile():
+    # Hidden unless PROFILER_TOKEN is set; the token is compared in constant time
+    token = profiler.config.token
+    if token is None:
+        return jsonify({"error": "not found"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return jsonify({"error": "invalid admin token"}), 403
+
+    seconds = request.args.get("seconds", 10.0, type=float)
+    if not 0 < seconds <= profiler.config.max_seconds:
+        return jsonify({"error": f"seconds must be in (0, {profiler.config.max_seconds:g}]"}), 400
+    try:
+        # Blocks this request only; the other threads keep serving and are sampled
+        collapsed, rounds = profiler.profile(seconds)
+    except ProfilerBusyError as e:
+        return jsonify({"error": str(e)}), 409
+    return Response(collapsed + "\n", mimetype="text/plain", headers={"X-Profile-Samples": str(rounds)})
 
 
 if __name__ == "__main__":
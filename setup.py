@@ -20,5 +20,8 @@ setup(
     author='AdMub',
     author_email='admub465@gmil.com',
     install_requires=["scikit-learn","pandas","numpy","mlflow"],
-    packages=find_packages()
+    packages=find_packages(),
+    entry_points={
+        "console_scripts": ["gemstone-pipeline=src.pipeline.stages:main"]
+    }
 )
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Comparables Index Module
+
+Finds the K most similar historical stones for a queried stone, so a predicted
+price can be shown next to real sales of comparable diamonds.
+
+At training time a KD-tree is built over the preprocessed training matrix (the
+DataTransformation output: scaled numerical features and scaled ordinal
+grades), so similarity is measured in the same space the model sees. The tree
+is saved with joblib together with the raw training features and prices as
+plain numpy arrays (categorical values as fixed-width strings). Serving
+processes load the file with mmap_mode="r", which memory-maps every array
+instead of copying it. Loading is close to instant, and all workers on a host
+share one copy of the index in the page cache.
+
+Queries take already-transformed rows, so the serving path can reuse the
+matrix it built for the prediction.
+"""
+
+import os
+import sys
+from dataclasses import dataclass
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.utils import load_object
+from src.components.data_transformation import NUMERICAL_COLS, CATEGORICAL_COLS
+
+
+@dataclass
+class ComparablesIndexConfig:
+    index_file_path: str = os.path.join("artifacts", "comparables_index.joblib")
+    leaf_size: int = 40
+    k: int = 5   # comparables returned per stone by default
+
+
+class ComparablesIndex:
+    """
+    KD-tree over the transformed training features plus the raw rows it points to.
+    """
+
+    def __init__(self, tree, columns):
+        self.tree = tree
+        self.columns = columns   # column name -> numpy array, aligned with the tree's rows
+
+    @classmethod
+    def build(cls, train_df, preprocessor, leaf_size=40):
+        X = np.asarray(preprocessor.transform(train_df.drop(columns=["price", "id"], errors="ignore")),
+                       dtype=np.float64)
+        columns = {col: train_df[col].to_numpy(dtype=np.float64) for col in NUMERICAL_COLS + ["price"]}
+        # Fixed-width strings instead of object arrays, so they can be memory-mapped too
+        columns.update({col: train_df[col].astype(str).to_numpy(dtype=str) for col in CATEGORICAL_COLS})
+        return cls(KDTree(X, leaf_size=leaf_size), columns)
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        # Uncompressed, so every array can be memory-mapped on load
+        joblib.dump({"tree": self.tree, "columns": self.columns}, tmp_path)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        state = joblib.load(file_path, mmap_mode="r")
+        return cls(state["tree"], state["columns"])
+
+    def query(self, X, k=5):
+        """
+        K nearest training stones for each transformed row in X.
+
+        Returns:
+            list[list[dict]]: Per query row, the comparables (raw features, price
+                              and distance), nearest first.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.tree.data.shape[1])
+        distances, indices = self.tree.query(X, k=k)
+
+        # One fancy-indexing gather per column, then plain Python lists for the dicts
+        flat = indices.ravel()
+        gathered = {col: values[flat].tolist() for col, values in self.columns.items()}
+        gathered["distance"] = distances.ravel().tolist()
+        rows = [dict(zip(gathered, values)) for values in zip(*gathered.values())]
+        return [rows[i:i + k] for i in range(0, len(rows), k)]
+
+
+class ComparablesIndexBuilder:
+    def __init__(self):
+        self.comparables_index_config = ComparablesIndexConfig()
+
+    def initiate_index_build(self, train_data_path, preprocessor_path):
+        """
+        Build the comparables index over the training data and save it.
+
+        Returns:
+            str: Path of the saved index.
+        """
+        try:
+            config = self.comparables_index_config
+            train_df = pd.read_csv(train_data_path)
+            preprocessor = load_object(preprocessor_path)
+
+            index = ComparablesIndex.build(train_df, preprocessor, leaf_size=config.leaf_size)
+            index.save(config.index_file_path)
+
+            logging.info(f"Comparables index over {len(train_df)} stones saved to {config.index_file_path}")
+            return config.index_file_path
+
+        except Exception as e:
+            logging.info("Exception occurred in initiate_index_build")
+            raise customexception(e, sys)
+
+
+# Commands
+# python -m src.pipeline.stages index
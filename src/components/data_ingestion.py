@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 from src.logger.logging_config import logging
 from src.exception.exception import customexception
+from src.config.run_config import RunConfig
 
 import os
 import sys
@@ -14,43 +15,57 @@ from pathlib import Path
 # Config Class (holds file paths for where data will be stored)
 @dataclass   # automatically gives this class an __init__ method
 class DataIngestionConfig:
+    source_data_path:str=os.path.join("experiment","datasets","train.csv")
     raw_data_path:str=os.path.join("artifacts","raw.csv")
     train_data_path:str=os.path.join("artifacts","train.csv")
     test_data_path:str=os.path.join("artifacts","test.csv")
+    test_size:float=0.25
+
+    # Streaming mode: read the source in chunks and split rows by a hash of their id
+    streaming:bool=False
+    chunk_size:int=50_000
+    id_column:str="id"
+    save_raw_data:bool=True   # the raw copy is only an audit trail, skip it to save a full write
 
 # DataIngestion Class (loads the config with those file paths)
 class DataIngestion:
-    def __init__(self):
-        self.ingestion_config=DataIngestionConfig()
-        
+    def __init__(self, run_config=None):
+        self.run_config=run_config or RunConfig.from_params()
+        self.ingestion_config=DataIngestionConfig(test_size=self.run_config.test_size)
+
 
     # Ingestion Method
     def initiate_data_ingestion(self):
+        if self.ingestion_config.streaming:
+            return self.initiate_streaming_data_ingestion()
+
         logging.info("data ingestion started")
         try:
-            data=pd.read_csv("experiment/datasets/train.csv")
+            data=pd.read_csv(self.ingestion_config.source_data_path)
             logging.info(" reading a df")
 
             # Saving Raw Data
             os.makedirs(os.path.dirname(os.path.join(self.ingestion_config.raw_data_path)),exist_ok=True)
-            data.to_csv(self.ingestion_config.raw_data_path,index=False)
-            logging.info(" i have saved the raw dataset in artifact folder")
-            
+            if self.ingestion_config.save_raw_data:
+                data.to_csv(self.ingestion_config.raw_data_path,index=False)
+                logging.info(" i have saved the raw dataset in artifact folder")
+
             # Train-Test Split
             logging.info("here i have performed train test split")
 
-            train_data,test_data=train_test_split(data,test_size=0.25)
+            train_data,test_data=train_test_split(
+                data,test_size=self.ingestion_config.test_size,random_state=self.run_config.seed)
             logging.info("train test split completed")
-            
+
             train_data.to_csv(self.ingestion_config.train_data_path,index=False)
             test_data.to_csv(self.ingestion_config.test_data_path,index=False)
-            
+
             logging.info("data ingestion part completed")
-            
+
             # Returning Paths
             return (
-                 
-                
+
+
                 self.ingestion_config.train_data_path,
                 self.ingestion_config.test_data_path
             )
@@ -59,7 +74,59 @@ class DataIngestion:
 
         # Exception Handling
         except Exception as e:
-            logging.info()
+            logging.info("Exception occurred in initiate_data_ingestion")
+            raise customexception(e,sys)
+
+    def is_test_row(self, ids):
+        """
+        Deterministically assign rows to the test set from a hash of their id.
+
+        The same id always lands in the same split, so the split is reproducible
+        and existing rows never move between train and test as the data grows.
+        The hash is keyed by the run seed. Integer ids are hashed as strings:
+        pandas only applies hash_key to string (object) data.
+        """
+        hashes=pd.util.hash_pandas_object(ids.astype(str),index=False,hash_key=self.run_config.hash_key)
+        buckets=hashes.to_numpy() % 10_000
+        return buckets < int(self.ingestion_config.test_size * 10_000)
+
+    # Streaming Ingestion Method (peak memory is one chunk)
+    def initiate_streaming_data_ingestion(self):
+        logging.info("streaming data ingestion started")
+        try:
+            config=self.ingestion_config
+            os.makedirs(os.path.dirname(config.train_data_path),exist_ok=True)
+
+            raw_file=open(config.raw_data_path,"w",newline="") if config.save_raw_data else None
+            n_train=n_test=0
+            try:
+                with open(config.train_data_path,"w",newline="") as train_file, \
+                     open(config.test_data_path,"w",newline="") as test_file:
+
+                    for i,chunk in enumerate(pd.read_csv(config.source_data_path,chunksize=config.chunk_size)):
+                        write_header=(i==0)   # header only once, every later chunk is appended
+                        if raw_file is not None:
+                            chunk.to_csv(raw_file,header=write_header,index=False)
+
+                        test_mask=self.is_test_row(chunk[config.id_column])
+                        chunk[~test_mask].to_csv(train_file,header=write_header,index=False)
+                        chunk[test_mask].to_csv(test_file,header=write_header,index=False)
+
+                        n_test+=int(test_mask.sum())
+                        n_train+=len(chunk)-int(test_mask.sum())
+            finally:
+                if raw_file is not None:
+                    raw_file.close()
+
+            logging.info(f"streaming data ingestion completed. Train rows: {n_train}, Test rows: {n_test}")
+
+            return (
+                config.train_data_path,
+                config.test_data_path
+            )
+
+        except Exception as e:
+            logging.info("Exception occurred in initiate_streaming_data_ingestion")
             raise customexception(e,sys)
 
 
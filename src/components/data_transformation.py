@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 from src.logger.logging_config import logging
 from src.exception.exception import customexception
-import os, sys
+import os, sys, json
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -13,17 +13,32 @@ from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OrdinalEncoder, StandardScaler
 
 from src.utils.utils import save_object
+from src.config.run_config import RunConfig
+from src.components.drift_monitor import DriftMonitorConfig, build_drift_baseline
+
+
+# Feature groups and the category order used for ordinal encoding
+CATEGORICAL_COLS = ['cut', 'color', 'clarity']
+NUMERICAL_COLS = ['carat', 'depth', 'table', 'x', 'y', 'z']
+
+CUT_CATEGORIES = ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal']
+COLOR_CATEGORIES = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
+CLARITY_CATEGORIES = ['I1','SI2','SI1','VS2','VS1','VVS2','VVS1','IF']
 
 
 # Config class to store preprocessing pipeline path
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join('artifacts', 'preprocessor.pkl')
+    drift_baseline_file_path = DriftMonitorConfig.baseline_file_path
 
 
 class DataTransformation:
-    def __init__(self):
+    def __init__(self, run_config=None):
         self.data_transformation_config = DataTransformationConfig()
+        self.run_config = run_config or RunConfig.from_params()
+        # Opt-in float32 mode halves the memory and bandwidth of the transformed arrays
+        self.output_dtype = np.float32 if self.run_config.float32 else np.float64
 
     def get_data_transformation(self):
         """
@@ -33,13 +48,13 @@ class DataTransformation:
             logging.info('Data Transformation initiated')
 
             # Define feature groups
-            categorical_cols = ['cut', 'color', 'clarity']
-            numerical_cols = ['carat', 'depth', 'table', 'x', 'y', 'z']
+            categorical_cols = CATEGORICAL_COLS
+            numerical_cols = NUMERICAL_COLS
 
             # Define custom category order for ordinal encoding
-            cut_categories = ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal']
-            color_categories = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
-            clarity_categories = ['I1','SI2','SI1','VS2','VS1','VVS2','VVS1','IF']
+            cut_categories = CUT_CATEGORIES
+            color_categories = COLOR_CATEGORIES
+            clarity_categories = CLARITY_CATEGORIES
 
             logging.info('Pipeline construction started')
 
@@ -69,6 +84,13 @@ class DataTransformation:
             logging.info("Exception occurred in get_data_transformation")
             raise customexception(e, sys)
 
+    def stack_features_and_target(self, features, target):
+        """Build the [features | target] array in the configured output dtype."""
+        arr = np.empty((features.shape[0], features.shape[1] + 1), dtype=self.output_dtype)
+        arr[:, :-1] = features
+        arr[:, -1] = np.asarray(target)
+        return arr
+
     def initialize_data_transformation(self, train_path, test_path):
         """
         Applies preprocessing to train and test datasets,
@@ -103,8 +125,18 @@ class DataTransformation:
             logging.info("Applied preprocessing on train and test data")
 
             # Concatenate input features and target for both train and test
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            # (written straight into one array of the output dtype, no intermediate copy)
+            train_arr = self.stack_features_and_target(input_feature_train_arr, target_feature_train_df)
+            test_arr = self.stack_features_and_target(input_feature_test_arr, target_feature_test_df)
+
+            # Reference feature distributions for drift monitoring in serving
+            drift_config = DriftMonitorConfig()
+            drift_baseline = build_drift_baseline(
+                input_feature_train_df, NUMERICAL_COLS, CATEGORICAL_COLS, n_bins=drift_config.n_bins
+            )
+            with open(self.data_transformation_config.drift_baseline_file_path, "w") as file_obj:
+                json.dump(drift_baseline, file_obj)
+            logging.info("Drift baseline saved")
 
             # Save fitted preprocessor object
             save_object(
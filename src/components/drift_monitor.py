@@ -0,0 +1,270 @@
+"""
+Drift Monitor Module
+
+Tracks how the feature distributions seen in production compare to the
+training data, with constant memory and a few microseconds per request.
+
+- Numerical features (carat, depth, table, x, y, z) are sketched as histograms
+  over fixed quantile bins taken from the training data.
+- Categorical features (cut, color, clarity) are sketched as counters over the
+  known categories (plus one bucket for anything unseen).
+
+The baseline is built at training time by DataTransformation. Serving processes
+update their own sketch on every request and periodically snapshot it to disk.
+Sketches are additive, so the snapshots of all workers are merged before
+computing Population Stability Index (PSI) drift scores. Snapshots of workers
+that have exited (on this host) or that were not refreshed within
+`state_ttl_seconds` are dropped, so old traffic does not dilute the signal.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import socket
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+OTHER_CATEGORY = "__other__"
+
+
+@dataclass
+class DriftMonitorConfig:
+    baseline_file_path: str = os.path.join("artifacts", "drift_baseline.json")
+    state_dir: str = os.path.join("artifacts", "drift")
+    n_bins: int = 10
+    snapshot_every: int = 500      # requests between snapshots of a worker's sketch
+    vectorize_min_rows: int = 32   # smaller batches count categories with dict lookups
+    drift_threshold: float = 0.2   # PSI above this is treated as significant drift
+    state_ttl_seconds: float = 24 * 3600   # snapshots not refreshed for this long are dropped
+
+
+def build_drift_baseline(df, numerical_cols, categorical_cols, n_bins=10):
+    """
+    Build the training-time reference sketches.
+
+    Returns:
+        dict: Per-feature bin edges / categories and the training proportions.
+    """
+    try:
+        baseline = {
+            "baseline_id": pd.Timestamp.now(tz="UTC").isoformat(),
+            "n_rows": int(len(df)),
+            "numerical": {},
+            "categorical": {},
+        }
+
+        for col in numerical_cols:
+            values = df[col].dropna().to_numpy(dtype=np.float64)
+            # Interior quantile edges; the outer bins are open-ended
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            baseline["numerical"][col] = {
+                "edges": edges.tolist(),
+                "proportions": (counts / max(counts.sum(), 1)).tolist(),
+            }
+
+        for col in categorical_cols:
+            proportions = df[col].value_counts(normalize=True)
+            baseline["categorical"][col] = {
+                "categories": [str(c) for c in proportions.index] + [OTHER_CATEGORY],
+                "proportions": proportions.tolist() + [0.0],
+            }
+
+        return baseline
+
+    except Exception as e:
+        logging.info("Exception occurred in build_drift_baseline")
+        raise customexception(e, sys)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:   # exists, owned by another user
+        return True
+    return True
+
+
+def read_drift_states(config=None):
+    """
+    Load the sketch snapshots of the live serving workers.
+
+    Snapshots older than `state_ttl_seconds`, or written on this host by a
+    process that no longer exists, are deleted instead of merged.
+    """
+    config = config or DriftMonitorConfig()
+    host = socket.gethostname()
+    states = []
+    for path in glob.glob(os.path.join(config.state_dir, "state_*.json")):
+        try:
+            expired = time.time() - os.path.getmtime(path) > config.state_ttl_seconds
+            with open(path) as file_obj:
+                state = json.load(file_obj)
+        except (OSError, ValueError):   # removed or replaced meanwhile
+            continue
+        if expired or (state.get("host") == host and not process_alive(state.get("pid", 0))):
+            logging.info(f"Dropping stale drift state {path}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        states.append(state)
+    return states
+
+
+def population_stability_index(expected, observed, eps=1e-4):
+    """PSI between two proportion vectors over the same bins."""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), eps, None)
+    observed = np.clip(np.asarray(observed, dtype=np.float64), eps, None)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+class DriftMonitor:
+    """
+    Streaming sketch of served feature values, compared against the training baseline.
+    """
+
+    def __init__(self, baseline, config=None):
+        self.config = config or DriftMonitorConfig()
+        self.baseline = baseline
+        self._lock = threading.Lock()
+        self._edges = {col: np.asarray(b["edges"]) for col, b in baseline["numerical"].items()}
+        self._category_index = {
+            col: {category: i for i, category in enumerate(b["categories"])}
+            for col, b in baseline["categorical"].items()
+        }
+        # Known categories (without the unseen bucket) in count order, for categorical codes
+        self._categories = {
+            col: pd.Index([category for category in b["categories"] if category != OTHER_CATEGORY])
+            for col, b in baseline["categorical"].items()
+        }
+        self._numerical_cols = list(self._edges)
+        self._categorical_cols = list(self._category_index)
+        self.reset()
+
+    @classmethod
+    def from_baseline_file(cls, config=None):
+        config = config or DriftMonitorConfig()
+        with open(config.baseline_file_path) as file_obj:
+            return cls(json.load(file_obj), config)
+
+    def reset(self):
+        with self._lock:
+            self.n_observed = 0
+            self._updates_since_snapshot = 0
+            self.counts = {
+                col: np.zeros(len(edges) + 1, dtype=np.int64) for col, edges in self._edges.items()
+            }
+            self.counts.update({
+                col: np.zeros(len(index), dtype=np.int64) for col, index in self._category_index.items()
+            })
+
+    def update(self, features):
+        """Add a batch of served feature rows (DataFrame) to the sketch."""
+        # Column-wise numpy access; selecting sub-frames costs more than the sketch update itself
+        with self._lock:
+            for col in self._numerical_cols:
+                values = features[col].to_numpy(dtype=np.float64)
+                values = values[~np.isnan(values)]
+                counts = self.counts[col]
+                counts += np.bincount(np.searchsorted(self._edges[col], values, side="right"), minlength=len(counts))
+
+            for col in self._categorical_cols:
+                counts = self.counts[col]
+                index = self._category_index[col]
+                other = index[OTHER_CATEGORY]   # unseen or missing
+                values = features[col].to_numpy()
+                if len(values) < self.config.vectorize_min_rows:
+                    # A hash lookup per value; building categorical codes costs ~50us per call
+                    for value in values:
+                        counts[index.get(value, other)] += 1
+                else:
+                    # Categorical codes (-1 for unseen or missing), counted in one pass
+                    codes = self._categories[col].get_indexer(values)
+                    counts += np.bincount(np.where(codes < 0, other, codes), minlength=len(counts))
+
+            self.n_observed += len(features)
+            self._updates_since_snapshot += 1
+            snapshot_due = self._updates_since_snapshot >= self.config.snapshot_every
+            if snapshot_due:
+                self._updates_since_snapshot = 0
+
+        if snapshot_due:
+            self.save_state()
+
+    def state(self):
+        with self._lock:
+            return {
+                "baseline_id": self.baseline["baseline_id"],
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "n_observed": int(self.n_observed),
+                "counts": {col: counts.tolist() for col, counts in self.counts.items()},
+            }
+
+    def state_file_path(self):
+        return os.path.join(self.config.state_dir, f"state_{os.getpid()}.json")
+
+    def save_state(self):
+        """Snapshot this worker's sketch to disk (written atomically)."""
+        try:
+            os.makedirs(self.config.state_dir, exist_ok=True)
+            path = self.state_file_path()
+            with open(path + ".tmp", "w") as file_obj:
+                json.dump(self.state(), file_obj)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logging.error(f"Could not snapshot drift state: {e}")
+
+    def drift_scores(self, states=None):
+        """
+        PSI per feature for the given sketch states (default: this worker's sketch).
+
+        Returns:
+            dict: n_observed, per-feature scores, the max score, the drifted
+                  features and whether the drift threshold is exceeded.
+        """
+        states = states if states is not None else [self.state()]
+        # Sketches taken against an older baseline have different bins
+        states = [state for state in states if state.get("baseline_id") == self.baseline["baseline_id"]]
+        n_observed = sum(state["n_observed"] for state in states)
+
+        scores = {}
+        if n_observed > 0:
+            sections = list(self.baseline["numerical"].items()) + list(self.baseline["categorical"].items())
+            for col, reference in sections:
+                counts = np.sum([state["counts"][col] for state in states], axis=0)
+                if counts.sum() > 0:
+                    scores[col] = population_stability_index(reference["proportions"], counts / counts.sum())
+
+        threshold = self.config.drift_threshold
+        max_score = max(scores.values(), default=0.0)
+        return {
+            "n_observed": int(n_observed),
+            "scores": scores,
+            "max_score": max_score,
+            "drifted_features": sorted(col for col, score in scores.items() if score > threshold),
+            "drift_detected": max_score > threshold,
+        }
+
+    def merged_drift_scores(self):
+        """Drift scores over the snapshots of every serving worker, including this one."""
+        try:
+            self.save_state()
+            return self.drift_scores(read_drift_states(self.config))
+
+        except Exception as e:
+            logging.info("Exception occurred in merged_drift_scores")
+            raise customexception(e, sys)
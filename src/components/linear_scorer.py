@@ -0,0 +1,212 @@
+"""
+Linear Scorer Module
+
+When the served model is linear (LinearRegression, Ridge, Lasso, ElasticNet),
+a prediction is
+
+    intercept + sum_j w_j * (x_j - mean_j) / scale_j      (6 numerical features)
+              + sum_c w_c * (code_c - mean_c) / scale_c   (cut, color, clarity)
+
+The categorical part only depends on the (cut, color, clarity) combination,
+and there are just 5 x 7 x 8 = 280 of them. At export time the intercept, the
+StandardScaler means and the categorical terms are folded into one offset per
+combination, and the scaler's scales are folded into the numerical
+coefficients. Scoring a row is then one table lookup plus a 6-term dot product:
+
+    price = offsets[cut, color, clarity] + x_raw . (w / scale)
+
+The preprocessor's imputation is kept (missing numericals take the training
+median, missing categoricals the training mode), and unknown categories are
+rejected like the OrdinalEncoder rejects them.
+
+The export is checked against model.predict(preprocessor.transform(df)) on the
+test set. The table is only written to artifacts/linear_scorer.json, and used by
+PredictPipeline, if the largest difference is within `parity_tolerance`.
+Otherwise the file records why the model is served the usual way.
+"""
+
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.utils import load_object
+from src.components.data_transformation import NUMERICAL_COLS, CATEGORICAL_COLS
+
+
+LINEAR_MODELS = (LinearRegression, Ridge, Lasso, ElasticNet)
+
+
+@dataclass
+class LinearScorerConfig:
+    scorer_file_path: str = os.path.join("artifacts", "linear_scorer.json")
+    parity_tolerance: float = 1e-6   # max |price| difference allowed against the model
+    timing_repeats: int = 3
+
+
+class LinearScorer:
+    """Per-combination offsets plus folded numerical coefficients."""
+
+    def __init__(self, categories, offsets, coefficients, numerical_fill, categorical_fill):
+        self.categories = categories   # column -> category list (encoding order)
+        self.offsets = np.asarray(offsets, dtype=np.float64).ravel()   # flat (cut, color, clarity) table
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.numerical_fill = np.asarray(numerical_fill, dtype=np.float64)
+        self.categorical_fill = categorical_fill
+        self.shape = tuple(len(categories[col]) for col in CATEGORICAL_COLS)
+        self.codes = {col: {value: code for code, value in enumerate(categories[col])} for col in CATEGORICAL_COLS}
+
+    @classmethod
+    def from_model(cls, preprocessor, model):
+        """Fold the fitted preprocessor and linear model into the table."""
+        num_pipeline = preprocessor.named_transformers_["num_pipeline"]
+        cat_pipeline = preprocessor.named_transformers_["cat_pipeline"]
+        num_scaler, cat_scaler = num_pipeline.named_steps["scaler"], cat_pipeline.named_steps["scaler"]
+        categories = {
+            col: [str(value) for value in values]
+            for col, values in zip(CATEGORICAL_COLS, cat_pipeline.named_steps["ordinalencoder"].categories_)
+        }
+
+        # ColumnTransformer output: numerical columns first, then categorical
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        num_coef, cat_coef = coef[:len(NUMERICAL_COLS)], coef[len(NUMERICAL_COLS):]
+
+        num_mean = num_scaler.mean_ if num_scaler.with_mean else np.zeros(len(NUMERICAL_COLS))
+        cat_mean = cat_scaler.mean_ if cat_scaler.with_mean else np.zeros(len(CATEGORICAL_COLS))
+        coefficients = num_coef / num_scaler.scale_
+        base = float(model.intercept_) - float(np.dot(num_mean, coefficients))
+
+        # Categorical contribution of every code, broadcast over the (cut, color, clarity) grid
+        grids = np.meshgrid(*(np.arange(len(categories[col])) for col in CATEGORICAL_COLS), indexing="ij")
+        offsets = np.full(grids[0].shape, base)
+        for i, grid in enumerate(grids):
+            offsets += cat_coef[i] * (grid - cat_mean[i]) / cat_scaler.scale_[i]
+
+        return cls(
+            categories=categories,
+            offsets=offsets,
+            coefficients=coefficients,
+            numerical_fill=num_pipeline.named_steps["imputer"].statistics_,
+            categorical_fill=dict(zip(CATEGORICAL_COLS, map(str, cat_pipeline.named_steps["imputer"].statistics_))),
+        )
+
+    def to_dict(self):
+        return {
+            "numerical_columns": NUMERICAL_COLS,
+            "categorical_columns": CATEGORICAL_COLS,
+            "categories": self.categories,
+            "offsets": self.offsets.reshape(self.shape).tolist(),
+            "coefficients": self.coefficients.tolist(),
+            "numerical_fill": self.numerical_fill.tolist(),
+            "categorical_fill": self.categorical_fill,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state["categories"], state["offsets"], state["coefficients"],
+                   state["numerical_fill"], state["categorical_fill"])
+
+    def predict(self, features):
+        """Prices for a DataFrame of raw features (same columns as the preprocessor takes)."""
+        # Plain dict lookups and column stacking: far less overhead than pandas for a single row
+        index = np.zeros(len(features), dtype=np.intp)
+        for col, size in zip(CATEGORICAL_COLS, self.shape):
+            lookup = self.codes[col]
+            values = features[col].to_numpy()
+            codes = np.fromiter((lookup.get(value, -1) for value in values), dtype=np.intp, count=len(values))
+            if (codes < 0).any():
+                codes[pd.isna(values)] = lookup[self.categorical_fill[col]]
+                if (codes < 0).any():
+                    unknown = sorted(set(map(str, values[codes < 0])))
+                    raise ValueError(f"Found unknown categories {unknown} in column {col}")
+            index = index * size + codes
+
+        X = np.column_stack([features[col].to_numpy(dtype=np.float64) for col in NUMERICAL_COLS])
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.numerical_fill, X)
+        return self.offsets[index] + X @ self.coefficients
+
+
+def read_linear_scorer(file_path=LinearScorerConfig.scorer_file_path):
+    """The exported LinearScorer, or None if there is none (or it was not accepted)."""
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path) as file_obj:
+        state = json.load(file_obj)
+    return LinearScorer.from_dict(state["scorer"]) if state.get("enabled") else None
+
+
+class LinearScorerExport:
+    def __init__(self):
+        self.linear_scorer_config = LinearScorerConfig()
+
+    def best_time(self, fn):
+        best = float("inf")
+        for _ in range(self.linear_scorer_config.timing_repeats):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def initiate_export(self, test_data_path, preprocessor_path, model_path):
+        """
+        Export the combination table for a linear model and check it against the model.
+
+        Returns:
+            dict: The export report (also written to linear_scorer.json).
+        """
+        try:
+            config = self.linear_scorer_config
+            model = load_object(model_path)
+
+            if not isinstance(model, LINEAR_MODELS):
+                report = {"enabled": False, "model": type(model).__name__, "reason": "served model is not linear"}
+            else:
+                preprocessor = load_object(preprocessor_path)
+                scorer = LinearScorer.from_model(preprocessor, model)
+
+                features = pd.read_csv(test_data_path).drop(columns=["price", "id"])
+                expected = model.predict(preprocessor.transform(features))
+                actual = scorer.predict(features)
+                max_error = float(np.max(np.abs(actual - expected)))
+                accepted = max_error <= config.parity_tolerance
+
+                report = {
+                    "enabled": bool(accepted),
+                    "model": type(model).__name__,
+                    "reason": "matches the model" if accepted else "differs from the model beyond the tolerance",
+                    "max_price_error": max_error,
+                    "parity_tolerance": config.parity_tolerance,
+                    "rows_checked": int(len(features)),
+                    "combinations": int(scorer.offsets.size),
+                    "rows_per_second": {
+                        "model": len(features) / self.best_time(lambda: model.predict(preprocessor.transform(features))),
+                        "table": len(features) / self.best_time(lambda: scorer.predict(features)),
+                    },
+                    "scorer": scorer.to_dict(),
+                }
+                if not accepted:
+                    logging.warning(f"Linear scorer refused: max price error {max_error:.3g} > {config.parity_tolerance}")
+
+            os.makedirs(os.path.dirname(config.scorer_file_path), exist_ok=True)
+            with open(config.scorer_file_path, "w") as file_obj:
+                json.dump(report, file_obj, indent=2)
+
+            logging.info(f"Linear scorer: {report['reason']} ({report['model']})")
+            return report
+
+        except Exception as e:
+            logging.info("Exception occurred in initiate_export")
+            raise customexception(e, sys)
+
+
+# Commands
+# python -m src.pipeline.stages linear-scorer
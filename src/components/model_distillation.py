@@ -0,0 +1,184 @@
+"""
+Model Distillation Module
+
+When the tournament picks a large ensemble (RandomForest, XGBoost) the model
+artifact is big and slow to load and score. This optional stage (run.distill)
+fits a compact student, a shallow histogram gradient-boosting model on the same
+DataTransformation features, to the teacher's predictions:
+
+1. Transfer set: the training rows plus synthetic rows. Each synthetic row
+   combines the numerical features of one training row (with a little Gaussian
+   noise in scaled units) with the categorical features of another, so it
+   covers combinations that are missing from the training data while every
+   categorical value stays a valid encoded category.
+2. The teacher labels the transfer set and the student is fitted to those labels.
+3. Fidelity is measured on the test set: R2 and MAE of the student against the
+   teacher's predictions, plus both models' R2 against the true prices and
+   their serving cost.
+
+The student becomes the serving artifact only if its fidelity R2 reaches
+run.distill_min_fidelity and it is smaller and no slower (single-row p99) than
+the teacher; otherwise the teacher is served as before. The decision is
+written to artifacts/distillation.json.
+"""
+
+import os
+import sys
+import json
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.utils import save_object, load_object
+from src.utils.metrics import regression_metrics
+from src.utils.model_selection import measure_serving_cost
+from src.config.run_config import RunConfig
+from src.components.data_transformation import NUMERICAL_COLS
+
+
+@dataclass
+class ModelDistillationConfig:
+    student_model_file_path: str = os.path.join("artifacts", "student_model.pkl")
+    distillation_report_file_path: str = os.path.join("artifacts", "distillation.json")
+    synthetic_ratio: float = 1.0   # synthetic rows per training row in the transfer set
+    noise_scale: float = 0.05   # std of the noise added to (standard-scaled) numerical features
+    student_max_depth: int = 4
+    student_max_iter: int = 300
+    student_learning_rate: float = 0.1
+
+
+def serving_model_path(model_path, config=None):
+    """The student if the last distillation published one, otherwise `model_path`."""
+    config = config or ModelDistillationConfig()
+    if os.path.exists(config.distillation_report_file_path):
+        with open(config.distillation_report_file_path) as file_obj:
+            if json.load(file_obj).get("published_student"):
+                return config.student_model_file_path
+    return model_path
+
+
+def distilled_teacher_path(model_path, config=None):
+    """The teacher `model_path` was distilled from, or None if it is not the published student."""
+    config = config or ModelDistillationConfig()
+    if os.path.normpath(model_path) != os.path.normpath(config.student_model_file_path):
+        return None
+    if not os.path.exists(config.distillation_report_file_path):
+        return None
+    with open(config.distillation_report_file_path) as file_obj:
+        report = json.load(file_obj)
+    return report.get("teacher_model_path") if report.get("published_student") else None
+
+
+class ModelDistillation:
+    def __init__(self, run_config=None):
+        self.model_distillation_config = ModelDistillationConfig()
+        self.run_config = run_config or RunConfig.from_params()
+
+    def get_student(self):
+        config = self.model_distillation_config
+        return HistGradientBoostingRegressor(
+            max_depth=config.student_max_depth,
+            max_iter=config.student_max_iter,
+            learning_rate=config.student_learning_rate,
+            random_state=self.run_config.seed,
+        )
+
+    def synthetic_samples(self, X, n_rows, rng):
+        """Recombine numerical and categorical features of random training rows, with noise."""
+        n_numerical = len(NUMERICAL_COLS)   # ColumnTransformer output: numerical columns first
+        numerical = X[rng.integers(0, len(X), n_rows), :n_numerical]
+        numerical = numerical + rng.normal(0.0, self.model_distillation_config.noise_scale, numerical.shape)
+        categorical = X[rng.integers(0, len(X), n_rows), n_numerical:]
+        return np.hstack([numerical, categorical]).astype(X.dtype, copy=False)
+
+    def transfer_set(self, X_train, teacher):
+        """Training rows plus synthetic rows (seeded), labelled by the teacher."""
+        rng = np.random.default_rng(self.run_config.seed)
+        n_synthetic = int(len(X_train) * self.model_distillation_config.synthetic_ratio)
+        X_transfer = np.vstack([X_train, self.synthetic_samples(X_train, n_synthetic, rng)])
+        return X_transfer, teacher.predict(X_transfer)
+
+    def initiate_model_distillation(self, train_array, test_array, model_path):
+        """
+        Distill the teacher at `model_path` into a compact student.
+
+        Returns:
+            str: Path of the model to serve (the student if accepted, else the teacher).
+        """
+        try:
+            config = self.model_distillation_config
+            report_path = config.distillation_report_file_path
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+
+            teacher = load_object(model_path)
+            report = {"teacher": type(teacher).__name__, "teacher_model_path": model_path, "published_student": False}
+
+            if not self.run_config.distill:
+                report["reason"] = "distillation not requested"
+            elif hasattr(teacher, "coef_"):
+                report["reason"] = "teacher is a linear model and already compact"
+            else:
+                X_train, X_test, y_test = train_array[:, :-1], test_array[:, :-1], test_array[:, -1]
+
+                # Transfer set: training rows + synthetic rows, labelled by the teacher
+                X_transfer, y_transfer = self.transfer_set(X_train, teacher)
+                n_synthetic = len(X_transfer) - len(X_train)
+
+                student = self.get_student()
+                student.fit(X_transfer, y_transfer)
+
+                teacher_test = teacher.predict(X_test)
+                student_test = student.predict(X_test)
+                fidelity = regression_metrics(teacher_test, student_test)
+
+                # Only worth serving if it is faithful and actually cheaper than the teacher
+                min_fidelity = self.run_config.distill_min_fidelity
+                teacher_cost = measure_serving_cost(teacher, X_test)
+                student_cost = measure_serving_cost(student, X_test)
+                cheaper = (
+                    student_cost["Model Bytes"] < teacher_cost["Model Bytes"]
+                    and student_cost["Single Row p99 ms"] <= teacher_cost["Single Row p99 ms"]
+                )
+                accepted = fidelity["r2"] >= min_fidelity and cheaper
+                if accepted:
+                    reason = "fidelity meets the threshold"
+                elif fidelity["r2"] < min_fidelity:
+                    reason = "fidelity below the threshold"
+                else:
+                    reason = "student is not smaller and faster than the teacher"
+                report.update({
+                    "student": type(student).__name__,
+                    "transfer_rows": int(len(X_transfer)),
+                    "synthetic_rows": n_synthetic,
+                    "fidelity_r2": fidelity["r2"],
+                    "fidelity_mae": fidelity["mae"],
+                    "min_fidelity": min_fidelity,
+                    "teacher_test_r2": regression_metrics(y_test, teacher_test)["r2"],
+                    "student_test_r2": regression_metrics(y_test, student_test)["r2"],
+                    "teacher_cost": teacher_cost,
+                    "student_cost": student_cost,
+                    "published_student": bool(accepted),
+                    "reason": reason,
+                })
+
+                if accepted:
+                    save_object(config.student_model_file_path, student)
+                else:
+                    logging.warning(f"Student refused: {reason} (fidelity R2 {fidelity['r2']:.4f})")
+
+            with open(report_path, "w") as file_obj:
+                json.dump(report, file_obj, indent=2)
+            logging.info(f"Distillation report: {report}")
+
+            return config.student_model_file_path if report["published_student"] else model_path
+
+        except Exception as e:
+            logging.info("Exception occurred in initiate_model_distillation")
+            raise customexception(e, sys)
+
+
+# Commands
+# python -m src.pipeline.stages distill
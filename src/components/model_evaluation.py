@@ -10,16 +10,24 @@ calculation and MLflow logging in a clean workflow.
 
 import os
 import sys
-import mlflow
-import mlflow.sklearn
-import numpy as np
-import pickle
+import pandas as pd
+from dataclasses import dataclass
 from src.utils.utils import load_object
-from urllib.parse import urlparse
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from src.utils.tracking import log_run, background_tracker
+from src.utils.metrics import regression_metrics
+from src.utils.model_selection import COST_COLUMNS
 from src.logger.logging_config import logging
 from src.exception.exception import customexception
 
+
+@dataclass
+class ModelEvaluationConfig:
+    experiment_name: str = "Default"
+    registered_model_name: str = "ml_model"
+    # Do the MLflow writes on a background thread; flush_tracking() waits for them
+    async_tracking: bool = False
+
+
 class ModelEvaluation:
     """
     Handles model evaluation using standard regression metrics (RMSE, MAE, R²).
@@ -28,6 +36,7 @@ class ModelEvaluation:
 
     def __init__(self):
         """Initialize evaluation and log the start of the process."""
+        self.model_evaluation_config = ModelEvaluationConfig()
         logging.info("evaluation started")
 
     def eval_metrics(self, actual, pred):
@@ -44,59 +53,97 @@ class ModelEvaluation:
                 mae (float): Mean Absolute Error
                 r2 (float): R-squared score
         """
-        rmse = np.sqrt(mean_squared_error(actual, pred))  # RMSE
-        mae = mean_absolute_error(actual, pred)  # MAE
-        r2 = r2_score(actual, pred)  # R²
+        metrics = regression_metrics(actual, pred)  # RMSE, MAE and R² in one pass
         logging.info("evaluation metrics captured")
-        return rmse, mae, r2
+        return metrics["rmse"], metrics["mae"], metrics["r2"]
 
-    def initiate_model_evaluation(self, train_array, test_array, model_path):
+    def initiate_model_evaluation(self, train_array, test_array, model_path=os.path.join("artifacts", "model.pkl"),
+                                  test_predictions=None, model_report_path=None, serving_model_path=None):
         """
         Run model evaluation and log metrics with MLflow.
         
         Args:
             train_array (np.ndarray): Training dataset (unused here, only test data is used).
             test_array (np.ndarray): Test dataset, last column is target, others are features.
+            model_path (str): Path of the pickled model to evaluate.
+            test_predictions (np.ndarray): Test-set predictions already produced by
+                ModelTrainer for this model; when given, the test set is not predicted again.
+                Load them from disk with model_trainer.load_test_predictions, which checks
+                they were made by the model at `model_path`.
+            model_report_path (str): Tournament report from ModelTrainer; the selected
+                model's serving costs are logged as metrics and the report as an artifact.
+            serving_model_path (str): The model that is actually served (the distilled
+                student), if it is not `model_path`. Its metrics are returned and its pickle
+                is logged; the tournament winner's metrics are kept as `teacher_*`.
         
         Process:
             1. Load the trained model from artifacts.
-            2. Predict on test data.
+            2. Predict on test data (skipped when `test_predictions` is given).
             3. Evaluate using RMSE, MAE, and R².
-            4. Log metrics and model into MLflow.
+            4. Log metrics (one batched call) and the model pickle into MLflow,
+               on a background thread when `async_tracking` is enabled.
         """
         try:
             X_test, y_test = (test_array[:, :-1], test_array[:, -1])
 
-            model_path = os.path.join("artifacts", "model.pkl")
             model = load_object(model_path)
 
             # mlflow.set_registry_uri("") #cloud usage
-            
-            logging.info("model has register")
 
-            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-            print(tracking_url_type_store)
-
-            with mlflow.start_run():
+            if test_predictions is not None and len(test_predictions) == len(y_test):
+                prediction = test_predictions
+                logging.info("reusing test predictions from model training")
+            else:
                 prediction = model.predict(X_test)
 
-                (rmse, mae, r2) = self.eval_metrics(y_test, prediction)
-
-                mlflow.log_metric("rmse", rmse)
-                mlflow.log_metric("r2", r2)
-                mlflow.log_metric("mae", mae)
-
-                # Model registry does not work with file store
-                if tracking_url_type_store != "file":
-                    mlflow.sklearn.log_model(model, "model", registered_model_name="ml_model")
-                else:
-                    mlflow.sklearn.log_model(model, "model")
-                
-                    return {
-                            "rmse": rmse,
-                            "mae": mae,
-                            "r2": r2
-                        }
+            (rmse, mae, r2) = self.eval_metrics(y_test, prediction)
+
+            metrics = {
+                    "rmse": float(rmse),
+                    "mae": float(mae),
+                    "r2": float(r2)
+                }
+
+            # A distilled student is what gets served: report its metrics, keep the winner's for reference
+            params = {}
+            if serving_model_path is not None and serving_model_path != model_path:
+                model_path, model = serving_model_path, load_object(serving_model_path)
+                teacher_metrics = {f"teacher_{name}": value for name, value in metrics.items()}
+                (rmse, mae, r2) = self.eval_metrics(y_test, model.predict(X_test))
+                metrics = {"rmse": float(rmse), "mae": float(mae), "r2": float(r2), **teacher_metrics}
+                params["served_model"] = type(model).__name__
+                logging.info(f"evaluated served model {serving_model_path}")
+
+            # Serving costs of the selected model, measured during the tournament
+            tracked_metrics, artifact_paths = dict(metrics), []
+            if model_report_path is not None and os.path.exists(model_report_path):
+                report = pd.read_csv(model_report_path)
+                if "Selected" in report.columns:
+                    selected = report[report["Selected"]].iloc[0]
+                    params["model"] = selected["Model"]
+                    for column in COST_COLUMNS + ["Fit Seconds"]:
+                        if column in report.columns and pd.notna(selected[column]):
+                            tracked_metrics[column.lower().replace(" ", "_")] = float(selected[column])
+                artifact_paths.append(model_report_path)
+
+            # The model is logged from the pickle ModelTrainer already wrote, not re-serialized
+            tracking_kwargs = dict(
+                metrics=tracked_metrics,
+                model_path=model_path,
+                model=model,
+                params=params,
+                artifact_paths=artifact_paths,
+                experiment_name=self.model_evaluation_config.experiment_name,
+                registered_model_name=self.model_evaluation_config.registered_model_name,
+            )
+            if self.model_evaluation_config.async_tracking:
+                background_tracker.submit(log_run, **tracking_kwargs)
+                logging.info("MLflow logging queued on the background tracker")
+            else:
+                log_run(**tracking_kwargs)
+                logging.info("model has register")
+
+            return metrics
         except Exception as e:
             raise customexception(e, sys)
         
@@ -5,10 +5,17 @@ from src.logger.logging_config import logging
 from src.exception.exception import customexception
 import os
 import sys
+import json
 from dataclasses import dataclass
 from pathlib import Path
 
 from src.utils.utils import save_object,evaluate_model
+from src.utils.cross_validation import cross_validate_models
+from src.utils.model_selection import measure_serving_cost, pareto_optimal, select_model
+from src.utils.thread_budget import estimator_n_jobs
+from src.utils.executors import ExecutorConfig, get_executor
+from src.config.run_config import RunConfig, file_md5
+from src.components.data_transformation import DataTransformation
 
 from sklearn.linear_model import LinearRegression, Ridge,Lasso,ElasticNet
 from xgboost import XGBRegressor
@@ -19,13 +26,82 @@ from sklearn.ensemble import RandomForestRegressor
 @dataclass 
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join('artifacts','model.pkl')
+    model_report_file_path = os.path.join('artifacts','model_report.csv')
+    test_predictions_file_path = os.path.join('artifacts','test_predictions.npy')   # identity in test_predictions.json
+    # Estimate training metrics on this many sampled rows (None = the full training set)
+    train_metrics_sample_size = None
+    # Parallel workers for the cross-validation fold x model jobs (None = the process thread budget)
+    cv_n_jobs = None
     
     
+def test_predictions_identity_path(predictions_path):
+    """Sidecar of a test predictions file, naming the model that made them."""
+    return os.path.splitext(predictions_path)[0] + '.json'
+
+
+def save_test_predictions(predictions_path, predictions, model_path):
+    """Save test predictions together with the md5 of the model pickle that produced them."""
+    np.save(predictions_path, predictions)
+    with open(test_predictions_identity_path(predictions_path), 'w') as file_obj:
+        json.dump({'model_md5': file_md5(model_path), 'rows': int(len(predictions))}, file_obj)
+
+
+def load_test_predictions(predictions_path, model_path):
+    """
+    Saved test predictions, if they were made by the model now at `model_path`.
+
+    Returns None (predict again) when the file, its identity or the model is
+    missing, or when the model was replaced since the predictions were saved.
+    """
+    identity_path = test_predictions_identity_path(predictions_path)
+    if not all(os.path.exists(path) for path in (predictions_path, identity_path, model_path)):
+        return None
+    with open(identity_path) as file_obj:
+        identity = json.load(file_obj)
+    if identity.get('model_md5') != file_md5(model_path):
+        logging.info(f'{predictions_path} was made by another model, not reusing it')
+        return None
+    return np.load(predictions_path)
+
+
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, run_config=None, executor_config=None):
         self.model_trainer_config = ModelTrainerConfig()
+        self.run_config = run_config or RunConfig.from_params()
+        self.executor_config = executor_config or ExecutorConfig.from_params()
+        self.best_model_test_predictions = None
     
-    def initate_model_training(self,train_array,test_array):
+    def get_models(self):
+        """Candidate models for the tournament, keyed by name."""
+        # Every estimator with randomness is seeded so a rerun reproduces the same model
+        seed = self.run_config.seed
+        # Native thread pools sized by the thread budget instead of every core of the host
+        n_jobs = estimator_n_jobs()
+        return {
+            'LinearRegression':LinearRegression(),
+            'Lasso':Lasso(random_state=seed),
+            'Ridge':Ridge(random_state=seed),
+            'Elasticnet':ElasticNet(random_state=seed),
+            'RandomForest':RandomForestRegressor(random_state=seed, n_jobs=n_jobs),
+            'XGboost':XGBRegressor(random_state=seed, n_jobs=n_jobs)
+        }
+
+    def initate_model_training(self,train_array,test_array,train_data_path=None):
+        """
+        Run the model tournament and save the best model.
+
+        With `cv_folds` > 1 in the run config (and the raw training CSV given as
+        `train_data_path`), candidates are ranked by their mean k-fold CV R2 and
+        only the winner is refitted on the full training set. Otherwise they are
+        ranked by R2 on the single train/test split.
+
+        Every fitted candidate is also measured for serialized size and predict
+        latency, and the run config's `selection_policy` decides how score and
+        cost are traded off (see src/utils/model_selection.py).
+
+        Fits run on the executor from params.yaml (src/utils/executors.py);
+        the in_process default keeps cross-validation on the local joblib pool.
+        """
         try:
             logging.info('Splitting Dependent and Independent variables from train and test data')
             X_train, y_train, X_test, y_test = (
@@ -35,27 +111,74 @@ class ModelTrainer:
                 test_array[:,-1]
             )
 
-            models={
-            'LinearRegression':LinearRegression(),
-            'Lasso':Lasso(),
-            'Ridge':Ridge(),
-            'Elasticnet':ElasticNet(),
-            'RandomForest':RandomForestRegressor(),
-            'XGboost':XGBRegressor()
+            seed = self.run_config.seed
+            models = self.get_models()
 
+            policy = self.run_config.selection_policy
+            with get_executor(self.executor_config) as executor:
+                if self.run_config.cv_folds > 1 and train_data_path is not None:
+                    # Rank by k-fold CV, then refit on the full training set
+                    cv_report, cpu_seconds = cross_validate_models(
+                        pd.read_csv(train_data_path), models,
+                        DataTransformation().get_data_transformation,
+                        n_splits=self.run_config.cv_folds,
+                        seed=seed,
+                        n_jobs=self.model_trainer_config.cv_n_jobs,
+                        executor=executor
+                    )
+                    logging.info(f'Cross-validation used {cpu_seconds:.1f} CPU seconds')
+                    score_column = 'CV R2 Mean'
+
+                    # best_r2 only needs the CV winner; cost-aware policies need every candidate fitted
+                    if policy == 'best_r2':
+                        refit_names = [cv_report.loc[cv_report[score_column].idxmax(), 'Model']]
+                    else:
+                        refit_names = list(models)
+
+                    refit_models = {model_name: models[model_name] for model_name in refit_names}
+                    refit_report, test_predictions = evaluate_model(
+                        X_train, y_train, X_test, y_test, refit_models,
+                        train_sample_size=self.model_trainer_config.train_metrics_sample_size,
+                        seed=seed,
+                        return_predictions=True,
+                        executor=executor
+                    )
+                    models.update(refit_models)
+                    model_report = cv_report.merge(refit_report, on='Model', how='left')
+                else:
+                    model_report, test_predictions = evaluate_model(
+                        X_train, y_train, X_test, y_test, models,
+                        train_sample_size=self.model_trainer_config.train_metrics_sample_size,
+                        seed=seed,
+                        return_predictions=True,
+                        executor=executor
+                    )
+                    score_column = 'Test R2'
+
+            # Serving cost of every fitted candidate: pickled size, single-row and batch latency
+            costs = pd.DataFrame([
+                dict(Model=model_name, **measure_serving_cost(models[model_name], X_test))
+                for model_name in test_predictions
+            ])
+            model_report = model_report.merge(costs, on='Model', how='left')
+            model_report['Pareto Optimal'] = pareto_optimal(model_report, score_column)
+
+            # Pick the winner by the configured score/cost policy
+            best_model_idx, reason = select_model(
+                model_report, score_column, policy=policy,
+                max_p99_latency_ms=self.run_config.max_p99_latency_ms,
+                max_model_bytes=self.run_config.max_model_bytes,
+                r2_tolerance=self.run_config.r2_tolerance
+            )
+            best_model_name = model_report.loc[best_model_idx, 'Model']
+            best_model_score = model_report.loc[best_model_idx, score_column]
+            model_report['Selected'] = model_report.index == best_model_idx
+            logging.info(f'Selection policy {policy}: {reason}')
 
-        }
-            
-            model_report: pd.DataFrame = evaluate_model(X_train, y_train, X_test, y_test, models)
             print(model_report)
             print('\n' + '='*90 + '\n')
             logging.info(f'Model Report : \n{model_report}')
 
-            # Get best model based on Test R2
-            best_model_idx = model_report['Test R2'].idxmax()
-            best_model_name = model_report.loc[best_model_idx, 'Model']
-            best_model_score = model_report.loc[best_model_idx, 'Test R2']
-
             best_model = models[best_model_name]
 
             print(f"Best Model Found, Model Name: {best_model_name}, R2 Score: {best_model_score}")
@@ -67,7 +190,20 @@ class ModelTrainer:
                 file_path=self.model_trainer_config.trained_model_file_path,
                 obj=best_model
             )
-          
+
+            # Keep the full tournament report next to the model
+            model_report.to_csv(self.model_trainer_config.model_report_file_path, index=False)
+
+            # Keep the winner's test predictions so evaluation does not predict again
+            self.best_model_test_predictions = test_predictions[best_model_name]
+            save_test_predictions(
+                self.model_trainer_config.test_predictions_file_path,
+                self.best_model_test_predictions,
+                self.model_trainer_config.trained_model_file_path,
+            )
+
+            return self.model_trainer_config.trained_model_file_path
+
 
         except Exception as e:
             logging.info('Exception occured at Model Training')
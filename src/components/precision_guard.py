@@ -0,0 +1,157 @@
+"""
+Precision Guard Module
+
+Decides whether the float32 mode (run.float32) may be served. That mode
+changes training too: DataTransformation writes float32 arrays and every model
+is fitted on them. So the guard fits a float64 reference, a clone of the
+served estimator (same params and seed), on the float64 training features, and
+compares the float32 model on float32 test features against it. A distilled
+student is refitted the way it was distilled: its teacher is refitted in
+float64 and labels the same seeded transfer set. float32 is only served when
+the largest price difference stays within the configured tolerance.
+
+On refusal the float64 reference is saved as artifacts/model_float64.pkl and
+served instead (see serving_model_path), so a refused float32 run falls back
+to float64 training and inference. The decision is written to
+artifacts/precision.json together with throughput and memory figures for both
+precisions, and PredictPipeline reads it to pick its inference dtype.
+"""
+
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.utils import load_object, save_object
+from src.config.run_config import RunConfig
+from src.components import model_distillation
+
+
+@dataclass
+class PrecisionGuardConfig:
+    precision_report_file_path: str = os.path.join("artifacts", "precision.json")
+    float64_model_file_path: str = os.path.join("artifacts", "model_float64.pkl")
+    timing_repeats: int = 3
+
+
+def read_inference_dtype(report_path=PrecisionGuardConfig.precision_report_file_path):
+    """dtype the guard approved for inference (float64 if no report exists)."""
+    if not os.path.exists(report_path):
+        return np.float64
+    with open(report_path) as file_obj:
+        return np.float32 if json.load(file_obj).get("inference_dtype") == "float32" else np.float64
+
+
+def serving_model_path(model_path, config=None):
+    """
+    The model to serve for a tournament winner at `model_path`: the float64
+    fallback if the guard refused float32, else the distilled student if one
+    was accepted, else `model_path`.
+    """
+    config = config or PrecisionGuardConfig()
+    if os.path.exists(config.precision_report_file_path):
+        with open(config.precision_report_file_path) as file_obj:
+            fallback = json.load(file_obj).get("fallback_model_path")
+        if fallback and os.path.exists(fallback):
+            return fallback
+    return model_distillation.serving_model_path(model_path)
+
+
+class PrecisionGuard:
+    def __init__(self, run_config=None):
+        self.precision_guard_config = PrecisionGuardConfig()
+        self.run_config = run_config or RunConfig.from_params()
+
+    def measure(self, model, X):
+        """Best-of-N throughput (rows/s) and feature-matrix memory for one dtype."""
+        best = float("inf")
+        for _ in range(self.precision_guard_config.timing_repeats):
+            start = time.perf_counter()
+            predictions = model.predict(X)
+            best = min(best, time.perf_counter() - start)
+        return predictions, {"rows_per_second": len(X) / best, "feature_bytes": int(X.nbytes)}
+
+    def fit_float64_reference(self, model, train_data_path, preprocessor, model_path=None):
+        """
+        The same estimator fitted on float64 training features.
+
+        A distilled student at `model_path` is fitted on its float64 teacher's
+        labels of the transfer set, not on the true prices.
+        """
+        train_df = pd.read_csv(train_data_path)
+        X_train = np.asarray(preprocessor.transform(train_df.drop(columns=["price", "id"])), dtype=np.float64)
+        y_train = train_df["price"].to_numpy(dtype=np.float64)
+
+        teacher_path = model_distillation.distilled_teacher_path(model_path) if model_path else None
+        if teacher_path is None:
+            return clone(model).fit(X_train, y_train)
+        teacher = clone(load_object(teacher_path)).fit(X_train, y_train)
+        X_transfer, y_transfer = model_distillation.ModelDistillation(self.run_config).transfer_set(X_train, teacher)
+        return clone(model).fit(X_transfer, y_transfer)
+
+    def initiate_precision_check(self, train_data_path, test_data_path, preprocessor_path, model_path):
+        """
+        Compare the float32-trained model against a float64-trained reference and record the decision.
+
+        Returns:
+            dict: The precision report (also written to precision.json). When
+                float32 is refused, `fallback_model_path` names the float64
+                model to serve instead.
+        """
+        try:
+            config = self.precision_guard_config
+            report_path = config.precision_report_file_path
+
+            if not self.run_config.float32:
+                report = {"inference_dtype": "float64", "reason": "float32 mode not requested"}
+            else:
+                preprocessor = load_object(preprocessor_path)
+                model = load_object(model_path)
+                reference = self.fit_float64_reference(model, train_data_path, preprocessor, model_path)
+
+                test_df = pd.read_csv(test_data_path)
+                X64 = np.asarray(preprocessor.transform(test_df.drop(columns=["price", "id"])), dtype=np.float64)
+                X32 = X64.astype(np.float32)
+
+                pred64, stats64 = self.measure(reference, X64)
+                pred32, stats32 = self.measure(model, X32)
+
+                max_error = float(np.max(np.abs(pred32.astype(np.float64) - pred64)))
+                tolerance = self.run_config.float32_tolerance
+                accepted = max_error <= tolerance
+
+                report = {
+                    "inference_dtype": "float32" if accepted else "float64",
+                    "reason": "within tolerance" if accepted else "price error exceeds tolerance, serving the float64 model",
+                    "max_price_error": max_error,
+                    "mean_price_error": float(np.mean(np.abs(pred32.astype(np.float64) - pred64))),
+                    "tolerance": tolerance,
+                    "float64": stats64,
+                    "float32": stats32,
+                }
+                if not accepted:
+                    save_object(config.float64_model_file_path, reference)
+                    report["fallback_model_path"] = config.float64_model_file_path
+                    logging.warning(f"float32 refused: max price error {max_error:.4f} > tolerance {tolerance}")
+
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            with open(report_path, "w") as file_obj:
+                json.dump(report, file_obj, indent=2)
+
+            logging.info(f"Precision report: {report}")
+            return report
+
+        except Exception as e:
+            logging.info("Exception occurred in initiate_precision_check")
+            raise customexception(e, sys)
+
+
+# Commands
+# python -m src.pipeline.stages precision
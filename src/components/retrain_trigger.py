@@ -0,0 +1,207 @@
+"""
+Retrain Trigger Module
+
+Decides whether the training pipeline should run, so the scheduler can poll
+often while a full model tournament only runs when there is a reason to.
+
+Reasons to retrain:
+1. New data: the source CSV changed since the last training. The check is
+   cheap first (size + mtime) and only escalates to a content checksum when
+   those differ, so a touched-but-identical file does not retrain. The row
+   count at the last training is kept as a watermark; appends are only acted
+   on once at least `min_new_rows` rows arrived.
+2. Drift: the merged serving drift sketches (see drift_monitor.py) exceed the
+   PSI threshold, with a cooldown so persistent drift does not retrain on
+   every poll. Drift decisions carry `drift: True`, and the pipeline then
+   trains even if the run fingerprint is unchanged.
+
+Changed data is debounced: the trigger waits until the file has been quiet for
+`debounce_seconds`, so a burst of appends results in a single retrain.
+
+The state of the last training is kept in artifacts/retrain_trigger.json.
+`trained_at`, which starts the drift cooldown, only moves when a training run
+completed; a run skipped as up to date only records the source watermark.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from dataclasses import dataclass
+
+import yaml
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.components.drift_monitor import DriftMonitor, DriftMonitorConfig, read_drift_states
+from src.utils.artifact_store import write_atomic
+
+
+@dataclass
+class RetrainTriggerConfig:
+    source_data_path: str = os.path.join("experiment", "datasets", "train.csv")
+    state_file_path: str = os.path.join("artifacts", "retrain_trigger.json")
+    debounce_seconds: float = 120.0   # source must be unchanged this long before retraining
+    min_new_rows: int = 1   # appended rows needed before retraining
+    drift_min_observations: int = 1000   # served rows needed before drift can trigger
+    drift_cooldown_seconds: float = 6 * 3600   # min time between drift-triggered retrains
+
+    @classmethod
+    def from_params(cls, params_path="params.yaml"):
+        """Build the config from the `retrain` section of params.yaml (defaults if absent)."""
+        try:
+            if not os.path.exists(params_path):
+                return cls()
+
+            with open(params_path) as file_obj:
+                params = yaml.safe_load(file_obj) or {}
+
+            return cls(**params.get("retrain", {}))
+
+        except Exception as e:
+            logging.info("Exception occurred in RetrainTriggerConfig.from_params")
+            raise customexception(e, sys)
+
+
+def scan_source(file_path, block_size=1 << 20):
+    """md5 and line count of a file in one pass over fixed-size blocks."""
+    md5 = hashlib.md5()
+    n_lines = 0
+    last_block = b""
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(block_size), b""):
+            md5.update(block)
+            n_lines += block.count(b"\n")
+            last_block = block
+    # A last line without a trailing newline still counts
+    if last_block and not last_block.endswith(b"\n"):
+        n_lines += 1
+    return md5.hexdigest(), n_lines
+
+
+class RetrainTrigger:
+    def __init__(self, config=None, drift_config=None):
+        self.config = config or RetrainTriggerConfig.from_params()
+        self.drift_config = drift_config or DriftMonitorConfig()
+
+    def read_state(self):
+        """State recorded at the last training, or None if there was none."""
+        if not os.path.exists(self.config.state_file_path):
+            return None
+        with open(self.config.state_file_path) as file_obj:
+            return json.load(file_obj)
+
+    def observe(self, state=None):
+        """
+        Describe the source file. The checksum is only recomputed when size or
+        mtime differ from the last observation.
+        """
+        try:
+            stat = os.stat(self.config.source_data_path)
+            observation = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+            state = state or {}
+            for recorded in (state.get("last_seen") or {}, state.get("source") or {}):
+                if recorded.get("size") == stat.st_size and recorded.get("mtime_ns") == stat.st_mtime_ns:
+                    observation.update(md5=recorded["md5"], rows=recorded["rows"])
+                    return observation
+
+            md5, n_lines = scan_source(self.config.source_data_path)
+            observation.update(md5=md5, rows=max(n_lines - 1, 0))   # minus the header
+            return observation
+
+        except Exception as e:
+            logging.info("Exception occurred in RetrainTrigger.observe")
+            raise customexception(e, sys)
+
+    def check_drift(self, state, now):
+        """Merged drift scores if drift may trigger a retrain now, else None."""
+        if not os.path.exists(self.drift_config.baseline_file_path):
+            return None
+        if state and now - state.get("trained_at", 0) < self.config.drift_cooldown_seconds:
+            return None
+
+        monitor = DriftMonitor.from_baseline_file(self.drift_config)
+        scores = monitor.drift_scores(read_drift_states(self.drift_config))
+        if scores["drift_detected"] and scores["n_observed"] >= self.config.drift_min_observations:
+            return scores
+        return None
+
+    def check(self, now=None):
+        """
+        Decide whether to retrain.
+
+        Returns:
+            dict: `retrain` (bool), `reason`, the source `observation` to pass to
+                  mark_trained once training succeeded, and the number of new rows.
+        """
+        try:
+            now = now if now is not None else time.time()
+            state = self.read_state()
+            observation = self.observe(state)
+            decision = {"retrain": False, "reason": "no change", "observation": observation, "new_rows": 0,
+                        "drift": False}
+
+            if state is None:
+                decision.update(retrain=True, reason="no previous training recorded")
+                return decision
+
+            recorded = state["source"]
+            if observation != state.get("last_seen"):
+                # Remember the checksum so the next poll of an unchanged file stays a stat call
+                state["last_seen"] = observation
+                write_atomic(self.config.state_file_path, json.dumps(state, indent=2))
+
+            if observation["md5"] != recorded["md5"]:
+                new_rows = observation["rows"] - recorded["rows"]
+                decision["new_rows"] = new_rows
+                quiet_for = now - observation["mtime_ns"] / 1e9
+
+                if quiet_for < self.config.debounce_seconds:
+                    decision["reason"] = f"source changed {quiet_for:.0f}s ago, waiting for it to settle"
+                elif 0 < new_rows < self.config.min_new_rows:
+                    decision["reason"] = f"{new_rows} new rows, below min_new_rows"
+                else:
+                    decision.update(retrain=True, reason=(
+                        f"{new_rows} new rows" if new_rows > 0 else "source data rewritten"
+                    ))
+                    return decision
+
+            drift = self.check_drift(state, now)
+            if drift is not None:
+                decision.update(retrain=True, drift=True,
+                                reason=f"drift in {', '.join(drift['drifted_features'])}")
+
+            return decision
+
+        except Exception as e:
+            logging.info("Exception occurred in RetrainTrigger.check")
+            raise customexception(e, sys)
+
+    def record_source(self, observation):
+        """
+        Advance the source watermark without a training run (the run was up to
+        date). `trained_at` is kept, so the drift cooldown does not restart.
+        """
+        try:
+            state = self.read_state() or {"trained_at": 0}
+            state["source"] = observation
+            os.makedirs(os.path.dirname(self.config.state_file_path), exist_ok=True)
+            write_atomic(self.config.state_file_path, json.dumps(state, indent=2))
+
+        except Exception as e:
+            logging.info("Exception occurred in RetrainTrigger.record_source")
+            raise customexception(e, sys)
+
+    def mark_trained(self, observation, now=None):
+        """Record the source data a completed training run was started on."""
+        try:
+            os.makedirs(os.path.dirname(self.config.state_file_path), exist_ok=True)
+            state = {"source": observation, "trained_at": now if now is not None else time.time()}
+            write_atomic(self.config.state_file_path, json.dumps(state, indent=2))
+            logging.info(f"Retrain watermark: {observation['rows']} rows, md5 {observation['md5']}")
+
+        except Exception as e:
+            logging.info("Exception occurred in RetrainTrigger.mark_trained")
+            raise customexception(e, sys)
@@ -0,0 +1,122 @@
+"""
+run_config.py
+-------------
+Run-level configuration shared by every stage of the training pipeline.
+
+It includes:
+1. RunConfig: the global seed and split settings, loaded from params.yaml so
+   DVC can track them as stage params.
+2. Run fingerprinting: a hash of the run config, the source data and the
+   pipeline code. It is written next to the artifacts so a later run with the
+   same fingerprint can skip recomputation.
+"""
+
+import os
+import sys
+import json
+import hashlib
+from dataclasses import dataclass, asdict
+
+import yaml
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+# Source files whose changes invalidate the trained artifacts
+PIPELINE_CODE_PATHS = [
+    os.path.join("src", "components", "data_ingestion.py"),
+    os.path.join("src", "components", "data_transformation.py"),
+    os.path.join("src", "components", "model_trainer.py"),
+    os.path.join("src", "utils", "utils.py"),
+    os.path.join("src", "utils", "metrics.py"),
+    os.path.join("src", "utils", "cross_validation.py"),
+    os.path.join("src", "components", "precision_guard.py"),
+    os.path.join("src", "utils", "model_selection.py"),
+    os.path.join("src", "components", "model_distillation.py"),
+    os.path.join("src", "components", "comparables_index.py"),
+    os.path.join("src", "components", "linear_scorer.py"),
+    os.path.join("src", "components", "model_evaluation.py"),
+    os.path.join("src", "pipeline", "training_pipeline.py"),
+]
+
+
+@dataclass
+class RunConfig:
+    seed: int = 42
+    test_size: float = 0.25
+    cv_folds: int = 0   # > 1 selects the model by k-fold cross-validation
+    float32: bool = False   # opt-in reduced-precision transformation, training and inference
+    float32_tolerance: float = 1.0   # max allowed |price| difference float32 vs float64
+    selection_policy: str = "best_r2"   # best_r2 | budget | pareto (see utils/model_selection.py)
+    max_p99_latency_ms: float = None   # single-row p99 budget for the budget policy
+    max_model_bytes: int = None   # pickled size budget for the budget policy
+    r2_tolerance: float = 0.001   # R2 the pareto policy may give up for a faster model
+    distill: bool = False   # distill a large winner into a compact student for serving
+    distill_min_fidelity: float = 0.995   # student-vs-teacher R2 needed to serve the student
+    fingerprint_path: str = os.path.join("artifacts", "run_fingerprint.json")
+
+    @classmethod
+    def from_params(cls, params_path="params.yaml"):
+        """Build a RunConfig from the `run` section of params.yaml (defaults if absent)."""
+        try:
+            if not os.path.exists(params_path):
+                return cls()
+
+            with open(params_path) as file_obj:
+                params = yaml.safe_load(file_obj) or {}
+
+            return cls(**params.get("run", {}))
+
+        except Exception as e:
+            logging.info("Exception occurred in RunConfig.from_params")
+            raise customexception(e, sys)
+
+    @property
+    def hash_key(self):
+        """16-character key for pandas' row hashing of string data, derived from the seed."""
+        return str(self.seed).zfill(16)[-16:]
+
+
+def file_md5(file_path, block_size=1 << 20):
+    """md5 of a file, read in blocks so large datasets are not loaded into memory."""
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(block_size), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def compute_run_fingerprint(run_config, data_path, code_paths=PIPELINE_CODE_PATHS):
+    """Hash the run config, the source data and the pipeline code into one id."""
+    try:
+        payload = {
+            "config": {k: v for k, v in asdict(run_config).items() if k != "fingerprint_path"},
+            "data": file_md5(data_path),
+            "code": {path: file_md5(path) for path in code_paths if os.path.exists(path)},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    except Exception as e:
+        logging.info("Exception occurred in compute_run_fingerprint")
+        raise customexception(e, sys)
+
+
+def read_run_fingerprint(fingerprint_path):
+    """Return the recorded fingerprint (with its metrics), or None if there is none."""
+    if not os.path.exists(fingerprint_path):
+        return None
+    with open(fingerprint_path) as file_obj:
+        return json.load(file_obj)
+
+
+def write_run_fingerprint(fingerprint_path, fingerprint, metrics=None):
+    """Record the fingerprint of a completed run alongside its artifacts."""
+    try:
+        os.makedirs(os.path.dirname(fingerprint_path), exist_ok=True)
+        with open(fingerprint_path, "w") as file_obj:
+            json.dump({"fingerprint": fingerprint, "metrics": metrics}, file_obj, indent=2)
+
+    except Exception as e:
+        logging.info("Exception occurred in write_run_fingerprint")
+        raise customexception(e, sys)
@@ -0,0 +1,315 @@
+"""
+batch_prediction.py
+-------------------
+Inbox / outbox batch scoring service.
+
+Flow (a local directory stands in for object storage; see the DAG for the sync):
+
+    remote/inbox --download--> inbox --score--> outbox --upload--> remote/outbox
+                                  \\--archive--> archive --upload--> remote/archive
+                                  \\--invalid--> error   --upload--> remote/error
+
+1. Incremental pickup: every CSV in the inbox whose content (md5) is not yet in
+   the manifest is scored. Files still being written, i.e. modified within the
+   last `settle_seconds`, are left for the next scan.
+2. Checkpointing: a file is scored in chunks, and each chunk's predictions are
+   appended to <name>_predictions.csv.part in the outbox. After every chunk a
+   checkpoint records the rows done and the byte length of the part file. If
+   the process crashes it resumes from the last checkpoint: the part file is
+   cut back to the checkpointed length and the rows already scored are skipped.
+   Every chunk of a file is scored by the model version the file started with,
+   even if a new one is published meanwhile, and a file resumed after a new
+   publish is restarted from scratch, so one output never mixes two models.
+3. Completion: the part file is renamed into place as
+   <name>_<md5 prefix>_predictions.csv (so a later upload under the same name
+   never overwrites an earlier result), the input moves to the archive and the
+   manifest records the file, row count and model version.
+4. Isolation: a file whose content cannot be scored (unknown category, bad
+   number, missing column) moves to the error directory with an .error.json
+   report, and the scan goes on with the next file. Any other failure leaves
+   the checkpoint for a retry; the remaining files are still scored and the
+   scan raises at the end.
+
+Scans run under an exclusive lock, and requests that arrive during a scan are
+coalesced into one extra scan.
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.config.run_config import file_md5
+from src.pipeline.prediction_pipeline import PredictPipeline
+from src.utils.artifact_store import ArtifactStoreConfig, current_version, run_coalesced, write_atomic
+from src.utils.thread_budget import apply_thread_budget
+
+
+@dataclass
+class BatchPredictionConfig:
+    inbox_dir: str = os.path.join("batch", "inbox")
+    outbox_dir: str = os.path.join("batch", "outbox")
+    archive_dir: str = os.path.join("batch", "archive")
+    error_dir: str = os.path.join("batch", "error")   # inputs whose content could not be scored
+    state_dir: str = os.path.join("batch", "state")
+    remote_dir: str = os.getenv("BATCH_REMOTE_DIR", os.path.join("batch", "remote"))   # object storage stand-in
+    file_pattern: str = "*.csv"
+    chunk_size: int = 10_000   # rows scored between checkpoints
+    settle_seconds: float = 5.0   # files modified more recently are still being written
+    prediction_column: str = "predicted_price"
+    output_md5_chars: int = 12   # content hash prefix in output names
+
+    @property
+    def manifest_file_path(self):
+        return os.path.join(self.state_dir, "manifest.json")
+
+    @property
+    def checkpoint_dir(self):
+        return os.path.join(self.state_dir, "checkpoints")
+
+
+def invalid_input_error(error):
+    """The ValueError / KeyError behind a (nested) customexception, or None if the input was not at fault."""
+    while isinstance(error, customexception):
+        error = error.error_message
+    return error if isinstance(error, (ValueError, KeyError)) else None
+
+
+class BatchPrediction:
+    def __init__(self, batch_config=None):
+        self.batch_config = batch_config or BatchPredictionConfig()
+        self.predict_pipeline = PredictPipeline()
+        for path in (self.batch_config.inbox_dir, self.batch_config.outbox_dir, self.batch_config.archive_dir,
+                     self.batch_config.error_dir, self.batch_config.checkpoint_dir):
+            os.makedirs(path, exist_ok=True)
+
+    # ------------------ Manifest & checkpoints ------------------
+    def read_manifest(self):
+        if not os.path.exists(self.batch_config.manifest_file_path):
+            return {}
+        with open(self.batch_config.manifest_file_path) as file_obj:
+            return json.load(file_obj)
+
+    def record_in_manifest(self, md5, entry):
+        manifest = self.read_manifest()
+        manifest[md5] = entry
+        write_atomic(self.batch_config.manifest_file_path, json.dumps(manifest, indent=2))
+
+    def checkpoint_path(self, md5):
+        return os.path.join(self.batch_config.checkpoint_dir, f"{md5}.json")
+
+    def read_checkpoint(self, md5):
+        path = self.checkpoint_path(md5)
+        if not os.path.exists(path):
+            return None
+        with open(path) as file_obj:
+            return json.load(file_obj)
+
+    # ------------------ Scoring ------------------
+    def pending_files(self):
+        """Settled inbox files whose content has not been scored yet, oldest first."""
+        config = self.batch_config
+        manifest = self.read_manifest()
+        now = time.time()
+
+        pending = []
+        for path in sorted(glob.glob(os.path.join(config.inbox_dir, config.file_pattern)), key=os.path.getmtime):
+            if now - os.path.getmtime(path) < config.settle_seconds:
+                continue
+            md5 = file_md5(path)
+            if md5 in manifest:
+                # Same content was scored before (e.g. re-uploaded): archive it without rescoring
+                logging.info(f"{path} already scored as {manifest[md5]['file']}, archiving")
+                self.archive(path)
+                continue
+            pending.append((path, md5))
+        return pending
+
+    def score_file(self, input_path, md5):
+        """
+        Score one inbox file chunk by chunk, resuming from its checkpoint.
+
+        Returns:
+            dict: The manifest entry of the finished file.
+        """
+        try:
+            config = self.batch_config
+            file_name = os.path.basename(input_path)
+            output_path = self.output_path(input_path, md5)
+            part_path = output_path + ".part"
+            model_version = current_version()
+
+            checkpoint = self.read_checkpoint(md5)
+            if checkpoint is not None and checkpoint["model_version"] != model_version:
+                logging.info(f"Model changed since {file_name} was checkpointed, restarting it")
+                checkpoint = None
+            if checkpoint is None or not os.path.exists(part_path):
+                checkpoint = {"file": file_name, "model_version": model_version, "rows_done": 0, "part_bytes": 0}
+
+            # Drop anything written after the last checkpoint
+            with open(part_path, "ab") as part_file:
+                part_file.truncate(checkpoint["part_bytes"])
+
+            # Pin the version: a model published while this file is scored must not score its later chunks
+            self.predict_pipeline.version = model_version
+
+            rows_done = checkpoint["rows_done"]
+            if rows_done:
+                logging.info(f"Resuming {file_name} at row {rows_done}")
+
+            reader = pd.read_csv(input_path, chunksize=config.chunk_size,
+                                 skiprows=range(1, rows_done + 1) if rows_done else None)
+            for chunk in reader:
+                chunk[config.prediction_column] = self.predict_pipeline.predict(chunk)
+
+                with open(part_path, "a", newline="") as part_file:
+                    chunk.to_csv(part_file, header=checkpoint["part_bytes"] == 0, index=False)
+                    part_file.flush()
+                    os.fsync(part_file.fileno())
+                    checkpoint["part_bytes"] = part_file.tell()
+
+                rows_done += len(chunk)
+                checkpoint["rows_done"] = rows_done
+                write_atomic(self.checkpoint_path(md5), json.dumps(checkpoint))
+
+            os.replace(part_path, output_path)
+            archive_path = self.archive(input_path)
+
+            entry = {
+                "file": file_name,
+                "rows": rows_done,
+                "output": output_path,
+                "archive": archive_path,
+                "model_version": model_version,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self.record_in_manifest(md5, entry)
+            os.remove(self.checkpoint_path(md5))
+            logging.info(f"Scored {rows_done} rows of {file_name} -> {output_path}")
+            return entry
+
+        except Exception as e:
+            logging.info(f"Exception occurred while scoring {input_path}")
+            raise customexception(e, sys)
+
+    def output_path(self, input_path, md5):
+        """Outbox path of the predictions for an input; the content hash keeps same-named uploads apart."""
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        return os.path.join(self.batch_config.outbox_dir,
+                            f"{stem}_{md5[:self.batch_config.output_md5_chars]}_predictions.csv")
+
+    def archive(self, input_path, root_dir=None):
+        """Move a processed input into <root_dir>/<date>/ (the archive by default, never overwriting an earlier file)."""
+        archive_dir = os.path.join(root_dir or self.batch_config.archive_dir, time.strftime("%Y-%m-%d"))
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, os.path.basename(input_path))
+        if os.path.exists(archive_path):
+            stem, ext = os.path.splitext(archive_path)
+            archive_path = f"{stem}_{time.strftime('%H%M%S')}{ext}"
+        shutil.move(input_path, archive_path)
+        return archive_path
+
+    def reject_file(self, input_path, md5, error):
+        """Move an input whose content cannot be scored to the error directory, with a report next to it."""
+        for path in (self.output_path(input_path, md5) + ".part", self.checkpoint_path(md5)):
+            if os.path.exists(path):
+                os.remove(path)
+        error_path = self.archive(input_path, root_dir=self.batch_config.error_dir)
+        report = {
+            "file": os.path.basename(input_path),
+            "md5": md5,
+            "error": f"{type(error).__name__}: {error}",
+            "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        write_atomic(error_path + ".error.json", json.dumps(report, indent=2))
+        logging.info(f"Rejected {input_path} -> {error_path}: {report['error']}")
+        return error_path
+
+    def run_once(self):
+        """
+        Score every pending inbox file. Returns the manifest entries of the files scored.
+
+        One file failing never stops the others: invalid content is rejected to the
+        error directory, and any other failure is raised after the remaining files.
+        """
+        scored, failures = [], []
+        for path, md5 in self.pending_files():
+            try:
+                scored.append(self.score_file(path, md5))
+            except customexception as e:
+                invalid = invalid_input_error(e)
+                if invalid is not None:
+                    self.reject_file(path, md5, invalid)
+                else:
+                    logging.info(f"Scoring {path} failed, it resumes from its checkpoint on the next scan")
+                    failures.append(e)
+
+        logging.info(f"Batch scan finished, {len(scored)} file(s) scored, {len(failures)} failed")
+        if failures:
+            raise failures[0]
+        return scored
+
+    def start_prediction(self):
+        """run_once under the batch lock; returns None if a scan was already running."""
+        config = self.batch_config
+        lock_config = ArtifactStoreConfig(
+            lock_file_path=os.path.join(config.state_dir, ".batch.lock"),
+            pending_file_path=os.path.join(config.state_dir, ".batch.pending"),
+        )
+        return run_coalesced(self.run_once, lock_config)
+
+    # ------------------ Object storage stand-in ------------------
+    def download_files(self):
+        """Copy new files from <remote>/inbox into the local inbox."""
+        config = self.batch_config
+        remote_inbox = os.path.join(config.remote_dir, "inbox")
+        os.makedirs(remote_inbox, exist_ok=True)
+
+        downloaded = []
+        for remote_path in glob.glob(os.path.join(remote_inbox, config.file_pattern)):
+            local_path = os.path.join(config.inbox_dir, os.path.basename(remote_path))
+            if not os.path.exists(local_path):
+                # Copy under a temporary name so the scanner never sees a half-copied file
+                shutil.copy2(remote_path, local_path + ".download")
+                os.replace(local_path + ".download", local_path)
+                os.remove(remote_path)
+                downloaded.append(local_path)
+        return downloaded
+
+    def upload_files(self):
+        """Mirror the outbox, archive and error directories to <remote>/outbox, /archive and /error."""
+        config = self.batch_config
+        for local_dir, name in ((config.outbox_dir, "outbox"), (config.archive_dir, "archive"),
+                                (config.error_dir, "error")):
+            shutil.copytree(local_dir, os.path.join(config.remote_dir, name), dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns("*.part"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score the files in the batch inbox.")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep scanning the inbox every SECONDS")
+    args = parser.parse_args()
+
+    apply_thread_budget(role="batch prediction")
+    batch_prediction = BatchPrediction()
+    while True:
+        batch_prediction.download_files()
+        batch_prediction.start_prediction()
+        batch_prediction.upload_files()
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+# Commands
+# python -m src.pipeline.batch_prediction
+# python -m src.pipeline.batch_prediction --watch 30
@@ -9,16 +9,85 @@ It includes:
    transforming incoming data, and generating predictions.
 2. CustomData class: Collects user input (features like carat, depth, cut, etc.)
    and converts them into a Pandas DataFrame that can be passed into the model.
+3. load_serving_artifacts: Loads the published artifact version once per
+   process and picks up newly published versions automatically.
+4. get_drift_monitor: The per-process drift sketch updated with every request.
+5. Comparable stones: PredictPipeline can return the K most similar training
+   stones next to each prediction, from the memory-mapped KD-tree index.
+6. Linear scorer: when the served model is linear and its combination table
+   passed the parity check, predictions skip the preprocessor and the model
+   and use one table lookup plus a dot product per row.
 
 This script is used in the deployment/inference stage of the project.
 """
 
 import os
 import sys
+import threading
 import pandas as pd
 from src.exception.exception import customexception
 from src.logger.logging_config import logging
 from src.utils.utils import load_object
+from src.components.drift_monitor import DriftMonitor, DriftMonitorConfig
+from src.components.precision_guard import read_inference_dtype
+from src.utils.artifact_store import resolve_artifact
+from src.utils.thread_budget import set_estimator_threads
+from src.components.comparables_index import ComparablesIndex, ComparablesIndexConfig
+from src.components.linear_scorer import LinearScorerConfig, read_linear_scorer
+
+
+# Serving artifacts of the published version, cached per process
+_serving_artifacts = None
+_serving_artifacts_lock = threading.Lock()
+
+
+def load_serving_artifacts(version=None):
+    """
+    Return the published preprocessor, model, inference dtype and drift monitor.
+
+    Objects are unpickled once per process and reloaded only when a new version
+    is published (or, before the first publish, the working artifacts are rewritten).
+    A `version` pins the artifacts of that version instead of the current one.
+    """
+    global _serving_artifacts
+    preprocessor_path = resolve_artifact("preprocessor.pkl", version=version)
+    model_path = resolve_artifact("model.pkl", version=version)
+    key = tuple((path, os.stat(path).st_mtime_ns) for path in (preprocessor_path, model_path))
+
+    if _serving_artifacts is None or _serving_artifacts["key"] != key:
+        with _serving_artifacts_lock:
+            if _serving_artifacts is None or _serving_artifacts["key"] != key:
+                # One drift sketch per serving process, against this version's training baseline
+                drift_config = DriftMonitorConfig(baseline_file_path=resolve_artifact("drift_baseline.json", version=version))
+                drift_monitor = (
+                    DriftMonitor.from_baseline_file(drift_config)
+                    if os.path.exists(drift_config.baseline_file_path) else None
+                )
+                # Memory-mapped, so loading is cheap and workers share the pages
+                comparables_path = resolve_artifact(os.path.basename(ComparablesIndexConfig.index_file_path), version=version)
+                comparables = ComparablesIndex.load(comparables_path) if os.path.exists(comparables_path) else None
+                _serving_artifacts = {
+                    "key": key,
+                    "preprocessor": load_object(preprocessor_path),
+                    # The pickled n_jobs is the training host's; use this process's budget
+                    "model": set_estimator_threads(load_object(model_path)),
+                    "inference_dtype": read_inference_dtype(resolve_artifact("precision.json", version=version)),
+                    "drift_monitor": drift_monitor,
+                    "comparables": comparables,
+                    "linear_scorer": read_linear_scorer(
+                        resolve_artifact(os.path.basename(LinearScorerConfig.scorer_file_path), version=version)
+                    ),
+                }
+                logging.info(f"Loaded serving artifacts from {os.path.dirname(model_path)}")
+    return _serving_artifacts
+
+
+def get_drift_monitor():
+    """Return this process's DriftMonitor, or None if no drift baseline has been trained."""
+    try:
+        return load_serving_artifacts()["drift_monitor"]
+    except FileNotFoundError:
+        return None
 
 
 class PredictPipeline:
@@ -26,9 +95,15 @@ class PredictPipeline:
     Prediction pipeline class.
     Responsible for loading the trained model and preprocessor,
     applying transformations to incoming data, and generating predictions.
+
+    `version` pins a published artifact version (e.g. for one batch file);
+    None follows the current version. `monitor_drift=False` keeps the rows out
+    of the drift sketch, for traffic that is not new production load (replays).
     """
 
-    def __init__(self):
+    def __init__(self, version=None, monitor_drift=True):
+        self.version = version
+        self.monitor_drift = monitor_drift
         print("PredictPipeline object initialized...")
 
     def predict(self, features):
@@ -44,22 +119,71 @@ class PredictPipeline:
         Raises:
             customexception: If loading or prediction fails.
         """
+        predictions, _ = self.predict_with_comparables(features, k=0)
+        return predictions
+
+    def predict_with_comparables(self, features, k=ComparablesIndexConfig.k):
+        """
+        Generate predictions and look up the `k` most similar training stones.
+
+        The comparables are searched in the same transformed feature space the
+        model uses, so the preprocessing runs once for both.
+
+        Returns:
+            tuple: (np.ndarray of predictions, list of comparables per row,
+                    or None if k is 0 or no index has been built)
+        """
         try:
-            # Paths to the saved preprocessor and model objects
-            preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
-            model_path = os.path.join("artifacts", "model.pkl")
+            # Load the preprocessor and model of the published (or pinned) version (cached)
+            artifacts = load_serving_artifacts(self.version)
+            preprocessor = artifacts["preprocessor"]
+            model = artifacts["model"]
+
+            want_comparables = bool(k) and artifacts["comparables"] is not None
+            transformed = None
+
+            if artifacts["linear_scorer"] is not None:
+                # Linear model: combination table + dot product, identical to the model's output
+                predictions = artifacts["linear_scorer"].predict(features)
+            else:
+                # Apply preprocessing (scaling, encoding, etc.) to input data
+                transformed = preprocessor.transform(features)
+
+                # Predict using the trained model,
+                # in float32 only if the precision guard approved it at training time
+                predictions = model.predict(transformed.astype(artifacts["inference_dtype"], copy=False))
+
+            comparables = None
+            if want_comparables:
+                if transformed is None:
+                    transformed = preprocessor.transform(features)
+                comparables = artifacts["comparables"].query(transformed, k=k)
 
-            # Load the preprocessor and model
-            preprocessor = load_object(preprocessor_path)
-            model = load_object(model_path)
+            # Record the served feature distribution; monitoring must never fail a prediction
+            try:
+                drift_monitor = artifacts["drift_monitor"]
+                if drift_monitor is not None and self.monitor_drift:
+                    drift_monitor.update(features)
+            except Exception as drift_error:
+                logging.error(f"Drift monitor update failed: {drift_error}")
 
-            # Apply preprocessing (scaling, encoding, etc.) to input data
-            scaled_features = preprocessor.transform(features)
+            return predictions, comparables
 
-            # Predict using the trained model
-            predictions = model.predict(scaled_features)
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def find_comparables(self, features, k=ComparablesIndexConfig.k):
+        """
+        The `k` most similar training stones for each row, without predicting.
 
-            return predictions
+        Returns:
+            list[list[dict]]: Comparables per row (raw features, price, distance), nearest first.
+        """
+        try:
+            artifacts = load_serving_artifacts(self.version)
+            if artifacts["comparables"] is None:
+                raise FileNotFoundError("No comparables index found, train the model first")
+            return artifacts["comparables"].query(artifacts["preprocessor"].transform(features), k=k)
 
         except Exception as e:
             raise customexception(e, sys)
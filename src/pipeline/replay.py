@@ -0,0 +1,108 @@
+"""
+replay.py
+---------
+Replays captured production requests through PredictPipeline.
+
+Reads the request capture log (see src/utils/request_capture.py) and sends the
+captured rows through the prediction pipeline at a chosen rate to reproduce
+production load. It reports the achieved rate, latency percentiles and how many
+predictions differ from the ones recorded at capture time. Replayed rows are
+kept out of the drift monitor: they were already counted when first served.
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.pipeline.prediction_pipeline import PredictPipeline
+from src.utils.request_capture import RequestCaptureConfig, read_captured_requests
+
+
+def replay(capture_dir, rate=None, batch_size=1, limit=None, tolerance=1e-6):
+    """
+    Replay captured requests.
+
+    Args:
+        capture_dir (str): Directory with capture-*.jsonl.gz files.
+        rate (float): Target requests per second (None = as fast as possible).
+        batch_size (int): Rows sent per predict call.
+        limit (int): Stop after this many rows.
+        tolerance (float): Absolute price difference counted as a mismatch.
+
+    Returns:
+        dict: Summary with row/request counts, achieved rate, latency percentiles (ms)
+              and the number of predictions that differ from the captured ones.
+    """
+    try:
+        # Drift monitoring off, or /drift and the retrain trigger would count the traffic twice
+        pipeline = PredictPipeline(monitor_drift=False)
+        latencies = []
+        n_rows = n_mismatches = 0
+        interval = 1.0 / rate if rate else 0.0
+
+        def send(rows, expected):
+            nonlocal n_mismatches
+            start = time.perf_counter()
+            predictions = pipeline.predict(pd.DataFrame(rows))
+            latencies.append(time.perf_counter() - start)
+            n_mismatches += int(np.sum(np.abs(np.asarray(predictions) - np.asarray(expected)) > tolerance))
+
+        started = time.perf_counter()
+        next_send = started
+        rows, expected = [], []
+        for _, features, prediction in read_captured_requests(capture_dir):
+            rows.append(features)
+            expected.append(prediction)
+            n_rows += 1
+            if len(rows) == batch_size or n_rows == limit:
+                # Pace requests to the target rate
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send + interval, time.perf_counter()) if interval else next_send
+
+                send(rows, expected)
+                rows, expected = [], []
+            if n_rows == limit:
+                break
+        if rows:
+            send(rows, expected)
+
+        elapsed = time.perf_counter() - started
+        latencies_ms = np.asarray(latencies) * 1000
+        summary = {
+            "rows": n_rows,
+            "requests": len(latencies),
+            "requests_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+            "mismatches": n_mismatches,
+        }
+        logging.info(f"Replay summary: {summary}")
+        return summary
+
+    except Exception as e:
+        raise customexception(e, sys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured prediction requests.")
+    parser.add_argument("--capture-dir", default=RequestCaptureConfig.capture_dir)
+    parser.add_argument("--rate", type=float, default=None, help="requests per second (default: unthrottled)")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(replay(args.capture_dir, rate=args.rate, batch_size=args.batch_size, limit=args.limit))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Commands
+# python -m src.pipeline.replay --rate 50
@@ -0,0 +1,234 @@
+"""
+stages.py
+---------
+Command-line entry points for each step of the training pipeline.
+
+Every stage reads its inputs from disk and writes its outputs to disk, so DVC
+(see dvc.yaml) can cache them individually and only re-run the stages whose
+inputs, code or params changed:
+
+1. ingest    - source CSV              -> train.csv, test.csv
+2. transform - train.csv, test.csv     -> preprocessor.pkl, train_arr.npy, test_arr.npy, drift_baseline.json
+   index     - train.csv, preprocessor.pkl -> comparables_index.joblib
+3. train     - train_arr.npy, test_arr.npy -> model.pkl, model_report.csv, test_predictions.npy/.json
+   distill   - train_arr.npy, test_arr.npy, model.pkl -> student_model.pkl, distillation.json
+4. precision - train.csv, test.csv, preprocessor.pkl, serving model -> precision.json
+               (and model_float64.pkl, served instead when float32 is refused)
+   linear-scorer - test.csv, preprocessor.pkl, serving model -> linear_scorer.json
+5. evaluate  - model.pkl, serving model, test_arr.npy, test_predictions.npy -> metrics.json
+6. publish   - the artifacts above -> artifacts/versions/<version>/, CURRENT
+               (the serving model is published as model.pkl, which is what serving loads;
+               no run fingerprint, since DVC tracks its own stage hashes)
+
+Run-level params (seed, test size) come from params.yaml.
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.config.run_config import RunConfig
+
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer, load_test_predictions
+from src.components.model_evaluation import ModelEvaluation
+from src.components.precision_guard import PrecisionGuard, serving_model_path
+from src.components.linear_scorer import LinearScorerExport
+from src.components.comparables_index import ComparablesIndexBuilder
+from src.components.model_distillation import ModelDistillation, serving_model_path as distilled_model_path
+from src.pipeline.training_pipeline import TrainingPipeline
+from src.utils.thread_budget import apply_thread_budget
+
+
+ARTIFACTS_DIR = "artifacts"
+
+
+def ingest(args, run_config):
+    data_ingestion = DataIngestion(run_config)
+    config = data_ingestion.ingestion_config
+    config.source_data_path = args.source
+    config.train_data_path = args.train_out
+    config.test_data_path = args.test_out
+    config.streaming = args.streaming
+    config.save_raw_data = args.save_raw
+    data_ingestion.initiate_data_ingestion()
+
+
+def transform(args, run_config):
+    data_transformation = DataTransformation(run_config)
+    data_transformation.data_transformation_config.preprocessor_obj_file_path = args.preprocessor_out
+    data_transformation.data_transformation_config.drift_baseline_file_path = args.drift_baseline_out
+    train_arr, test_arr = data_transformation.initialize_data_transformation(args.train, args.test)
+
+    np.save(args.train_arr_out, train_arr)
+    np.save(args.test_arr_out, test_arr)
+
+
+def index(args, run_config):
+    builder = ComparablesIndexBuilder()
+    builder.comparables_index_config.index_file_path = args.index_out
+    builder.initiate_index_build(args.train, args.preprocessor)
+
+
+def train(args, run_config):
+    model_trainer = ModelTrainer(run_config)
+    model_trainer.model_trainer_config.trained_model_file_path = args.model_out
+    model_trainer.model_trainer_config.model_report_file_path = args.report_out
+    model_trainer.model_trainer_config.test_predictions_file_path = args.predictions_out
+    model_trainer.model_trainer_config.train_metrics_sample_size = args.train_metrics_sample_size
+    model_trainer.initate_model_training(np.load(args.train_arr), np.load(args.test_arr), args.train_csv)
+
+
+def distill(args, run_config):
+    model_distillation = ModelDistillation(run_config)
+    config = model_distillation.model_distillation_config
+    config.student_model_file_path = args.student_out
+    config.distillation_report_file_path = args.report_out
+    model_distillation.initiate_model_distillation(np.load(args.train_arr), np.load(args.test_arr), args.model)
+
+
+def precision(args, run_config):
+    precision_guard = PrecisionGuard(run_config)
+    precision_guard.precision_guard_config.precision_report_file_path = args.report_out
+    # Check the model that will actually be served (the distilled student if it was accepted)
+    precision_guard.initiate_precision_check(args.train, args.test, args.preprocessor, distilled_model_path(args.model))
+
+
+def linear_scorer(args, run_config):
+    linear_scorer_export = LinearScorerExport()
+    linear_scorer_export.linear_scorer_config.scorer_file_path = args.scorer_out
+    linear_scorer_export.initiate_export(args.test, args.preprocessor, serving_model_path(args.model))
+
+
+def evaluate(args, run_config):
+    test_arr = np.load(args.test_arr)
+    model_evaluation = ModelEvaluation()
+    model_evaluation.model_evaluation_config.async_tracking = args.async_tracking
+    # Reuse the predictions the train stage already made on the test set, if made by this model
+    test_predictions = load_test_predictions(args.test_predictions, args.model)
+    metrics = model_evaluation.initiate_model_evaluation(
+        None, test_arr, args.model, test_predictions, model_report_path=args.model_report,
+        serving_model_path=serving_model_path(args.model),
+    )
+
+    with open(args.metrics_out, "w") as file_obj:
+        json.dump(metrics, file_obj, indent=2)
+
+
+def publish(args, run_config):
+    # Same artifact set as the training pipeline; the distilled student, if accepted, becomes model.pkl.
+    # The stages never write run_fingerprint.json: one left by an earlier pipeline run describes other artifacts
+    TrainingPipeline(run_config).start_artifact_publishing(publish_fingerprint=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a single step of the gemstone training pipeline.")
+    parser.add_argument("--params", default="params.yaml", help="params file with the `run` section")
+    subparsers = parser.add_subparsers(dest="stage", required=True)
+
+    p = subparsers.add_parser("ingest", help="split the source data into train/test CSVs")
+    p.add_argument("--source", default=os.path.join("experiment", "datasets", "train.csv"))
+    p.add_argument("--train-out", default=os.path.join(ARTIFACTS_DIR, "train.csv"))
+    p.add_argument("--test-out", default=os.path.join(ARTIFACTS_DIR, "test.csv"))
+    p.add_argument("--streaming", action="store_true", help="read the source in chunks")
+    p.add_argument("--save-raw", action="store_true", help="also write artifacts/raw.csv")
+    p.set_defaults(func=ingest)
+
+    p = subparsers.add_parser("transform", help="fit the preprocessor and transform train/test")
+    p.add_argument("--train", default=os.path.join(ARTIFACTS_DIR, "train.csv"))
+    p.add_argument("--test", default=os.path.join(ARTIFACTS_DIR, "test.csv"))
+    p.add_argument("--preprocessor-out", default=os.path.join(ARTIFACTS_DIR, "preprocessor.pkl"))
+    p.add_argument("--train-arr-out", default=os.path.join(ARTIFACTS_DIR, "train_arr.npy"))
+    p.add_argument("--test-arr-out", default=os.path.join(ARTIFACTS_DIR, "test_arr.npy"))
+    p.add_argument("--drift-baseline-out", default=os.path.join(ARTIFACTS_DIR, "drift_baseline.json"),
+                   help="training feature distributions the serving drift monitor compares against")
+    p.set_defaults(func=transform)
+
+    p = subparsers.add_parser("index", help="build the comparable-stones KD-tree over the training data")
+    p.add_argument("--train", default=os.path.join(ARTIFACTS_DIR, "train.csv"))
+    p.add_argument("--preprocessor", default=os.path.join(ARTIFACTS_DIR, "preprocessor.pkl"))
+    p.add_argument("--index-out", default=os.path.join(ARTIFACTS_DIR, "comparables_index.joblib"))
+    p.set_defaults(func=index)
+
+    p = subparsers.add_parser("train", help="run the model tournament and save the best model")
+    p.add_argument("--train-arr", default=os.path.join(ARTIFACTS_DIR, "train_arr.npy"))
+    p.add_argument("--test-arr", default=os.path.join(ARTIFACTS_DIR, "test_arr.npy"))
+    p.add_argument("--train-csv", default=os.path.join(ARTIFACTS_DIR, "train.csv"),
+                   help="raw training data, used when run.cv_folds > 1")
+    p.add_argument("--model-out", default=os.path.join(ARTIFACTS_DIR, "model.pkl"))
+    p.add_argument("--report-out", default=os.path.join(ARTIFACTS_DIR, "model_report.csv"))
+    p.add_argument("--predictions-out", default=os.path.join(ARTIFACTS_DIR, "test_predictions.npy"))
+    p.add_argument("--train-metrics-sample-size", type=int, default=None,
+                   help="estimate training metrics on this many sampled rows")
+    p.set_defaults(func=train)
+
+    p = subparsers.add_parser("distill", help="distill the winner into a compact serving model (run.distill)")
+    p.add_argument("--train-arr", default=os.path.join(ARTIFACTS_DIR, "train_arr.npy"))
+    p.add_argument("--test-arr", default=os.path.join(ARTIFACTS_DIR, "test_arr.npy"))
+    p.add_argument("--model", default=os.path.join(ARTIFACTS_DIR, "model.pkl"))
+    p.add_argument("--student-out", default=os.path.join(ARTIFACTS_DIR, "student_model.pkl"))
+    p.add_argument("--report-out", default=os.path.join(ARTIFACTS_DIR, "distillation.json"))
+    p.set_defaults(func=distill)
+
+    p = subparsers.add_parser("precision", help="decide whether the float32 model may be served")
+    p.add_argument("--train", default=os.path.join(ARTIFACTS_DIR, "train.csv"),
+                   help="training data for the float64 reference model")
+    p.add_argument("--test", default=os.path.join(ARTIFACTS_DIR, "test.csv"))
+    p.add_argument("--preprocessor", default=os.path.join(ARTIFACTS_DIR, "preprocessor.pkl"))
+    p.add_argument("--model", default=os.path.join(ARTIFACTS_DIR, "model.pkl"))
+    p.add_argument("--report-out", default=os.path.join(ARTIFACTS_DIR, "precision.json"))
+    p.set_defaults(func=precision)
+
+    p = subparsers.add_parser("linear-scorer", help="export the categorical-combination table of a linear model")
+    p.add_argument("--test", default=os.path.join(ARTIFACTS_DIR, "test.csv"))
+    p.add_argument("--preprocessor", default=os.path.join(ARTIFACTS_DIR, "preprocessor.pkl"))
+    p.add_argument("--model", default=os.path.join(ARTIFACTS_DIR, "model.pkl"))
+    p.add_argument("--scorer-out", default=os.path.join(ARTIFACTS_DIR, "linear_scorer.json"))
+    p.set_defaults(func=linear_scorer)
+
+    p = subparsers.add_parser("evaluate", help="evaluate the saved model and track it in MLflow")
+    p.add_argument("--model", default=os.path.join(ARTIFACTS_DIR, "model.pkl"))
+    p.add_argument("--test-arr", default=os.path.join(ARTIFACTS_DIR, "test_arr.npy"))
+    p.add_argument("--test-predictions", default=os.path.join(ARTIFACTS_DIR, "test_predictions.npy"))
+    p.add_argument("--model-report", default=os.path.join(ARTIFACTS_DIR, "model_report.csv"),
+                   help="tournament report; the selected model's serving costs are tracked too")
+    p.add_argument("--metrics-out", default=os.path.join(ARTIFACTS_DIR, "metrics.json"))
+    p.add_argument("--async-tracking", action="store_true",
+                   help="write metrics.json first and finish MLflow logging in the background")
+    p.set_defaults(func=evaluate)
+
+    p = subparsers.add_parser("publish", help="publish the artifacts as a new serving version")
+    p.set_defaults(func=publish)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        run_config = RunConfig.from_params(args.params)
+        apply_thread_budget(role=f"stage '{args.stage}'")
+        logging.info(f"Stage '{args.stage}' started with {run_config}")
+        args.func(args, run_config)
+        logging.info(f"Stage '{args.stage}' completed")
+    except Exception as e:
+        raise customexception(e, sys)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Commands
+# python -m src.pipeline.stages ingest
+# python -m src.pipeline.stages transform
+# python -m src.pipeline.stages train
+# python -m src.pipeline.stages precision
+# python -m src.pipeline.stages linear-scorer
+# python -m src.pipeline.stages evaluate
+# python -m src.pipeline.stages publish
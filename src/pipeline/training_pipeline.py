@@ -6,13 +6,27 @@ End-to-End ML pipeline for Diamond Price Prediction.
 Steps:
 1. Data Ingestion      - Reads raw data and prepares train/test datasets.
 2. Data Transformation - Cleans, preprocesses, and encodes the data.
+   Comparables Index   - KD-tree over the transformed training stones for similar-stone lookups.
 3. Model Training      - Trains regression models.
+   Distillation        - Distills a large winner into a compact serving model (opt-in).
+   Precision Guard     - Decides whether inference may run in float32 (opt-in).
+   Linear Scorer       - Exports a combination table for a linear serving model.
 4. Model Evaluation    - Evaluates models with R², MAE, RMSE metrics.
+5. Publishing          - Publishes the artifacts as a new version (atomic pointer swap).
 
-Ensures a structured ML lifecycle with reproducibility.
+Ensures a structured ML lifecycle with reproducibility: every stage shares one
+RunConfig (global seed), and a run fingerprint is published with the artifacts so
+an unchanged run is skipped instead of recomputed. Runs take a lock, and
+requests that arrive during a run are coalesced into one follow-up run.
+
+With --watch the pipeline polls the retrain trigger and only trains when new
+source data has settled or serving drift crosses its threshold.
 """
 
+import os
 import sys
+import time
+import argparse
 from src.logger.logging_config import logging
 from src.exception.exception import customexception
 
@@ -20,13 +34,68 @@ from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
 from src.components.model_evaluation import ModelEvaluation
+from src.components.precision_guard import PrecisionGuard, serving_model_path
+from src.components.linear_scorer import LinearScorerExport, LinearScorerConfig
+from src.components.comparables_index import ComparablesIndexBuilder, ComparablesIndexConfig
+from src.components.model_distillation import ModelDistillation, ModelDistillationConfig
+from src.components.retrain_trigger import RetrainTrigger
+from src.utils.artifact_store import current_version, publish_artifacts, resolve_artifact, run_coalesced
+from src.utils.thread_budget import apply_thread_budget
+from src.config.run_config import (
+    RunConfig, compute_run_fingerprint, read_run_fingerprint, write_run_fingerprint
+)
 
 
 class TrainingPipeline:
+    def __init__(self, run_config=None, async_tracking=False):
+        self.run_config = run_config or RunConfig.from_params()
+        # Return as soon as metrics are computed; MLflow writes finish in the background
+        self.async_tracking = async_tracking
+        # Test predictions of the selected model, handed from training to evaluation
+        self.best_model_test_predictions = None
+
+    def current_fingerprint(self):
+        """Fingerprint of the run that the current config, data and code would produce."""
+        source_data_path = DataIngestion(self.run_config).ingestion_config.source_data_path
+        return compute_run_fingerprint(self.run_config, source_data_path)
+
+    def published_run(self):
+        """Fingerprint record (with metrics) of the published version, or None if there is none."""
+        version = current_version()
+        if version is None:
+            return None
+        return read_run_fingerprint(
+            resolve_artifact(os.path.basename(self.run_config.fingerprint_path), version=version)
+        )
+
+    def is_up_to_date(self, fingerprint=None):
+        """
+        True if the published version was produced by this fingerprint and still holds its model.
+
+        The published version is checked rather than the working artifacts, so a
+        run whose publishing failed is retrained instead of skipped.
+        """
+        try:
+            fingerprint = fingerprint or self.current_fingerprint()
+            recorded = self.published_run()
+            if recorded is None or recorded["fingerprint"] != fingerprint:
+                return False
+            return all(os.path.exists(resolve_artifact(name)) for name in ("preprocessor.pkl", "model.pkl"))
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def record_run(self, metrics=None, fingerprint=None):
+        """Write the fingerprint of the run that produced the current artifacts."""
+        try:
+            fingerprint = fingerprint or self.current_fingerprint()
+            write_run_fingerprint(self.run_config.fingerprint_path, fingerprint, metrics)
+        except Exception as e:
+            raise customexception(e, sys)
+
     def start_data_ingestion(self):
         try:
             logging.info("Step 1: Data Ingestion started...")
-            data_ingestion = DataIngestion()
+            data_ingestion = DataIngestion(self.run_config)
             train_data_path, test_data_path = data_ingestion.initiate_data_ingestion()
             logging.info(f"Data Ingestion completed. Train: {train_data_path}, Test: {test_data_path}")
             return train_data_path, test_data_path
@@ -36,7 +105,7 @@ class TrainingPipeline:
     def start_data_transformation(self, train_data_path, test_data_path):
         try:
             logging.info("Step 2: Data Transformation started...")
-            data_transformation = DataTransformation()
+            data_transformation = DataTransformation(self.run_config)
             train_arr, test_arr = data_transformation.initialize_data_transformation(
                 train_data_path, test_data_path
             )
@@ -45,39 +114,167 @@ class TrainingPipeline:
         except Exception as e:
             raise customexception(e, sys)
     
-    def start_model_training(self, train_arr, test_arr):
+    def start_comparables_index(self, train_data_path):
+        try:
+            logging.info("Step 2b: Comparables index build started...")
+            preprocessor_path = DataTransformation().data_transformation_config.preprocessor_obj_file_path
+            index_path = ComparablesIndexBuilder().initiate_index_build(train_data_path, preprocessor_path)
+            logging.info(f"Comparables index built: {index_path}")
+            return index_path
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_model_training(self, train_arr, test_arr, train_data_path=None):
         try:
             logging.info("Step 3: Model Training started...")
-            model_trainer = ModelTrainer()
-            model_path = model_trainer.initate_model_training(train_arr, test_arr)
+            model_trainer = ModelTrainer(self.run_config)
+            model_path = model_trainer.initate_model_training(train_arr, test_arr, train_data_path)
+            self.best_model_test_predictions = model_trainer.best_model_test_predictions
             logging.info(f"Model Training completed. Model saved at: {model_path}")
             return model_path
         except Exception as e:
             raise customexception(e, sys)
     
-    def start_model_evaluation(self, train_arr, test_arr, model_path):
+    def start_model_distillation(self, train_arr, test_arr, model_path):
+        try:
+            logging.info("Step 3a: Model distillation started...")
+            model_distillation = ModelDistillation(self.run_config)
+            serving_path = model_distillation.initiate_model_distillation(train_arr, test_arr, model_path)
+            logging.info(f"Model distillation completed. Serving model: {serving_path}")
+            return serving_path
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_precision_check(self, train_data_path, test_data_path, model_path):
+        """Returns the model to serve: `model_path`, or its float64 fallback if float32 was refused."""
+        try:
+            logging.info("Step 3b: Precision check started...")
+            precision_guard = PrecisionGuard(self.run_config)
+            preprocessor_path = DataTransformation().data_transformation_config.preprocessor_obj_file_path
+            report = precision_guard.initiate_precision_check(
+                train_data_path, test_data_path, preprocessor_path, model_path
+            )
+            logging.info(f"Precision check completed. Inference dtype: {report['inference_dtype']}")
+            return report.get("fallback_model_path", model_path)
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_linear_scorer_export(self, test_data_path, model_path):
+        try:
+            logging.info("Step 3c: Linear scorer export started...")
+            preprocessor_path = DataTransformation().data_transformation_config.preprocessor_obj_file_path
+            report = LinearScorerExport().initiate_export(test_data_path, preprocessor_path, model_path)
+            logging.info(f"Linear scorer export completed. Enabled: {report['enabled']}")
+            return report
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_model_evaluation(self, train_arr, test_arr, model_path, test_predictions=None, serving_path=None):
         try:
             logging.info("Step 4: Model Evaluation started...")
             model_eval = ModelEvaluation()
-            metrics = model_eval.initiate_model_evaluation(train_arr, test_arr, model_path)
+            model_eval.model_evaluation_config.async_tracking = self.async_tracking
+            metrics = model_eval.initiate_model_evaluation(
+                train_arr, test_arr, model_path, test_predictions,
+                model_report_path=ModelTrainer().model_trainer_config.model_report_file_path,
+                serving_model_path=serving_path,
+            )
             logging.info(f"Model Evaluation completed. Metrics: {metrics}")
             return metrics
         except Exception as e:
             raise customexception(e, sys)
 
-    def start_training(self):
+    def start_artifact_publishing(self, publish_fingerprint=True):
+        """Publish the artifacts as a new version; `publish_fingerprint` includes this run's fingerprint."""
+        try:
+            logging.info("Step 5: Publishing artifacts...")
+            model_path = ModelTrainer().model_trainer_config.trained_model_file_path
+            artifact_paths = [
+                DataTransformation().data_transformation_config.preprocessor_obj_file_path,
+                # Served as model.pkl: the float64 fallback if float32 was refused,
+                # else the distilled student if it was accepted, else the tournament winner
+                (serving_model_path(model_path), "model.pkl"),
+                ModelTrainer().model_trainer_config.model_report_file_path,
+                ModelDistillationConfig().distillation_report_file_path,
+                ComparablesIndexConfig().index_file_path,
+                (DataTransformation().data_transformation_config.drift_baseline_file_path, "drift_baseline.json"),
+                os.path.join("artifacts", "precision.json"),
+                LinearScorerConfig().scorer_file_path,
+            ]
+            if publish_fingerprint:
+                artifact_paths.append(self.run_config.fingerprint_path)
+            version = publish_artifacts(artifact_paths)
+            logging.info(f"Artifacts published as version {version}")
+            return version
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_training_if_needed(self):
+        """
+        Run the pipeline only if the retrain trigger fires.
+
+        Returns:
+            tuple: (trigger decision, metrics or None if training did not run)
+        """
+        try:
+            decision = RetrainTrigger().check()
+            logging.info(f"Retrain trigger: {decision['reason']}")
+            if not decision["retrain"]:
+                return decision, None
+            # Drift does not change the fingerprint, so it has to force the run
+            return decision, self.start_training(force=decision["drift"])
+        except Exception as e:
+            raise customexception(e, sys)
+
+    def start_training(self, force=False):
+        """
+        Run the pipeline under the training lock.
+
+        Returns None if a run was already in progress; that run then repeats
+        once more to pick up this request.
+        """
+        return run_coalesced(lambda: self.run_training_once(force=force))
+
+    def run_training_once(self, force=False):
+        """One pipeline run; `force` trains even if the run fingerprint is unchanged."""
         try:
             logging.info("==== Training Pipeline Started ====")
-            
+
+            # Source data this run starts from; becomes the retrain watermark once it succeeds
+            retrain_trigger = RetrainTrigger()
+            source_observation = retrain_trigger.observe(retrain_trigger.read_state())
+
+            # Nothing changed since the last run: reuse its artifacts and metrics
+            fingerprint = self.current_fingerprint()
+            if not force and self.is_up_to_date(fingerprint):
+                metrics = self.published_run()["metrics"]
+                # No training happened: advance the watermark but keep the drift cooldown as it was
+                retrain_trigger.record_source(source_observation)
+                logging.info("Run fingerprint unchanged, skipping training.")
+                return metrics
+
             # Step 1 & 2: Data ingestion + transformation
             train_data_path, test_data_path = self.start_data_ingestion()
             train_arr, test_arr = self.start_data_transformation(train_data_path, test_data_path)
+            self.start_comparables_index(train_data_path)
 
             # Step 3: Training
-            model_path = self.start_model_training(train_arr, test_arr)
+            model_path = self.start_model_training(train_arr, test_arr, train_data_path)
+            serving_path = self.start_model_distillation(train_arr, test_arr, model_path)
+            serving_path = self.start_precision_check(train_data_path, test_data_path, serving_path)
+            self.start_linear_scorer_export(test_data_path, serving_path)
 
-            # Step 4: Evaluation
-            metrics = self.start_model_evaluation(train_arr, test_arr, model_path)
+            # Step 4: Evaluation of the served model (the tournament winner's metrics too if distilled)
+            metrics = self.start_model_evaluation(
+                train_arr, test_arr, model_path, self.best_model_test_predictions, serving_path
+            )
+            # Recorded before publishing so the version carries it; only a published
+            # fingerprint counts as up to date
+            self.record_run(metrics, fingerprint)
+
+            # Step 5: Publish the new artifacts atomically
+            self.start_artifact_publishing()
+            retrain_trigger.mark_trained(source_observation)
 
             logging.info("==== Training Pipeline Completed Successfully ====")
             return metrics
@@ -87,11 +284,25 @@ class TrainingPipeline:
 
 
 if __name__ == "__main__":
-    pipeline = TrainingPipeline()
-    results = pipeline.start_training()
-    print("Final Evaluation Metrics:", results)
+    parser = argparse.ArgumentParser(description="Run the training pipeline.")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="poll the retrain trigger every SECONDS and train only when it fires")
+    args = parser.parse_args()
+
+    apply_thread_budget(role="training")
+    pipeline = TrainingPipeline(async_tracking=True)
+    if args.watch is None:
+        results = pipeline.start_training()
+        print("Final Evaluation Metrics:", results)
+    else:
+        while True:
+            decision, results = pipeline.start_training_if_needed()
+            if results is not None:
+                print("Final Evaluation Metrics:", results)
+            time.sleep(args.watch)
 
 
 
 # Commands
 # python -m src.pipeline.training_pipeline
+# python -m src.pipeline.training_pipeline --watch 60
@@ -0,0 +1,299 @@
+"""
+artifact_store.py
+-----------------
+Versioned artifact publishing and run coalescing for the training pipeline.
+
+It includes:
+1. publish_artifacts: copies the freshly trained artifacts into
+   artifacts/versions/<version>/ and then switches artifacts/CURRENT to it with
+   an atomic rename, so readers see either the old or the new set and never a
+   half-written one. Only the newest `keep_versions` versions are kept.
+2. resolve_artifact / current_version / rollback: readers resolve artifact
+   paths through the pointer, and a rollback is just another pointer swap.
+   Once a version is published, readers only see the files it contains.
+3. run_coalesced: runs training under an exclusive file lock. Requests that
+   arrive while a run is in progress only leave a marker, and the running
+   process does one more run for all of them together.
+4. acquire_training_lease / release_training_lease: the Airflow DAG trains in
+   several task processes, so it cannot hold the file lock for the whole run.
+   It takes a lease (a file naming the DAG run, created under the lock)
+   instead, and run_coalesced waits until no other owner holds a lease.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+from dataclasses import dataclass
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+@dataclass
+class ArtifactStoreConfig:
+    artifacts_dir: str = "artifacts"
+    versions_dir: str = os.path.join("artifacts", "versions")
+    pointer_file_path: str = os.path.join("artifacts", "CURRENT")
+    lock_file_path: str = os.path.join("artifacts", ".training.lock")
+    pending_file_path: str = os.path.join("artifacts", ".training.pending")
+    lease_file_path: str = os.path.join("artifacts", ".training.lease")
+    lease_ttl_seconds: float = 6 * 3600   # a lease older than this is treated as abandoned
+    lease_poll_seconds: float = 10.0
+    keep_versions: int = 5
+
+
+def write_atomic(file_path, data):
+    """Write text to file_path via a temporary file and an atomic rename."""
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file_obj:
+        file_obj.write(data)
+        file_obj.flush()
+        os.fsync(file_obj.fileno())
+    os.replace(tmp_path, file_path)
+
+
+def current_version(config=None):
+    """Id of the published version, or None if nothing has been published yet."""
+    config = config or ArtifactStoreConfig()
+    try:
+        with open(config.pointer_file_path) as file_obj:
+            return file_obj.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_artifact(file_name, config=None, version=None):
+    """
+    Path of an artifact in the published version.
+
+    Falls back to artifacts/<file_name> only when nothing has been published.
+    A file the published version does not contain resolves to a path that does
+    not exist, so callers treat it as absent instead of mixing in the working
+    copy of a later (possibly unfinished) run.
+    """
+    config = config or ArtifactStoreConfig()
+    version = version or current_version(config)
+    if version is None:
+        return os.path.join(config.artifacts_dir, file_name)
+    return os.path.join(config.versions_dir, version, file_name)
+
+
+def list_versions(config=None):
+    """Published versions, oldest first."""
+    config = config or ArtifactStoreConfig()
+    if not os.path.isdir(config.versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(config.versions_dir)
+        if os.path.isdir(os.path.join(config.versions_dir, name)) and not name.startswith(".")
+    )
+
+
+def publish_artifacts(file_paths, config=None):
+    """
+    Publish a set of artifact files as a new version and make it current.
+
+    Args:
+        file_paths (list): Paths to publish under their own file name, or
+            (path, published name) pairs. Missing files are skipped.
+
+    Returns:
+        str: The new version id.
+    """
+    config = config or ArtifactStoreConfig()
+    try:
+        # UTC second plus the nanoseconds within it, so ids sort in publish order
+        now_ns = time.time_ns()
+        version = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now_ns // 10**9))}-{now_ns % 10**9:09d}"
+        os.makedirs(config.versions_dir, exist_ok=True)
+
+        # Stage the whole version in a hidden directory, then rename it into place
+        staging_dir = os.path.join(config.versions_dir, f".{version}")
+        os.makedirs(staging_dir)
+        for entry in file_paths:
+            file_path, file_name = entry if isinstance(entry, tuple) else (entry, os.path.basename(entry))
+            if os.path.exists(file_path):
+                shutil.copy2(file_path, os.path.join(staging_dir, file_name))
+        os.rename(staging_dir, os.path.join(config.versions_dir, version))
+
+        write_atomic(config.pointer_file_path, version)
+        logging.info(f"Published artifacts version {version}")
+
+        prune_versions(config)
+        return version
+
+    except Exception as e:
+        logging.info("Exception occurred in publish_artifacts")
+        raise customexception(e, sys)
+
+
+def prune_versions(config=None):
+    """Delete all but the newest `keep_versions` versions (never the current one)."""
+    config = config or ArtifactStoreConfig()
+    current = current_version(config)
+    versions = list_versions(config)
+    for version in versions[:max(len(versions) - config.keep_versions, 0)]:
+        if version != current:
+            shutil.rmtree(os.path.join(config.versions_dir, version), ignore_errors=True)
+
+
+def rollback(version=None, config=None):
+    """
+    Point CURRENT back to `version`, or to the version before the current one.
+
+    Returns:
+        str: The version that is now current.
+    """
+    config = config or ArtifactStoreConfig()
+    try:
+        versions = list_versions(config)
+        if version is None:
+            current = current_version(config)
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ValueError("No earlier artifact version to roll back to")
+            version = older[-1]
+        elif version not in versions:
+            raise ValueError(f"Unknown artifact version: {version}")
+
+        write_atomic(config.pointer_file_path, version)
+        logging.info(f"Rolled back artifacts to version {version}")
+        return version
+
+    except Exception as e:
+        logging.info("Exception occurred in rollback")
+        raise customexception(e, sys)
+
+
+def _try_lock(lock_file):
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def lease_holder(config=None):
+    """Owner of the current training lease, or None if there is none (or it expired)."""
+    config = config or ArtifactStoreConfig()
+    try:
+        with open(config.lease_file_path) as file_obj:
+            lease = json.load(file_obj)
+    except (FileNotFoundError, ValueError):
+        return None
+    if time.time() - lease["acquired_at"] > config.lease_ttl_seconds:
+        return None
+    return lease["owner"]
+
+
+def acquire_training_lease(owner, config=None):
+    """
+    Take the training lease for `owner` (e.g. an Airflow run id).
+
+    Returns:
+        bool: False if a training run or another owner's lease is in progress.
+    """
+    config = config or ArtifactStoreConfig()
+    try:
+        os.makedirs(os.path.dirname(config.lock_file_path), exist_ok=True)
+        with open(config.lock_file_path, "w") as lock_file:
+            if not _try_lock(lock_file):
+                logging.info(f"Training lease refused for {owner}: training is running")
+                return False
+            try:
+                holder = lease_holder(config)
+                if holder is not None and holder != owner:
+                    logging.info(f"Training lease refused for {owner}: held by {holder}")
+                    return False
+                write_atomic(config.lease_file_path, json.dumps({"owner": owner, "acquired_at": time.time()}))
+                logging.info(f"Training lease acquired by {owner}")
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    except Exception as e:
+        logging.info("Exception occurred in acquire_training_lease")
+        raise customexception(e, sys)
+
+
+def release_training_lease(owner, config=None):
+    """Drop the training lease if `owner` holds it."""
+    config = config or ArtifactStoreConfig()
+    if lease_holder(config) == owner:
+        os.remove(config.lease_file_path)
+        logging.info(f"Training lease released by {owner}")
+
+
+def run_coalesced(fn, config=None):
+    """
+    Run `fn` under the training lock, coalescing requests that arrive meanwhile.
+
+    If another process holds the lock, a pending marker is left and None is
+    returned straight away. The lock holder keeps re-running `fn` while the
+    marker is present, so any number of queued requests costs one extra run.
+    A request whose marker lands just as the holder unlocks is not lost: the
+    requester tries the lock again after writing its marker, and the holder
+    checks the marker again after unlocking. While another owner holds the
+    training lease, the lock holder waits for it before running.
+
+    Returns:
+        The result of the last `fn` run, or None if the request was coalesced.
+    """
+    config = config or ArtifactStoreConfig()
+    os.makedirs(os.path.dirname(config.lock_file_path), exist_ok=True)
+
+    result = None
+    with open(config.lock_file_path, "w") as lock_file:
+        while True:
+            if not _try_lock(lock_file):
+                open(config.pending_file_path, "w").close()
+                # The holder may have unlocked before seeing the marker
+                if not _try_lock(lock_file):
+                    logging.info("Training already running, request coalesced into the next run")
+                    return result
+
+            try:
+                holder = lease_holder(config)
+                while holder is not None:
+                    logging.info(f"Training lease held by {holder}, waiting")
+                    time.sleep(config.lease_poll_seconds)
+                    holder = lease_holder(config)
+
+                while True:
+                    if os.path.exists(config.pending_file_path):
+                        os.remove(config.pending_file_path)
+                    result = fn()
+                    if not os.path.exists(config.pending_file_path):
+                        break
+                    logging.info("Training requested during the run, running once more")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+            # A request that failed to lock just before the unlock left its marker for us
+            if not os.path.exists(config.pending_file_path):
+                return result
+            logging.info("Training requested while releasing the lock, running once more")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List or roll back published artifact versions.")
+    parser.add_argument("command", choices=["list", "rollback"])
+    parser.add_argument("version", nargs="?", default=None, help="version to roll back to (default: previous)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = current_version()
+        for version in list_versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    else:
+        print(rollback(args.version))
+
+
+# Commands
+# python -m src.utils.artifact_store list
+# python -m src.utils.artifact_store rollback
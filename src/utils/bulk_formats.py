@@ -0,0 +1,220 @@
+"""
+bulk_formats.py
+---------------
+Request and response encodings for bulk predictions.
+
+Bulk callers send many rows per request, and for them encoding large batches
+of floats as JSON costs a noticeable share of the request time. Besides JSON,
+the prediction API therefore accepts and returns columnar binary payloads:
+
+1. Arrow IPC stream  (application/vnd.apache.arrow.stream), one column per feature.
+2. NumPy .npy        (application/x-npy), a structured array with one field per
+                      feature. Predictions are returned as a plain float64 array.
+3. JSON              (application/json), either column-oriented
+                      {"carat": [...], ...} or a list of row objects.
+
+The binary formats decode column by column straight into numpy arrays, with no
+Python object per row for the numerical features. The request format is taken
+from Content-Type and the response format is negotiated from Accept.
+
+Run this module to benchmark the serialization overhead of each format.
+"""
+
+import io
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:   # Arrow support is optional; JSON and .npy still work
+    pa = None
+
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+NPY_MIMETYPE = "application/x-npy"
+JSON_MIMETYPE = "application/json"
+
+FEATURE_COLUMNS = ["carat", "depth", "table", "x", "y", "z", "cut", "color", "clarity"]
+PREDICTION_COLUMN = "price"
+
+
+class UnsupportedFormatError(ValueError):
+    """The payload's media type is not one of the supported bulk formats."""
+
+
+def supported_mimetypes():
+    """Media types this process can decode and encode, preferred first."""
+    mimetypes = [NPY_MIMETYPE, JSON_MIMETYPE]
+    if pa is not None:
+        mimetypes.insert(0, ARROW_MIMETYPE)
+    return mimetypes
+
+
+def decode_features(body, content_type):
+    """
+    Decode a bulk request body into a feature DataFrame.
+
+    Args:
+        body (bytes): Raw request body.
+        content_type (str): Media type of the body (parameters are ignored).
+
+    Returns:
+        pd.DataFrame: The feature columns in FEATURE_COLUMNS order.
+    """
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype not in supported_mimetypes():
+        raise UnsupportedFormatError(f"Unsupported Content-Type: {content_type!r}")
+
+    if mimetype == ARROW_MIMETYPE:
+        table = pa_ipc.open_stream(body).read_all()
+        columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    elif mimetype == NPY_MIMETYPE:
+        array = np.load(io.BytesIO(body), allow_pickle=False)
+        if array.dtype.names is None:
+            raise ValueError("Expected a structured .npy array with one field per feature")
+        columns = {name: array[name] for name in array.dtype.names}
+    else:
+        payload = json.loads(body)
+        columns = pd.DataFrame(payload) if isinstance(payload, list) else payload
+
+    missing = [col for col in FEATURE_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    return pd.DataFrame({col: columns[col] for col in FEATURE_COLUMNS})
+
+
+def encode_predictions(predictions, mimetype):
+    """
+    Encode predictions in the given media type.
+
+    Returns:
+        bytes: The response body.
+    """
+    predictions = np.asarray(predictions, dtype=np.float64)
+    if mimetype == ARROW_MIMETYPE and pa is not None:
+        table = pa.table({PREDICTION_COLUMN: predictions})
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if mimetype == NPY_MIMETYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, predictions, allow_pickle=False)
+        return buffer.getvalue()
+    if mimetype == JSON_MIMETYPE:
+        return json.dumps({"predictions": predictions.tolist()}).encode()
+    raise UnsupportedFormatError(f"Unsupported response type: {mimetype!r}")
+
+
+def encode_features(df, mimetype):
+    """Client side: encode a feature DataFrame as a bulk request body."""
+    if mimetype == ARROW_MIMETYPE and pa is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if mimetype == NPY_MIMETYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, df.to_records(index=False).astype(_structured_dtype(df)), allow_pickle=False)
+        return buffer.getvalue()
+    if mimetype == JSON_MIMETYPE:
+        return json.dumps({col: df[col].tolist() for col in df.columns}).encode()
+    raise UnsupportedFormatError(f"Unsupported request type: {mimetype!r}")
+
+
+def decode_predictions(body, mimetype):
+    """Client side: decode a bulk response body into a float64 array."""
+    if mimetype == ARROW_MIMETYPE and pa is not None:
+        return pa_ipc.open_stream(body).read_all().column(PREDICTION_COLUMN).to_numpy()
+    if mimetype == NPY_MIMETYPE:
+        return np.load(io.BytesIO(body), allow_pickle=False)
+    if mimetype == JSON_MIMETYPE:
+        return np.asarray(json.loads(body)["predictions"], dtype=np.float64)
+    raise UnsupportedFormatError(f"Unsupported response type: {mimetype!r}")
+
+
+def _structured_dtype(df):
+    """.npy needs fixed-width strings instead of object columns."""
+    fields = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            fields.append((col, f"U{max(int(df[col].str.len().max()), 1)}"))
+        else:
+            fields.append((col, df[col].dtype))
+    return np.dtype(fields)
+
+
+def benchmark_formats(df, repeats=5):
+    """
+    Time the serialization overhead of each format for one request/response round trip.
+
+    Returns:
+        dict: Per format, the best-of-N milliseconds per 10k rows for encoding the
+              request, decoding it server side, encoding and decoding the
+              response, plus the request and response sizes in bytes.
+    """
+    try:
+        predictions = np.random.default_rng(0).uniform(300, 20_000, len(df))
+        per_10k = 10_000 / len(df)
+
+        def best_ms(fn):
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            return best * 1000 * per_10k
+
+        results = {}
+        for mimetype in supported_mimetypes():
+            request_body = encode_features(df, mimetype)
+            response_body = encode_predictions(predictions, mimetype)
+            results[mimetype] = {
+                "encode_request_ms": best_ms(lambda: encode_features(df, mimetype)),
+                "decode_request_ms": best_ms(lambda: decode_features(request_body, mimetype)),
+                "encode_response_ms": best_ms(lambda: encode_predictions(predictions, mimetype)),
+                "decode_response_ms": best_ms(lambda: decode_predictions(response_body, mimetype)),
+                "request_bytes": len(request_body),
+                "response_bytes": len(response_body),
+            }
+            # Server-side cost only: what the API pays per request
+            results[mimetype]["server_ms"] = (
+                results[mimetype]["decode_request_ms"] + results[mimetype]["encode_response_ms"]
+            )
+        return results
+
+    except Exception as e:
+        logging.info("Exception occurred in benchmark_formats")
+        raise customexception(e, sys)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark bulk prediction payload formats.")
+    parser.add_argument("--data", default="experiment/datasets/train.csv", help="CSV with the feature columns")
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, usecols=FEATURE_COLUMNS)
+    data = data.sample(n=args.rows, replace=len(data) < args.rows, random_state=0).reset_index(drop=True)
+
+    print(f"Serialization overhead per 10k rows ({args.rows} rows timed)")
+    print(f"{'format':<38}{'server ms':>10}{'client ms':>10}{'req KB':>9}{'resp KB':>9}")
+    for mimetype, stats in benchmark_formats(data).items():
+        client_ms = stats["encode_request_ms"] + stats["decode_response_ms"]
+        print(f"{mimetype:<38}{stats['server_ms']:>10.2f}{client_ms:>10.2f}"
+              f"{stats['request_bytes'] / 1024:>9.0f}{stats['response_bytes'] / 1024:>9.0f}")
+
+
+# Commands
+# python -m src.utils.bulk_formats --rows 10000
@@ -0,0 +1,159 @@
+"""
+cross_validation.py
+-------------------
+Parallel k-fold cross-validation for the model tournament.
+
+The preprocessor is fitted once per fold and the transformed fold matrices are
+cached as .npy files. Every fold x model job memory-maps them instead of
+re-running the preprocessing or copying the arrays into each worker. Jobs run
+in parallel with joblib, or on a process-pool / cluster executor, and report
+the CPU time they used.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
+from sklearn.model_selection import KFold
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.metrics import regression_metrics
+from src.utils.thread_budget import estimator_n_jobs, set_estimator_threads
+
+
+CV_REPORT_COLUMNS = [
+    "Model",
+    "CV R2 Mean", "CV R2 Std",
+    "CV MAE Mean", "CV MAE Std",
+    "CV RMSE Mean", "CV RMSE Std",
+    "CPU Seconds"
+]
+
+
+def cache_fold_matrices(train_df, build_preprocessor, cache_dir, target_column="price",
+                        drop_columns=("price", "id"), n_splits=5, seed=None):
+    """
+    Fit a fresh preprocessor on each training fold and cache the transformed folds.
+
+    Returns:
+        list[dict]: One dict of .npy paths per fold (X_train, y_train, X_valid, y_valid).
+    """
+    try:
+        features = train_df.drop(columns=list(drop_columns))
+        target = train_df[target_column].to_numpy(dtype=np.float64)
+
+        folds = []
+        kfold = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        for fold, (train_idx, valid_idx) in enumerate(kfold.split(features)):
+            preprocessor = build_preprocessor()
+            arrays = {
+                "X_train": preprocessor.fit_transform(features.iloc[train_idx]),
+                "y_train": target[train_idx],
+                "X_valid": preprocessor.transform(features.iloc[valid_idx]),
+                "y_valid": target[valid_idx],
+            }
+
+            paths = {}
+            for name, array in arrays.items():
+                paths[name] = os.path.join(cache_dir, f"fold_{fold}_{name}.npy")
+                np.save(paths[name], np.ascontiguousarray(array))
+            folds.append(paths)
+
+        logging.info(f"Cached {n_splits} preprocessed folds in {cache_dir}")
+        return folds
+
+    except Exception as e:
+        logging.info("Exception occurred in cache_fold_matrices")
+        raise customexception(e, sys)
+
+
+def fit_fold(model_name, model, fold, fold_paths, threads=None):
+    """
+    Fit one model on one cached fold (memory-mapped) and score it on the fold's validation part.
+
+    The model gets `threads` threads (the running process's thread budget if None).
+    """
+    start_cpu = time.process_time()
+    model = set_estimator_threads(model, threads)
+
+    X_train, y_train, X_valid, y_valid = (
+        np.load(fold_paths[name], mmap_mode="r") for name in ("X_train", "y_train", "X_valid", "y_valid")
+    )
+    model.fit(X_train, y_train)
+    metrics = regression_metrics(y_valid, model.predict(X_valid))
+
+    metrics.update(model=model_name, fold=fold, cpu_seconds=time.process_time() - start_cpu)
+    return metrics
+
+
+def cross_validate_models(train_df, models, build_preprocessor, n_splits=5, seed=None, n_jobs=None,
+                          target_column="price", drop_columns=("price", "id"), cache_dir=None, executor=None):
+    """
+    Cross-validate every candidate model, running fold x model jobs in parallel.
+
+    Args:
+        train_df (pd.DataFrame): Raw (untransformed) training data.
+        models (dict): Model name -> unfitted estimator (cloned per job).
+        build_preprocessor (callable): Returns a new, unfitted preprocessor.
+        n_splits (int): Number of folds.
+        seed (int): Seed for the fold shuffling.
+        n_jobs (int): joblib workers for the fold x model jobs (None = the thread budget).
+            The budget is split between the workers, so workers x threads per
+            worker never exceeds it.
+        cache_dir (str): Where to cache fold matrices (a temporary directory if None).
+        executor: A parallel executor (src/utils/executors.py) to run the jobs on instead
+            of the local joblib pool. The folds are then cached under its shared path.
+
+    Returns:
+        tuple: (pd.DataFrame of mean/std metrics per model, total CPU seconds of all jobs)
+    """
+    distributed = executor is not None and executor.parallel
+    owns_cache_dir = cache_dir is None
+    if cache_dir is None:
+        cache_dir = executor.shared_path("cv_folds") if distributed else tempfile.mkdtemp(prefix="cv_folds_")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        folds = cache_fold_matrices(
+            train_df, build_preprocessor, cache_dir,
+            target_column=target_column, drop_columns=drop_columns, n_splits=n_splits, seed=seed
+        )
+
+        jobs = [(model_name, clone(model), fold, fold_paths)
+                for fold, fold_paths in enumerate(folds)
+                for model_name, model in models.items()]
+        if distributed:
+            # Each worker sizes the fits to its own thread budget
+            results = executor.map(fit_fold, jobs)
+        else:
+            budget = estimator_n_jobs()
+            n_workers = min(budget if n_jobs is None or n_jobs < 0 else n_jobs, len(jobs))
+            inner_threads = max(1, budget // n_workers)
+            with parallel_config(backend="loky", inner_max_num_threads=inner_threads):
+                results = Parallel(n_jobs=n_workers)(delayed(fit_fold)(*job, inner_threads) for job in jobs)
+        results = pd.DataFrame(results)
+
+        report = results.groupby("model", sort=False).agg(**{
+            "CV R2 Mean": ("r2", "mean"), "CV R2 Std": ("r2", "std"),
+            "CV MAE Mean": ("mae", "mean"), "CV MAE Std": ("mae", "std"),
+            "CV RMSE Mean": ("rmse", "mean"), "CV RMSE Std": ("rmse", "std"),
+            "CPU Seconds": ("cpu_seconds", "sum"),
+        }).rename_axis("Model").reset_index()[CV_REPORT_COLUMNS]
+
+        total_cpu_seconds = float(results["cpu_seconds"].sum())
+        logging.info(f"Cross-validation finished: {len(results)} jobs, {total_cpu_seconds:.1f} CPU seconds")
+        return report, total_cpu_seconds
+
+    except Exception as e:
+        logging.info("Exception occurred in cross_validate_models")
+        raise customexception(e, sys)
+
+    finally:
+        if owns_cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
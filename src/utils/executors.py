@@ -0,0 +1,368 @@
+"""
+executors.py
+------------
+Pluggable executors for the training tournament's fit jobs.
+
+Every backend has the same interface: `map(fn, arglists)` runs fn(*args) for
+each argument tuple and returns the results in submission order. `share(arrays)`
+makes the training matrices available to the jobs. Jobs are top-level functions,
+so they pickle by reference, and everything they return must be picklable.
+
+Backends (params.yaml `executor.backend`):
+
+- in_process:   jobs run one after another in the calling process (the default).
+- process_pool: a local pool of `workers` spawned processes.
+- cluster:      a coordinator listens on `address` and worker processes, on
+                this host or others, connect over TCP
+                (multiprocessing.connection), pull one job at a time and send
+                the result back. A job whose worker disconnects is requeued.
+                map() fails if no worker is connected for
+                `connect_timeout_seconds`, or if every local worker exited.
+                Shared arrays are written as .npy files under `shared_dir`,
+                which must be the same path on every node (e.g. an NFS mount),
+                and are memory-mapped by the jobs. `workers` > 0 also starts
+                that many workers on the coordinator's host.
+
+Start a remote worker with the same code checkout and shared_dir:
+
+    EXECUTOR_AUTHKEY=... python -m src.utils.executors worker --address coordinator:6100
+
+Each worker process limits its native thread pools to its host's thread budget,
+so workers x threads never exceeds the cores. Fitted models are seeded and
+independent of where they run, so every backend produces the same tournament.
+"""
+
+import os
+import sys
+import time
+import uuid
+import queue
+import shutil
+import socket
+import argparse
+import threading
+import traceback
+import subprocess
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from multiprocessing.connection import Listener, Client
+
+import yaml
+import numpy as np
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+from src.utils.thread_budget import ThreadBudgetConfig, apply_thread_budget, available_cores
+
+
+EXECUTOR_BACKENDS = ["in_process", "process_pool", "cluster"]
+
+
+@dataclass
+class ExecutorConfig:
+    backend: str = "in_process"
+    workers: int = None   # process_pool: pool size (None = cores); cluster: local workers to start
+    address: str = "127.0.0.1:0"   # cluster coordinator host:port (port 0 = any free port)
+    shared_dir: str = os.path.join("artifacts", "shared")   # same path on every cluster node
+    connect_timeout_seconds: float = 60.0   # worker: retry reaching the coordinator; coordinator: wait for a worker
+
+    @classmethod
+    def from_params(cls, params_path="params.yaml"):
+        """Build the config from the `executor` section of params.yaml (defaults if absent)."""
+        try:
+            if not os.path.exists(params_path):
+                return cls()
+
+            with open(params_path) as file_obj:
+                params = yaml.safe_load(file_obj) or {}
+
+            config = cls(**params.get("executor", {}))
+            if config.backend not in EXECUTOR_BACKENDS:
+                raise ValueError(f"Unknown executor backend {config.backend!r}, expected one of {EXECUTOR_BACKENDS}")
+            return config
+
+        except Exception as e:
+            logging.info("Exception occurred in ExecutorConfig.from_params")
+            raise customexception(e, sys)
+
+
+def parse_address(address):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def load_shared(value):
+    """An array given to share(): the array itself, or the .npy path it was written to (memory-mapped)."""
+    return np.load(value, mmap_mode="r") if isinstance(value, str) else value
+
+
+class InProcessExecutor:
+    parallel = False
+
+    def __init__(self, config=None):
+        self.config = config or ExecutorConfig()
+
+    def map(self, fn, arglists):
+        return [fn(*args) for args in arglists]
+
+    def share(self, arrays):
+        return dict(arrays)
+
+    def shared_path(self, name):
+        return os.path.join(self.config.shared_dir, f"{name}_{uuid.uuid4().hex[:8]}")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _FileSharingExecutor(InProcessExecutor):
+    """Base for backends whose jobs run in other processes: arrays go through shared_dir."""
+
+    parallel = True
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self._shared_paths = []
+
+    def shared_path(self, name):
+        path = super().shared_path(name)
+        self._shared_paths.append(path)
+        return path
+
+    def share(self, arrays):
+        directory = self.shared_path("arrays")
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for name, array in arrays.items():
+            paths[name] = os.path.join(directory, f"{name}.npy")
+            np.save(paths[name], np.ascontiguousarray(array))
+        return paths
+
+    def close(self):
+        for path in self._shared_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        self._shared_paths = []
+
+
+class ProcessPoolExecutorBackend(_FileSharingExecutor):
+    def __init__(self, config=None):
+        super().__init__(config)
+        workers = self.config.workers or available_cores()
+        # Spawned, not forked: the parent may be running tracking threads
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=apply_thread_budget,
+            initargs=(ThreadBudgetConfig(workers=workers), "executor worker"),
+        )
+        logging.info(f"Process pool executor with {workers} workers")
+
+    def map(self, fn, arglists):
+        futures = [self.pool.submit(fn, *args) for args in arglists]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.pool.shutdown()
+        super().close()
+
+
+class ClusterExecutor(_FileSharingExecutor):
+    """Coordinator: hands jobs to connected workers and collects their results."""
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        host, port = parse_address(self.config.address)
+
+        authkey = os.getenv("EXECUTOR_AUTHKEY")
+        if authkey is None and host not in ("127.0.0.1", "localhost"):
+            raise ValueError("Set EXECUTOR_AUTHKEY before accepting workers from other hosts")
+        self.authkey = (authkey or os.urandom(16).hex()).encode()
+
+        self.listener = Listener((host, port), authkey=self.authkey)
+        self.address = "{}:{}".format(*self.listener.address)
+        self.jobs = queue.Queue()
+        self.closed = threading.Event()
+        self.connections = []
+        self.live_workers = 0
+        self.live_workers_lock = threading.Lock()
+        threading.Thread(target=self._accept, name="executor-accept", daemon=True).start()
+
+        self.local_workers = [self._start_local_worker() for _ in range(self.config.workers or 0)]
+        logging.info(f"Cluster coordinator on {self.address}, {len(self.local_workers)} local workers")
+
+    def _start_local_worker(self):
+        env = dict(os.environ, EXECUTOR_AUTHKEY=self.authkey.decode(),
+                   THREAD_BUDGET_WORKERS=str(self.config.workers))
+        return subprocess.Popen([sys.executable, "-m", "src.utils.executors", "worker", "--address", self.address],
+                                env=env)
+
+    def _accept(self):
+        while not self.closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                # Listener closed, a client with the wrong key, or one that dropped mid-handshake
+                if not self.closed.is_set():
+                    logging.warning(f"Executor connection refused: {e!r}")
+                continue
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        """Feed one worker connection, one job at a time."""
+        try:
+            worker = conn.recv()
+            name = f"{worker['host']}:{worker['pid']}"
+        except (EOFError, OSError, TypeError, KeyError):
+            logging.warning("Executor worker dropped before introducing itself")
+            conn.close()
+            return
+
+        logging.info(f"Executor worker {name} connected")
+        with self.live_workers_lock:
+            self.live_workers += 1
+        try:
+            while not self.closed.is_set():
+                try:
+                    job = self.jobs.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                fn, args, future = job
+                # False if its map() already gave up; a running future can no longer be cancelled
+                if not future.running() and not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    conn.send((fn, args))
+                    status, value = conn.recv()
+                except (EOFError, OSError):
+                    logging.warning(f"Executor worker {name} lost, requeueing its job")
+                    self.jobs.put(job)
+                    return
+                if status == "ok":
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(f"Job failed on {name}:\n{value}"))
+        finally:
+            with self.live_workers_lock:
+                self.live_workers -= 1
+
+    def _check_workers(self, waiting_since):
+        """Raise if no worker can pick up the queued jobs."""
+        if self.live_workers:
+            return
+        if self.local_workers and all(process.poll() is not None for process in self.local_workers):
+            exit_codes = [process.returncode for process in self.local_workers]
+            raise RuntimeError(f"Every local executor worker exited (exit codes {exit_codes}) "
+                               f"and no other worker is connected")
+        if time.monotonic() - waiting_since > self.config.connect_timeout_seconds:
+            raise RuntimeError(f"No executor worker connected to {self.address} within "
+                               f"{self.config.connect_timeout_seconds:g}s")
+
+    def map(self, fn, arglists):
+        futures = []
+        for args in arglists:
+            futures.append(Future())
+            self.jobs.put((fn, tuple(args), futures[-1]))
+
+        try:
+            results = []
+            waiting_since = time.monotonic()
+            for future in futures:
+                while True:
+                    try:
+                        results.append(future.result(timeout=1.0))
+                        break
+                    except FutureTimeoutError:
+                        if self.live_workers:
+                            waiting_since = time.monotonic()
+                        self._check_workers(waiting_since)
+            return results
+        except BaseException:
+            # Jobs of this map that are still queued are dropped when a worker picks them up
+            for future in futures:
+                future.cancel()
+            raise
+
+    def close(self):
+        self.closed.set()
+        for conn in self.connections:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        self.listener.close()
+        for process in self.local_workers:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"Executor worker {process.pid} did not stop, killing it")
+                process.kill()
+                process.wait()
+        super().close()
+
+
+def get_executor(config=None):
+    config = config or ExecutorConfig.from_params()
+    backends = {
+        "in_process": InProcessExecutor,
+        "process_pool": ProcessPoolExecutorBackend,
+        "cluster": ClusterExecutor,
+    }
+    return backends[config.backend](config)
+
+
+def run_worker(address, authkey, connect_timeout_seconds=60.0):
+    """Cluster worker: pull jobs from the coordinator until it says stop or goes away."""
+    apply_thread_budget(role="executor worker")
+
+    deadline = time.monotonic() + connect_timeout_seconds
+    while True:
+        try:
+            conn = Client(parse_address(address), authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(1.0)
+
+    conn.send({"host": socket.gethostname(), "pid": os.getpid()})
+    jobs_done = 0
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        fn, args = message
+        try:
+            result = ("ok", fn(*args))
+        except Exception:
+            result = ("error", traceback.format_exc())
+        conn.send(result)
+        jobs_done += 1
+    logging.info(f"Executor worker {os.getpid()} stopping after {jobs_done} jobs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training executor worker.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    p = subparsers.add_parser("worker", help="connect to a cluster coordinator and run its jobs")
+    p.add_argument("--address", required=True, help="coordinator host:port")
+    p.add_argument("--connect-timeout", type=float, default=ExecutorConfig.connect_timeout_seconds)
+    args = parser.parse_args()
+
+    if not os.getenv("EXECUTOR_AUTHKEY"):
+        parser.error("EXECUTOR_AUTHKEY must be set to the coordinator's key")
+    run_worker(args.address, os.environ["EXECUTOR_AUTHKEY"].encode(), args.connect_timeout)
+
+
+# Commands
+# EXECUTOR_AUTHKEY=... python -m src.utils.executors worker --address coordinator:6100
@@ -0,0 +1,99 @@
+"""
+metrics.py
+----------
+Regression metrics engine used by the model tournament and ModelEvaluation.
+
+It includes:
+1. regression_metrics: R², MAE and RMSE from a single pass over the residuals
+   (instead of three separate sklearn calls that each re-scan the data).
+2. StreamingRegressionMetrics: the same metrics accumulated chunk by chunk, so
+   large sets can be scored without holding every prediction in memory.
+3. score_in_chunks: predict + score a model over a large set chunk by chunk.
+"""
+
+import sys
+import numpy as np
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+def regression_metrics(actual, pred):
+    """
+    Compute R², MAE and RMSE in one vectorized pass.
+
+    Returns:
+        dict: {"r2": float, "mae": float, "rmse": float}
+    """
+    actual = np.asarray(actual, dtype=np.float64).ravel()
+    residual = actual - np.asarray(pred, dtype=np.float64).ravel()
+
+    sse = float(np.dot(residual, residual))
+    centered = actual - actual.mean()
+    sst = float(np.dot(centered, centered))
+
+    return {
+        "r2": 1.0 - sse / sst if sst > 0 else 0.0,
+        "mae": float(np.abs(residual).mean()),
+        "rmse": float(np.sqrt(sse / actual.size)),
+    }
+
+
+class StreamingRegressionMetrics:
+    """
+    Incremental R² / MAE / RMSE.
+
+    The target variance is merged chunk by chunk (Chan et al.), which stays
+    accurate for large prices where sum(y²) - n·mean² would lose precision.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0    # sum of squared deviations of the target from its mean
+        self.sse = 0.0   # sum of squared residuals
+        self.sae = 0.0   # sum of absolute residuals
+
+    def update(self, actual, pred):
+        actual = np.asarray(actual, dtype=np.float64).ravel()
+        residual = actual - np.asarray(pred, dtype=np.float64).ravel()
+        n_chunk = actual.size
+        if n_chunk == 0:
+            return self
+
+        mean_chunk = actual.mean()
+        centered = actual - mean_chunk
+        m2_chunk = float(np.dot(centered, centered))
+
+        n_total = self.n + n_chunk
+        delta = mean_chunk - self.mean
+        self.m2 += m2_chunk + delta * delta * self.n * n_chunk / n_total
+        self.mean += delta * n_chunk / n_total
+        self.n = n_total
+
+        self.sse += float(np.dot(residual, residual))
+        self.sae += float(np.abs(residual).sum())
+        return self
+
+    def result(self):
+        if self.n == 0:
+            raise ValueError("No samples were added to StreamingRegressionMetrics")
+        return {
+            "r2": float(1.0 - self.sse / self.m2) if self.m2 > 0 else 0.0,
+            "mae": self.sae / self.n,
+            "rmse": float(np.sqrt(self.sse / self.n)),
+        }
+
+
+def score_in_chunks(model, X, y, chunk_size=100_000):
+    """Predict and score `model` over X chunk by chunk; only one chunk of predictions is live."""
+    try:
+        metrics = StreamingRegressionMetrics()
+        for start in range(0, len(X), chunk_size):
+            stop = start + chunk_size
+            metrics.update(y[start:stop], model.predict(X[start:stop]))
+        return metrics.result()
+
+    except Exception as e:
+        logging.info("Exception occurred in score_in_chunks")
+        raise customexception(e, sys)
@@ -0,0 +1,146 @@
+"""
+model_selection.py
+------------------
+Serving-cost measurements and selection policies for the model tournament.
+
+Ranking purely by R2 lets a large ensemble win by a fraction of a point while
+costing orders of magnitude more latency and memory than a linear model. Every
+fitted candidate is therefore also measured for:
+
+1. Model Bytes            - size of the pickled model
+2. Single Row p50/p99 ms  - latency of one-row predict calls (the Flask path)
+3. Batch ms per 1k Rows   - throughput of batched predict calls (bulk/batch path)
+
+(fit time is recorded by fit_and_score as "Fit Seconds").
+
+select_model then picks the winner with one of these policies:
+
+- best_r2: highest score, costs only reported (the previous behaviour)
+- budget:  highest score among candidates within the p99 latency and size
+           budgets; falls back to best_r2 if none fits
+- pareto:  among the Pareto-optimal candidates (score vs p99 latency vs size),
+           the fastest one whose score is within `r2_tolerance` of the best
+"""
+
+import sys
+import time
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+COST_COLUMNS = [
+    "Model Bytes",
+    "Single Row p50 ms", "Single Row p99 ms",
+    "Batch ms per 1k Rows",
+]
+
+SELECTION_POLICIES = ("best_r2", "budget", "pareto")
+
+
+def measure_serving_cost(model, X, single_row_calls=200, batch_size=1000, repeats=3):
+    """
+    Measure the serialized size and predict latency of a fitted model.
+
+    Args:
+        model: Fitted estimator.
+        X (np.ndarray): Transformed feature rows to predict on (e.g. the test set).
+        single_row_calls (int): Number of one-row predict calls timed.
+        batch_size (int): Rows per timed batch predict call.
+        repeats (int): Batch timings taken (the best one is kept).
+
+    Returns:
+        dict: One value per COST_COLUMNS entry.
+    """
+    try:
+        X = np.asarray(X)
+        model.predict(X[:1])   # warm-up (lazy initialisation, caches)
+
+        latencies = np.empty(single_row_calls)
+        for i in range(single_row_calls):
+            row = X[i % len(X)][None, :]
+            start = time.perf_counter()
+            model.predict(row)
+            latencies[i] = time.perf_counter() - start
+
+        batch = X[np.arange(batch_size) % len(X)]
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(batch)
+            best = min(best, time.perf_counter() - start)
+
+        return {
+            "Model Bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+            "Single Row p50 ms": float(np.percentile(latencies, 50) * 1000),
+            "Single Row p99 ms": float(np.percentile(latencies, 99) * 1000),
+            "Batch ms per 1k Rows": best * 1000 * 1000 / batch_size,
+        }
+
+    except Exception as e:
+        logging.info("Exception occurred in measure_serving_cost")
+        raise customexception(e, sys)
+
+
+def pareto_optimal(report, score_column):
+    """
+    Flag candidates no other candidate beats on score, p99 latency and size at once.
+
+    Candidates without cost measurements are never Pareto-optimal.
+    """
+    score = report[score_column].to_numpy(dtype=np.float64)
+    latency = report["Single Row p99 ms"].to_numpy(dtype=np.float64)
+    size = report["Model Bytes"].to_numpy(dtype=np.float64)
+    measured = ~np.isnan(latency) & ~np.isnan(size)
+
+    flags = []
+    for i in range(len(report)):
+        dominated = measured & (score >= score[i]) & (latency <= latency[i]) & (size <= size[i]) & (
+            (score > score[i]) | (latency < latency[i]) | (size < size[i])
+        )
+        flags.append(bool(measured[i] and not dominated.any()))
+    return pd.Series(flags, index=report.index)
+
+
+def select_model(report, score_column, policy="best_r2", max_p99_latency_ms=None,
+                 max_model_bytes=None, r2_tolerance=0.001):
+    """
+    Pick the winning candidate from a tournament report with cost columns.
+
+    Returns:
+        tuple: (index of the selected row, human-readable reason)
+    """
+    try:
+        if policy not in SELECTION_POLICIES:
+            raise ValueError(f"Unknown selection policy {policy!r}, expected one of {SELECTION_POLICIES}")
+
+        best_idx = report[score_column].idxmax()
+        if policy == "best_r2":
+            return best_idx, f"highest {score_column}"
+
+        if policy == "budget":
+            within = report["Single Row p99 ms"].notna()
+            if max_p99_latency_ms is not None:
+                within &= report["Single Row p99 ms"] <= max_p99_latency_ms
+            if max_model_bytes is not None:
+                within &= report["Model Bytes"] <= max_model_bytes
+            if not within.any():
+                logging.warning("No candidate fits the latency/size budget, falling back to the best score")
+                return best_idx, f"highest {score_column} (no candidate within budget)"
+            return report.loc[within, score_column].idxmax(), f"highest {score_column} within budget"
+
+        # pareto: the fastest near-best candidate on the Pareto front
+        front = report[report["Pareto Optimal"]]
+        near_best = front[front[score_column] >= report[score_column].max() - r2_tolerance]
+        if near_best.empty:
+            return best_idx, f"highest {score_column} (no Pareto candidate within tolerance)"
+        selected = near_best.sort_values(["Single Row p99 ms", "Model Bytes"]).index[0]
+        return selected, f"fastest Pareto-optimal model within {r2_tolerance} {score_column} of the best"
+
+    except Exception as e:
+        logging.info("Exception occurred in select_model")
+        raise customexception(e, sys)
@@ -0,0 +1,204 @@
+"""
+request_capture.py
+------------------
+Sampled, append-only capture of prediction requests for replay and offline analysis.
+
+It includes:
+1. RequestCaptureConfig: sample rate, output directory, rotation and buffer limits.
+2. RequestCaptureWriter: samples requests on the serving thread and hands the
+   DataFrame and predictions to a background writer through a bounded queue;
+   all serialization happens on the writer thread. If the queue is full the
+   record is dropped and counted, so capturing never blocks a request.
+3. read_captured_requests: iterates the captured records, oldest file first.
+
+Records are written as compact JSON lines into gzip files. Each file starts
+with a header line that lists the feature columns, and each record holds the
+timestamp, the feature values in that column order and the prediction. Files
+are rotated by size and only the newest `max_files` are kept; a writer never
+deletes the files of another live process.
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import random
+import threading
+from dataclasses import dataclass
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+@dataclass
+class RequestCaptureConfig:
+    sample_rate: float = 0.0   # fraction of requests captured; 0 disables capture
+    capture_dir: str = os.path.join("logs", "request_capture")
+    max_file_bytes: int = 64 * 1024 * 1024
+    max_files: int = 20
+    queue_size: int = 10_000   # records buffered before new ones are dropped
+    flush_interval: float = 1.0   # seconds between writer flushes
+
+    @classmethod
+    def from_env(cls):
+        """Read the sample rate and directory from REQUEST_CAPTURE_* environment variables."""
+        return cls(
+            sample_rate=float(os.getenv("REQUEST_CAPTURE_SAMPLE_RATE", "0")),
+            capture_dir=os.getenv("REQUEST_CAPTURE_DIR", cls.capture_dir),
+        )
+
+
+class RequestCaptureWriter:
+    """
+    Samples (features, prediction) pairs and appends them to rotating capture files.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or RequestCaptureConfig()
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=self.config.queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._columns = None
+        self._sequence = 0   # files started by this process, keeps rotated names unique
+        if self.enabled:
+            atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        return self.config.sample_rate > 0
+
+    def capture(self, features, predictions):
+        """
+        Sample and enqueue the rows of a served DataFrame and their predictions.
+
+        Only references are queued; the caller must not modify them afterwards.
+        """
+        if not self.enabled or random.random() >= self.config.sample_rate:
+            return
+
+        try:
+            self._queue.put_nowait((time.time(), features, predictions))
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._worker, name="request-capture", daemon=True)
+                    self._thread.start()
+
+    def _worker(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.config.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Drain whatever is buffered and write it as one gzip member
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                logging.error(f"Request capture write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        lines = []
+        for timestamp, features, predictions in batch:
+            columns = list(features.columns)
+            if self._file is None or columns != self._columns:
+                self._rotate(columns)
+                lines.append(json.dumps({"columns": columns}, separators=(",", ":")))
+            timestamp = round(timestamp, 3)
+            for row, prediction in zip(features.values.tolist(), predictions):
+                lines.append(json.dumps([timestamp, row, float(prediction)], separators=(",", ":")))
+
+        with gzip.open(self._file, "at") as file_obj:
+            file_obj.write("\n".join(lines) + "\n")
+
+        if os.path.getsize(self._file) >= self.config.max_file_bytes:
+            self._file = None   # next batch starts a new file
+
+    def _rotate(self, columns):
+        os.makedirs(self.config.capture_dir, exist_ok=True)
+        self._sequence += 1
+        self._file = os.path.join(
+            self.config.capture_dir,
+            f"capture-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:06d}.jsonl.gz"
+        )
+        self._columns = columns
+
+        # Keep only the newest files, but leave files other live writers may still append to
+        files = sorted(glob.glob(os.path.join(self.config.capture_dir, "capture-*.jsonl.gz")), key=os.path.getmtime)
+        for old_file in files[:max(len(files) - self.config.max_files + 1, 0)]:
+            pid = capture_file_pid(old_file)
+            if pid == os.getpid() or not _process_alive(pid):
+                try:
+                    os.remove(old_file)
+                except FileNotFoundError:   # pruned by another writer meanwhile
+                    pass
+
+    def flush(self):
+        """Block until every enqueued record is on disk."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        self.flush()
+        if self.dropped:
+            logging.warning(f"Request capture dropped {self.dropped} records (queue full)")
+
+
+def capture_file_pid(path):
+    """Pid of the process that wrote a capture file (None if the name has no pid)."""
+    parts = os.path.basename(path).split(".")[0].split("-")
+    return int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else None
+
+
+def _process_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:   # exists, owned by another user
+        return True
+    return True
+
+
+def read_captured_requests(capture_dir):
+    """
+    Yield (timestamp, feature dict, prediction) for every captured row, oldest file first.
+    """
+    try:
+        files = sorted(glob.glob(os.path.join(capture_dir, "capture-*.jsonl.gz")), key=os.path.getmtime)
+        for path in files:
+            columns = None
+            with gzip.open(path, "rt") as file_obj:
+                for line in file_obj:
+                    record = json.loads(line)
+                    if isinstance(record, dict):
+                        columns = record["columns"]
+                        continue
+                    timestamp, row, prediction = record
+                    yield timestamp, dict(zip(columns, row)), prediction
+
+    except Exception as e:
+        logging.info("Exception occurred in read_captured_requests")
+        raise customexception(e, sys)
@@ -0,0 +1,187 @@
+"""
+sampling_profiler.py
+--------------------
+On-demand sampling profiler for a running serving process.
+
+While a profile runs, a background thread wakes every `interval_seconds`, reads
+the current stack of every other thread (sys._current_frames) and counts each
+distinct stack. The result is in collapsed-stack format, one line per stack,
+root first, with its sample count:
+
+    Thread-3;predict_datapoint (app.py:40);predict (prediction_pipeline.py:120) 57
+
+This is the input format of flamegraph.pl, speedscope and inferno.
+
+A profile can be started in two ways:
+
+- POST /admin/profile?seconds=N with an X-Admin-Token header that matches
+  PROFILER_TOKEN. The route is disabled (404) when PROFILER_TOKEN is unset.
+- kill -USR2 <worker pid>: the worker profiles for `signal_seconds` and writes
+  profiles/<pid>-<time>.folded.
+
+Nothing is hooked into the interpreter: when no profile is running there is no
+sampler thread and no per-call overhead. Only one profile runs per process at a
+time.
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+@dataclass
+class SamplingProfilerConfig:
+    interval_seconds: float = 0.005   # 200 samples per second
+    max_seconds: float = 60.0   # longest profile a caller may ask for
+    signal_seconds: float = 10.0   # length of a signal-triggered profile
+    output_dir: str = "profiles"   # where signal-triggered profiles are written
+    token: str = None   # admin token; None disables the endpoint
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            signal_seconds=float(os.getenv("PROFILER_SIGNAL_SECONDS", cls.signal_seconds)),
+            token=os.getenv("PROFILER_TOKEN") or None,
+        )
+
+
+class ProfilerBusyError(RuntimeError):
+    """A profile is already running in this process."""
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame):
+    """Root-first frame labels of `frame`'s stack."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    def __init__(self, config=None):
+        self.config = config or SamplingProfilerConfig()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def profile(self, seconds):
+        """
+        Sample every other thread for `seconds` (capped at max_seconds).
+
+        Returns:
+            tuple: (collapsed-stack text, number of sampling rounds)
+
+        Raises:
+            ProfilerBusyError: If a profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("a profile is already running in this process")
+        try:
+            seconds = min(float(seconds), self.config.max_seconds)
+            interval = self.config.interval_seconds
+            skip = {threading.get_ident()}
+            names = {}
+            counts = Counter()
+            rounds = 0
+
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id in skip:
+                        continue
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    stack = [names.get(thread_id, str(thread_id))] + collapse_stack(frame)
+                    counts[";".join(stack)] += 1
+                rounds += 1
+                time.sleep(interval)
+
+            collapsed = "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+            logging.info(f"Sampling profile finished: {seconds:.1f}s, {rounds} rounds, {len(counts)} stacks")
+            return collapsed, rounds
+        finally:
+            self._lock.release()
+
+    def profile_to_file(self, seconds):
+        """Profile and write profiles/<pid>-<time>.folded; returns the path (None if busy)."""
+        try:
+            collapsed, _ = self.profile(seconds)
+            os.makedirs(self.config.output_dir, exist_ok=True)
+            path = os.path.join(self.config.output_dir, f"{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+            with open(path, "w") as file_obj:
+                file_obj.write(collapsed + "\n")
+            logging.info(f"Sampling profile written to {path}")
+            return path
+        except ProfilerBusyError:
+            logging.info("Profile signal ignored, a profile is already running")
+            return None
+        except Exception as e:
+            logging.info("Exception occurred in profile_to_file")
+            raise customexception(e, sys)
+
+    def install_signal_handler(self, signum=getattr(signal, "SIGUSR2", None)):
+        """Profile in the background when the process receives `signum`. Returns True if installed."""
+        if signum is None:
+            return False
+
+        def handler(received_signum, frame):
+            # Keep the handler short: the sampling runs in its own thread
+            threading.Thread(target=self.profile_to_file, args=(self.config.signal_seconds,),
+                             name="sampling-profiler", daemon=True).start()
+
+        try:
+            signal.signal(signum, handler)
+            return True
+        except ValueError:   # not the main thread (e.g. imported by a worker thread)
+            return False
+
+
+def top_frames(collapsed, top=20):
+    """Self (leaf) and total sample counts per frame in collapsed-stack text."""
+    self_counts, total_counts = Counter(), Counter()
+    for line in collapsed.splitlines():
+        if not line.strip():
+            continue
+        stack, count = line.rsplit(" ", 1)
+        frames = stack.split(";")[1:]   # drop the thread name
+        self_counts[frames[-1]] += int(count)
+        for label in set(frames):
+            total_counts[label] += int(count)
+    return [(label, self_counts[label], total_counts[label]) for label, _ in self_counts.most_common(top)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a collapsed-stack profile.")
+    parser.add_argument("profile", help="a .folded file from the endpoint or the signal handler")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.profile) as file_obj:
+        collapsed = file_obj.read()
+    print(f"{'self':>8}{'total':>8}  frame")
+    for label, self_count, total_count in top_frames(collapsed, args.top):
+        print(f"{self_count:>8}{total_count:>8}  {label}")
+
+
+# Commands
+# curl -X POST -H "X-Admin-Token: $PROFILER_TOKEN" "localhost:8000/admin/profile?seconds=10" > profile.folded
+# kill -USR2 <worker pid>
+# python -m src.utils.sampling_profiler profiles/<pid>-<time>.folded
+# flamegraph.pl profile.folded > profile.svg
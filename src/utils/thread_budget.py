@@ -0,0 +1,186 @@
+"""
+thread_budget.py
+----------------
+One thread budget for every native thread pool in a process.
+
+XGBoost, scikit-learn ensembles (n_jobs), OpenMP and the BLAS behind NumPy each
+size their own thread pool to the machine's core count. With several Flask
+workers, or parallel cross-validation jobs, every process does that at once and
+the host ends up with cores x processes busy threads, which is slower than
+running each process single-threaded.
+
+The budget is cores // workers threads per process:
+
+- cores:   CPUs this process may use (affinity mask and cgroup CPU quota), or
+           THREAD_BUDGET_CORES
+- workers: processes sharing those cores, from THREAD_BUDGET_WORKERS or
+           WEB_CONCURRENCY (gunicorn); 1 for training and batch prediction
+
+apply_thread_budget sets the OMP/BLAS environment variables (for pools not
+started yet and for child processes) and threadpoolctl limits (for libraries
+already loaded). set_estimator_threads applies the same budget to a fitted
+model's own n_jobs. Run this module to benchmark throughput against thread
+settings.
+"""
+
+import os
+import sys
+import time
+import argparse
+from dataclasses import dataclass
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:   # environment variables alone still cover pools started later
+    threadpool_limits = None
+
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+]
+
+# Applied budget of this process (None until apply_thread_budget runs)
+_applied_threads = None
+
+
+def available_cores():
+    """CPUs usable by this process: affinity mask, capped by a cgroup v2 CPU quota."""
+    if os.getenv("THREAD_BUDGET_CORES"):
+        return max(1, int(os.environ["THREAD_BUDGET_CORES"]))
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file_obj:
+            quota, period = file_obj.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+@dataclass
+class ThreadBudgetConfig:
+    cores: int = None     # None = available_cores()
+    workers: int = None   # None = THREAD_BUDGET_WORKERS / WEB_CONCURRENCY / 1
+
+    @property
+    def threads(self):
+        cores = self.cores or available_cores()
+        workers = self.workers or int(os.getenv("THREAD_BUDGET_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+        return max(1, cores // max(1, workers))
+
+
+def apply_thread_budget(config=None, role="process"):
+    """
+    Limit every native thread pool of this process to the budget.
+
+    Returns:
+        int: Threads per pool.
+    """
+    global _applied_threads
+    try:
+        threads = (config or ThreadBudgetConfig()).threads
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(threads)
+        if threadpool_limits is not None:
+            threadpool_limits(limits=threads)
+
+        if _applied_threads != threads:
+            logging.info(f"Thread budget for {role}: {threads} thread(s) per pool")
+        _applied_threads = threads
+        return threads
+
+    except Exception as e:
+        logging.info("Exception occurred in apply_thread_budget")
+        raise customexception(e, sys)
+
+
+def estimator_n_jobs():
+    """n_jobs for estimators with their own pools (the applied budget, or the default one)."""
+    return _applied_threads or ThreadBudgetConfig().threads
+
+
+def set_estimator_threads(model, threads=None):
+    """Point a fitted model's own thread pool (n_jobs) at the budget; returns the model."""
+    threads = threads or estimator_n_jobs()
+    if hasattr(model, "get_params") and "n_jobs" in model.get_params(deep=False):
+        model.set_params(n_jobs=threads)
+    return model
+
+
+# ------------------ Benchmark ------------------
+def _benchmark_worker(args):
+    """Run `workload` for `seconds` under `threads` threads; returns operations completed."""
+    workload, threads, seconds, model_path, data_path = args
+    import numpy as np
+    if threadpool_limits is not None:
+        threadpool_limits(limits=threads)
+
+    if workload == "blas":
+        a = np.random.default_rng(0).random((512, 512))
+        op = lambda: a @ a
+    else:
+        import pandas as pd
+        from src.utils.utils import load_object
+        preprocessor_path = os.path.join(os.path.dirname(model_path), "preprocessor.pkl")
+        model = set_estimator_threads(load_object(model_path), threads)
+        X = load_object(preprocessor_path).transform(pd.read_csv(data_path).head(1000 if workload == "batch" else 1))
+        op = lambda: model.predict(X)
+
+    op()   # warm-up
+    done, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        op()
+        done += 1
+    return done
+
+
+def benchmark(workload="batch", seconds=2.0, model_path=None, data_path=None, cores=None):
+    """
+    Throughput for every (workers, threads per worker) combination up to `cores`.
+
+    Returns:
+        list[dict]: workers, threads, total threads, operations per second.
+    """
+    import multiprocessing
+
+    cores = cores or available_cores()
+    worker_counts = sorted({1, max(1, cores // 2), cores})
+    results = []
+    for workers in worker_counts:
+        for threads in sorted({1, max(1, cores // workers), cores}):
+            args = [(workload, threads, seconds, model_path, data_path)] * workers
+            with multiprocessing.get_context("spawn").Pool(workers) as pool:
+                done = sum(pool.map(_benchmark_worker, args))
+            results.append({
+                "workers": workers, "threads": threads, "total_threads": workers * threads,
+                "ops_per_second": done / seconds,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark throughput against thread settings.")
+    parser.add_argument("--workload", choices=["batch", "single", "blas"], default="batch",
+                        help="1000-row predict, single-row predict, or a 512x512 matmul")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--model", default=os.path.join("artifacts", "model.pkl"))
+    parser.add_argument("--data", default=os.path.join("artifacts", "test.csv"))
+    parser.add_argument("--cores", type=int, default=None)
+    args = parser.parse_args()
+
+    cores = args.cores or available_cores()
+    print(f"{args.workload}: {cores} core(s), budget {ThreadBudgetConfig(cores=cores).threads} thread(s) per process")
+    print(f"{'workers':>8}{'threads':>9}{'total':>7}{'ops/s':>12}")
+    for row in benchmark(args.workload, args.seconds, args.model, args.data, cores):
+        print(f"{row['workers']:>8}{row['threads']:>9}{row['total_threads']:>7}{row['ops_per_second']:>12.1f}")
+
+
+# Commands
+# python -m src.utils.thread_budget --workload batch
+# THREAD_BUDGET_WORKERS=4 python app.py
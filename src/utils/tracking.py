@@ -0,0 +1,125 @@
+"""
+tracking.py
+-----------
+MLflow tracking helpers that keep experiment logging off the training critical path.
+
+It includes:
+1. log_run: writes one evaluation run (metrics batched into a single call, the
+   already-pickled model uploaded as an artifact instead of being re-serialized).
+2. BackgroundTracker: runs tracking writes on a worker thread, with flush() to
+   wait for pending writes and an atexit hook so nothing is lost on exit.
+"""
+
+import sys
+import time
+import queue
+import atexit
+import threading
+from urllib.parse import urlparse
+
+import mlflow
+import mlflow.sklearn
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+
+from src.logger.logging_config import logging
+from src.exception.exception import customexception
+
+
+def log_run(metrics, model_path, model=None, params=None, artifact_paths=None,
+            experiment_name="Default", registered_model_name="ml_model"):
+    """
+    Log one evaluation run to MLflow.
+
+    Args:
+        metrics (dict): Metric name -> value, sent in a single log_batch call.
+        model_path (str): Pickled model written by ModelTrainer, logged as-is.
+        model (object): Fitted model, only needed to register it (non-file stores).
+        params (dict): Optional run params.
+        artifact_paths (list): Extra files (e.g. the model report) logged with the run.
+        experiment_name (str): MLflow experiment to log into.
+        registered_model_name (str): Registry name used on non-file stores.
+
+    Returns:
+        str: The MLflow run id.
+    """
+    try:
+        client = MlflowClient()
+        experiment = client.get_experiment_by_name(experiment_name)
+        experiment_id = experiment.experiment_id if experiment else client.create_experiment(experiment_name)
+
+        run_id = client.create_run(experiment_id).info.run_id
+        timestamp = int(time.time() * 1000)
+
+        client.log_batch(
+            run_id,
+            metrics=[Metric(key, float(value), timestamp, 0) for key, value in metrics.items()],
+            params=[Param(key, str(value)) for key, value in (params or {}).items()],
+        )
+
+        # Model registry does not work with file store
+        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
+        if tracking_url_type_store != "file" and model is not None:
+            # The registry needs an MLflow model (MLmodel + env files), so only this path re-serializes
+            with mlflow.start_run(run_id=run_id):
+                mlflow.sklearn.log_model(model, "model", registered_model_name=registered_model_name)
+        else:
+            client.log_artifact(run_id, model_path, artifact_path="model")
+
+        for artifact_path in artifact_paths or []:
+            client.log_artifact(run_id, artifact_path)
+
+        client.set_terminated(run_id)
+        logging.info(f"MLflow run {run_id} logged")
+        return run_id
+
+    except Exception as e:
+        logging.info("Exception occurred in log_run")
+        raise customexception(e, sys)
+
+
+class BackgroundTracker:
+    """
+    Single worker thread that executes tracking writes in submission order.
+
+    Failures are logged and never propagate to the pipeline. Pending writes are
+    flushed at interpreter exit; processes that exit via os._exit (e.g. forked
+    Airflow task runners) should call flush() themselves.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="mlflow-tracker", daemon=True)
+                self._thread.start()
+        self._queue.put((fn, args, kwargs))
+
+    def _worker(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logging.error(f"Background tracking write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted write has completed."""
+        if self._thread is not None:
+            self._queue.join()
+
+
+# Shared by every component in the process
+background_tracker = BackgroundTracker()
+
+
+def flush_tracking():
+    """Wait for all pending background tracking writes."""
+    background_tracker.flush()
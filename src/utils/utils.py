@@ -3,25 +3,35 @@
 # ===============================
 import os
 import sys
+import time
 import pickle   # For saving/loading Python objects (e.g., trained ML models)
 import numpy as np
 import pandas as pd
 from src.logger.logging_config import logging
 from src.exception.exception import customexception
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from src.utils.metrics import regression_metrics, score_in_chunks
+from src.utils.thread_budget import set_estimator_threads
+from src.utils.executors import InProcessExecutor, load_shared
 
 
 # ===============================
 # Save Object with Pickle
 # ===============================
 def save_object(file_path, obj):
-    """Save a Python object (e.g., trained model) to disk using pickle."""
+    """
+    Save a Python object (e.g., trained model) to disk using pickle.
+
+    The pickle is written to a temporary file and renamed into place, so a
+    reader never sees a half-written file.
+    """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
 
-        with open(file_path, "wb") as file_obj:
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file_obj:
             pickle.dump(obj, file_obj)
+        os.replace(tmp_path, file_path)
 
     except Exception as e:
         raise customexception(e, sys)
@@ -30,51 +40,104 @@ def save_object(file_path, obj):
 # ===============================
 # Train & Evaluate Multiple Models
 # ===============================
-def evaluate_model(X_train, y_train, X_test, y_test, models):
+REPORT_COLUMNS = [
+    "Model",
+    "Train R2", "Train MAE", "Train RMSE",
+    "Test R2", "Test MAE", "Test RMSE",
+    "Fit Seconds"
+]
+
+
+def fit_and_score(model_name, model, X_train, y_train, X_test, y_test,
+                  train_sample_size=None, seed=None, chunk_size=100_000):
+    """
+    Train one model and score it on the train and test sets.
+
+    Training metrics are optionally estimated on a random subsample of
+    `train_sample_size` rows, and are computed chunk by chunk so the full
+    training-set predictions are never held in memory.
+
+    Returns:
+        tuple: (report row as a list, test-set predictions)
+    """
+    # Train
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    # Training metrics (on a subsample when requested)
+    if train_sample_size is not None and train_sample_size < len(X_train):
+        rows = np.random.default_rng(seed).choice(len(X_train), size=train_sample_size, replace=False)
+        train_metrics = score_in_chunks(model, X_train[rows], y_train[rows], chunk_size)
+    else:
+        train_metrics = score_in_chunks(model, X_train, y_train, chunk_size)
+
+    # Testing metrics (predictions are kept so evaluation can reuse them)
+    y_test_pred = model.predict(X_test)
+    test_metrics = regression_metrics(y_test, y_test_pred)
+
+    record = [
+        model_name,
+        train_metrics["r2"], train_metrics["mae"], train_metrics["rmse"],
+        test_metrics["r2"], test_metrics["mae"], test_metrics["rmse"],
+        fit_seconds
+    ]
+    return record, y_test_pred
+
+
+def fit_and_score_job(model_name, model, data, train_sample_size=None, seed=None):
+    """
+    fit_and_score as an executor job.
+
+    `data` holds X_train, y_train, X_test and y_test as returned by an executor's
+    share() (arrays, or .npy paths that are memory-mapped). The model uses the
+    thread budget of the process it runs in.
+
+    Returns:
+        tuple: (report row, test-set predictions, fitted model)
+    """
+    X_train, y_train, X_test, y_test = (load_shared(data[name]) for name in ("X_train", "y_train", "X_test", "y_test"))
+    model = set_estimator_threads(model)
+    record, y_test_pred = fit_and_score(model_name, model, X_train, y_train, X_test, y_test,
+                                        train_sample_size=train_sample_size, seed=seed)
+    return record, y_test_pred, model
+
+
+def evaluate_model(X_train, y_train, X_test, y_test, models,
+                   train_sample_size=None, seed=None, return_predictions=False, executor=None):
     """
     Train and evaluate multiple ML models.
-    
+
+    Args:
+        train_sample_size (int): Estimate training metrics on this many sampled rows.
+        seed (int): Seed for the training-metrics subsample.
+        return_predictions (bool): Also return each model's test-set predictions.
+        executor: Where the fits run (src/utils/executors.py; in this process if None).
+            `models` is updated with the fitted estimators.
+
     Returns:
         pd.DataFrame: A table of metrics (R², MAE, RMSE) 
                       for both training and testing sets.
+        dict: Model name -> test predictions (only if `return_predictions`).
     """
     try:
         records = []
+        predictions = {}
 
-        for model_name, model in models.items():
-            # Train
-            model.fit(X_train, y_train)
-
-            # Predictions
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
-
-            # Training metrics
-            train_r2 = r2_score(y_train, y_train_pred)
-            train_mae = mean_absolute_error(y_train, y_train_pred)
-            train_rmse = np.sqrt(mean_squared_error(y_train, y_train_pred))
-
-            # Testing metrics
-            test_r2 = r2_score(y_test, y_test_pred)
-            test_mae = mean_absolute_error(y_test, y_test_pred)
-            test_rmse = np.sqrt(mean_squared_error(y_test, y_test_pred))
+        executor = executor or InProcessExecutor()
+        data = executor.share({"X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test})
+        results = executor.map(fit_and_score_job, [
+            (model_name, model, data, train_sample_size, seed) for model_name, model in models.items()
+        ])
 
-            # Collect results
-            records.append([
-                model_name,
-                train_r2, train_mae, train_rmse,
-                test_r2, test_mae, test_rmse
-            ])
+        for model_name, (record, y_test_pred, fitted_model) in zip(list(models), results):
+            records.append(record)
+            predictions[model_name] = y_test_pred
+            models[model_name] = fitted_model   # the fit may have happened in another process
 
         # Results DataFrame
-        return pd.DataFrame(
-            records,
-            columns=[
-                "Model",
-                "Train R2", "Train MAE", "Train RMSE",
-                "Test R2", "Test MAE", "Test RMSE"
-            ]
-        )
+        report = pd.DataFrame(records, columns=REPORT_COLUMNS)
+        return (report, predictions) if return_predictions else report
 
     except Exception as e:
         logging.info('Exception occurred during model evaluation')
@@ -0,0 +1,158 @@
+"""Unit tests for run coalescing, the training lease and versioned publishing (src/utils/artifact_store.py)."""
+
+import os
+import fcntl
+import threading
+
+import pytest
+
+from src.utils import artifact_store
+from src.utils.artifact_store import (
+    ArtifactStoreConfig, acquire_training_lease, current_version, lease_holder, list_versions,
+    publish_artifacts, release_training_lease, resolve_artifact, rollback, run_coalesced,
+)
+
+
+@pytest.fixture
+def config(tmp_path):
+    return ArtifactStoreConfig(
+        artifacts_dir=str(tmp_path),
+        versions_dir=str(tmp_path / "versions"),
+        pointer_file_path=str(tmp_path / "CURRENT"),
+        lock_file_path=str(tmp_path / ".training.lock"),
+        pending_file_path=str(tmp_path / ".training.pending"),
+        lease_file_path=str(tmp_path / ".training.lease"),
+        lease_poll_seconds=0.01,
+    )
+
+
+def test_run_coalesced_returns_the_result(config):
+    assert run_coalesced(lambda: 42, config) == 42
+    assert not os.path.exists(config.pending_file_path)
+
+
+def test_requests_during_a_run_cost_one_more_run(config):
+    runs = []
+
+    def train():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            # Two requests arrive while the lock is held: both are coalesced
+            assert run_coalesced(lambda: "other", config) is None
+            assert run_coalesced(lambda: "other", config) is None
+        return len(runs)
+
+    assert run_coalesced(train, config) == 2
+    assert runs == [0, 1]
+    assert not os.path.exists(config.pending_file_path)
+
+
+def test_request_retries_the_lock_after_leaving_its_marker(config, monkeypatch):
+    # The holder unlocks between the request's failed lock and its marker: the retry takes over
+    real_try_lock = artifact_store._try_lock
+    attempts = []
+
+    def try_lock(lock_file):
+        attempts.append(1)
+        return False if len(attempts) == 1 else real_try_lock(lock_file)
+
+    monkeypatch.setattr(artifact_store, "_try_lock", try_lock)
+    assert run_coalesced(lambda: "ran", config) == "ran"
+    assert not os.path.exists(config.pending_file_path)
+
+
+def test_marker_left_just_before_unlock_is_not_lost(config, monkeypatch):
+    # A request fails the lock after the holder's last marker check but before its unlock
+    real_flock = fcntl.flock
+    unlocks = []
+
+    def flock(file_obj, operation):
+        if operation == fcntl.LOCK_UN and not unlocks:
+            unlocks.append(1)
+            open(config.pending_file_path, "w").close()
+        return real_flock(file_obj, operation)
+
+    monkeypatch.setattr(fcntl, "flock", flock)
+    runs = []
+    run_coalesced(lambda: runs.append(1), config)
+    assert len(runs) == 2
+    assert not os.path.exists(config.pending_file_path)
+
+
+def test_training_lease_is_exclusive_per_owner(config):
+    assert acquire_training_lease("dag-run-1", config)
+    assert acquire_training_lease("dag-run-1", config)   # a retried task keeps its lease
+    assert not acquire_training_lease("dag-run-2", config)
+    assert lease_holder(config) == "dag-run-1"
+
+    release_training_lease("dag-run-2", config)   # not the holder: no effect
+    assert lease_holder(config) == "dag-run-1"
+    release_training_lease("dag-run-1", config)
+    assert lease_holder(config) is None
+
+
+def test_lease_is_refused_while_training_holds_the_lock(config):
+    with open(config.lock_file_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert not acquire_training_lease("dag-run-1", config)
+
+
+def test_expired_lease_is_ignored(config):
+    assert acquire_training_lease("dag-run-1", config)
+    config.lease_ttl_seconds = 0
+    assert lease_holder(config) is None
+    assert acquire_training_lease("dag-run-2", config)
+
+
+def test_run_coalesced_waits_for_a_foreign_lease(config):
+    assert acquire_training_lease("dag-run-1", config)
+    released = threading.Event()
+
+    def release():
+        released.set()
+        release_training_lease("dag-run-1", config)
+
+    threading.Timer(0.2, release).start()
+    assert run_coalesced(released.is_set, config) is True
+
+
+def test_publish_and_rollback_swap_the_pointer(config, tmp_path):
+    model_path = tmp_path / "model.pkl"
+    model_path.write_text("first")
+    first = publish_artifacts([str(model_path)], config)
+    model_path.write_text("second")
+    second = publish_artifacts([(str(model_path), "model.pkl")], config)
+
+    assert current_version(config) == second
+    with open(resolve_artifact("model.pkl", config)) as file_obj:
+        assert file_obj.read() == "second"
+
+    assert rollback(config=config) == first
+    with open(resolve_artifact("model.pkl", config)) as file_obj:
+        assert file_obj.read() == "first"
+
+
+def test_versions_sort_in_publish_order(config, tmp_path):
+    model_path = tmp_path / "model.pkl"
+    published = []
+    for i in range(8):   # several publishes within the same second
+        model_path.write_text(str(i))
+        published.append(publish_artifacts([str(model_path)], config))
+
+    config.keep_versions = 3
+    assert rollback(config=config) == published[-2]
+    publish_artifacts([str(model_path)], config)
+    assert list_versions(config)[-3:-1] == published[-2:]
+
+
+def test_files_missing_from_the_published_version_are_absent(config, tmp_path):
+    scorer_path = tmp_path / "linear_scorer.json"
+    assert resolve_artifact("linear_scorer.json", config) == str(scorer_path)   # nothing published yet
+
+    model_path = tmp_path / "model.pkl"
+    model_path.write_text("old")
+    publish_artifacts([str(model_path)], config)
+    # A later run's working copy must not leak into the published version
+    scorer_path.write_text("{}")
+    assert not os.path.exists(resolve_artifact("linear_scorer.json", config))
+    assert os.path.exists(resolve_artifact("model.pkl", config))
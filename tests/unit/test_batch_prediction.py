@@ -0,0 +1,195 @@
+"""Unit tests for checkpointed batch scoring (src/pipeline/batch_prediction.py)."""
+
+import os
+import sys
+import glob
+import time
+
+import pandas as pd
+import pytest
+
+from sklearn.dummy import DummyRegressor
+from sklearn.preprocessing import FunctionTransformer
+
+from src.exception.exception import customexception
+from src.pipeline.batch_prediction import BatchPrediction, BatchPredictionConfig
+from src.pipeline.prediction_pipeline import PredictPipeline
+from src.utils.artifact_store import publish_artifacts
+from src.utils.utils import save_object
+
+
+ROWS = 7
+
+
+class FakePredictPipeline:
+    """Prices from carat only; can be told to crash on the n-th call."""
+
+    def __init__(self, fail_on_call=None, on_call=None):
+        self.fail_on_call = fail_on_call
+        self.on_call = on_call or {}
+        self.version = None
+        self.calls = 0
+        self.rows_seen = []
+        self.versions_seen = []
+
+    def predict(self, features):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("scoring crashed")
+        if self.calls in self.on_call:
+            self.on_call[self.calls]()
+        try:
+            if (features["carat"] <= 0).any():
+                raise ValueError("carat must be positive")
+        except ValueError as e:
+            raise customexception(e, sys)
+        self.rows_seen.extend(features["id"].tolist())
+        self.versions_seen.append(self.version)
+        return features["carat"].to_numpy() * 1000.0
+
+
+def publish(version):
+    os.makedirs("artifacts", exist_ok=True)
+    with open(os.path.join("artifacts", "CURRENT"), "w") as file_obj:
+        file_obj.write(version)
+
+
+def write_input(path, rows=ROWS, carat=0.1, age_seconds=60):
+    pd.DataFrame({"id": range(rows), "carat": [carat * (i + 1) for i in range(rows)]}).to_csv(path, index=False)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    publish("v1")
+    config = BatchPredictionConfig(
+        inbox_dir=str(tmp_path / "inbox"), outbox_dir=str(tmp_path / "outbox"),
+        archive_dir=str(tmp_path / "archive"), error_dir=str(tmp_path / "error"), state_dir=str(tmp_path / "state"),
+        remote_dir=str(tmp_path / "remote"), chunk_size=2, settle_seconds=0,
+    )
+    batch = BatchPrediction(config)
+    write_input(os.path.join(config.inbox_dir, "stones.csv"))
+    return batch
+
+
+def crash_on_second_chunk(batch):
+    batch.predict_pipeline = FakePredictPipeline(fail_on_call=2)
+    with pytest.raises(customexception):
+        batch.run_once()
+    (_, md5), = batch.pending_files()
+    return md5
+
+
+def read_output(entry):
+    return pd.read_csv(entry["output"])
+
+
+def test_crash_leaves_a_checkpoint_and_resume_scores_each_row_once(batch):
+    md5 = crash_on_second_chunk(batch)
+    checkpoint = batch.read_checkpoint(md5)
+    assert checkpoint["rows_done"] == 2 and checkpoint["model_version"] == "v1"
+
+    # Bytes written after the checkpoint (a half-flushed chunk) are cut away on resume
+    part_path, = glob.glob(os.path.join(batch.batch_config.outbox_dir, "stones_*_predictions.csv.part"))
+    assert os.path.getsize(part_path) == checkpoint["part_bytes"]
+    with open(part_path, "a") as part_file:
+        part_file.write("5,0.6,garbage\n")
+
+    batch.predict_pipeline = FakePredictPipeline()
+    entry, = batch.run_once()
+    assert batch.predict_pipeline.rows_seen == list(range(2, ROWS))
+
+    output = read_output(entry)
+    assert output["id"].tolist() == list(range(ROWS))
+    assert output["predicted_price"].tolist() == pytest.approx(output["carat"] * 1000.0)
+    assert entry["rows"] == ROWS and entry["model_version"] == "v1"
+    assert batch.read_checkpoint(md5) is None
+    assert not os.path.exists(part_path)
+    assert os.listdir(batch.batch_config.inbox_dir) == []
+
+
+def test_a_new_model_restarts_the_file_from_scratch(batch):
+    crash_on_second_chunk(batch)
+    publish("v2")
+
+    batch.predict_pipeline = FakePredictPipeline()
+    entry, = batch.run_once()
+    assert batch.predict_pipeline.rows_seen == list(range(ROWS))
+    assert read_output(entry)["id"].tolist() == list(range(ROWS))
+    assert entry["model_version"] == "v2"
+
+
+def test_reuploaded_content_is_archived_without_rescoring(batch):
+    batch.predict_pipeline = FakePredictPipeline()
+    first, = batch.run_once()
+
+    inbox_path = os.path.join(batch.batch_config.inbox_dir, "stones_again.csv")
+    write_input(inbox_path)
+    batch.predict_pipeline = FakePredictPipeline()
+    assert batch.run_once() == []
+    assert batch.predict_pipeline.calls == 0
+    assert not os.path.exists(inbox_path)
+
+    manifest = batch.read_manifest()
+    assert len(manifest) == 1 and next(iter(manifest.values()))["file"] == first["file"]
+    archived = os.listdir(os.path.dirname(first["archive"]))
+    assert sorted(archived) == ["stones.csv", "stones_again.csv"]
+
+
+def test_same_named_uploads_keep_separate_outputs(batch):
+    batch.predict_pipeline = FakePredictPipeline()
+    first, = batch.run_once()
+    write_input(os.path.join(batch.batch_config.inbox_dir, "stones.csv"), rows=3)
+    second, = batch.run_once()
+
+    assert first["output"] != second["output"]
+    assert len(read_output(first)) == ROWS and len(read_output(second)) == 3
+
+
+def test_an_invalid_file_is_rejected_without_blocking_later_files(batch):
+    # Oldest first: the invalid file is picked up before the valid one
+    write_input(os.path.join(batch.batch_config.inbox_dir, "bad.csv"), carat=-0.1, age_seconds=120)
+    batch.predict_pipeline = FakePredictPipeline()
+    entry, = batch.run_once()
+    assert entry["file"] == "stones.csv"
+
+    error_dir, = glob.glob(os.path.join(batch.batch_config.error_dir, "*"))
+    assert sorted(os.listdir(error_dir)) == ["bad.csv", "bad.csv.error.json"]
+    with open(os.path.join(error_dir, "bad.csv.error.json")) as file_obj:
+        assert "carat must be positive" in file_obj.read()
+    assert os.listdir(batch.batch_config.inbox_dir) == []
+    assert os.listdir(batch.batch_config.checkpoint_dir) == []
+
+
+def test_a_crash_is_raised_after_the_other_files_are_scored(batch):
+    write_input(os.path.join(batch.batch_config.inbox_dir, "older.csv"), age_seconds=120)
+    batch.predict_pipeline = FakePredictPipeline(fail_on_call=1)
+    with pytest.raises(customexception):
+        batch.run_once()
+    # older.csv stays for a retry; stones.csv was scored
+    assert os.listdir(batch.batch_config.inbox_dir) == ["older.csv"]
+    assert [entry["file"] for entry in batch.read_manifest().values()] == ["stones.csv"]
+
+
+def test_a_model_published_mid_file_does_not_score_its_later_chunks(batch):
+    batch.predict_pipeline = FakePredictPipeline(on_call={2: lambda: publish("v2")})
+    entry, = batch.run_once()
+    assert batch.predict_pipeline.versions_seen == ["v1"] * 4
+    assert entry["model_version"] == "v1"
+
+
+def test_a_pinned_pipeline_keeps_its_version(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("artifacts")
+    paths = [os.path.join("artifacts", name) for name in ("preprocessor.pkl", "model.pkl")]
+    save_object(paths[0], FunctionTransformer().fit(pd.DataFrame({"carat": [1.0]})))
+    versions = []
+    for price in (100.0, 200.0):
+        save_object(paths[1], DummyRegressor(strategy="constant", constant=price).fit([[0]], [0]))
+        versions.append(publish_artifacts(paths))
+
+    features = pd.DataFrame({"carat": [0.5, 1.5]})
+    assert PredictPipeline().predict(features).tolist() == [200.0, 200.0]
+    assert PredictPipeline(version=versions[0]).predict(features).tolist() == [100.0, 100.0]
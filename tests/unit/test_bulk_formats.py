@@ -0,0 +1,90 @@
+"""Unit tests for the bulk payload formats (src/utils/bulk_formats.py) and their negotiation in app.py."""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from src.exception.exception import customexception
+from src.utils.bulk_formats import (
+    FEATURE_COLUMNS, JSON_MIMETYPE, NPY_MIMETYPE, UnsupportedFormatError, decode_features, decode_predictions,
+    encode_features, encode_predictions, supported_mimetypes,
+)
+
+
+@pytest.fixture
+def features():
+    return pd.DataFrame({
+        "carat": [0.3, 1.2], "depth": [61.0, 62.4], "table": [55.0, 58.0],
+        "x": [4.3, 6.8], "y": [4.3, 6.9], "z": [2.6, 4.3],
+        "cut": ["Ideal", "Premium"], "color": ["E", "J"], "clarity": ["VS1", "SI2"],
+    })
+
+
+@pytest.mark.parametrize("mimetype", supported_mimetypes())
+def test_features_and_predictions_round_trip(features, mimetype):
+    decoded = decode_features(encode_features(features, mimetype), mimetype)
+    pd.testing.assert_frame_equal(decoded, features[FEATURE_COLUMNS], check_dtype=False)
+
+    predictions = np.array([512.5, 6012.25])
+    np.testing.assert_array_equal(decode_predictions(encode_predictions(predictions, mimetype), mimetype), predictions)
+
+
+def test_json_accepts_records_and_ignores_content_type_parameters(features):
+    body = features.to_json(orient="records").encode()
+    decoded = decode_features(body, "application/json; charset=utf-8")
+    pd.testing.assert_frame_equal(decoded, features[FEATURE_COLUMNS], check_dtype=False)
+
+
+def test_unsupported_and_incomplete_payloads_are_rejected(features):
+    with pytest.raises(UnsupportedFormatError):
+        decode_features(b"carat\n0.3", "text/csv")
+    with pytest.raises(ValueError, match="Missing feature columns"):
+        decode_features(encode_features(features.drop(columns=["cut"]), JSON_MIMETYPE), JSON_MIMETYPE)
+
+
+class FakePredictPipeline:
+    """Prices from carat only; an unknown cut fails the way the preprocessor does."""
+
+    def predict(self, features):
+        try:
+            if not features["cut"].isin(["Ideal", "Premium"]).all():
+                raise ValueError("Found unknown categories in column cut")
+        except ValueError as e:
+            raise customexception(e, sys)
+        return features["carat"].to_numpy() * 1000.0
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, "PredictPipeline", FakePredictPipeline)
+    return app_module.app.test_client()
+
+
+def test_response_format_follows_accept(client, features):
+    body = encode_features(features, NPY_MIMETYPE)
+
+    response = client.post("/predict/bulk", data=body, content_type=NPY_MIMETYPE)
+    assert response.status_code == 200 and response.mimetype == JSON_MIMETYPE
+    np.testing.assert_array_equal(decode_predictions(response.data, JSON_MIMETYPE), [300.0, 1200.0])
+
+    response = client.post("/predict/bulk", data=body, content_type=NPY_MIMETYPE, headers={"Accept": NPY_MIMETYPE})
+    assert response.status_code == 200 and response.mimetype == NPY_MIMETYPE
+    np.testing.assert_array_equal(decode_predictions(response.data, NPY_MIMETYPE), [300.0, 1200.0])
+
+
+def test_negotiation_errors(client, features):
+    body = encode_features(features, JSON_MIMETYPE)
+    assert client.post("/predict/bulk", data=b"carat\n0.3", content_type="text/csv").status_code == 415
+    assert client.post("/predict/bulk", data=body, content_type=JSON_MIMETYPE,
+                       headers={"Accept": "text/csv"}).status_code == 406
+    assert client.post("/predict/bulk", data=b"{not json", content_type=JSON_MIMETYPE).status_code == 400
+
+
+def test_invalid_category_is_a_client_error(client, features):
+    features.loc[0, "cut"] = "Flawless"
+    response = client.post("/predict/bulk", data=encode_features(features, JSON_MIMETYPE), content_type=JSON_MIMETYPE)
+    assert response.status_code == 400
+    assert "unknown categories" in response.get_json()["error"]
@@ -0,0 +1,116 @@
+"""Unit tests for the drift sketch and the merging of worker snapshots (src/components/drift_monitor.py)."""
+
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.drift_monitor import (
+    OTHER_CATEGORY, DriftMonitor, DriftMonitorConfig, build_drift_baseline, read_drift_states,
+)
+
+
+@pytest.fixture
+def training_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "carat": rng.gamma(2.0, 0.4, size=1000),
+        "cut": rng.choice(["Ideal", "Premium", "Good"], size=1000),
+    })
+
+
+@pytest.fixture
+def config(tmp_path):
+    return DriftMonitorConfig(state_dir=str(tmp_path / "drift"), snapshot_every=10**9, vectorize_min_rows=32)
+
+
+@pytest.fixture
+def baseline(training_df):
+    return build_drift_baseline(training_df, ["carat"], ["cut"], n_bins=5)
+
+
+def served(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "carat": rng.gamma(2.0, 0.4, size=n),
+        "cut": rng.choice(["Ideal", "Premium", "Good", "Fair"], size=n).astype(object),   # Fair is unseen
+    })
+    df.loc[df.index[::7], "carat"] = np.nan
+    df.loc[df.index[::11], "cut"] = None
+    return df
+
+
+def expected_counts(baseline, df):
+    edges = np.asarray(baseline["numerical"]["carat"]["edges"])
+    carat = df["carat"].dropna().to_numpy()
+    categories = baseline["categorical"]["cut"]["categories"]
+    cut = [value if value in categories else OTHER_CATEGORY for value in df["cut"]]
+    return {
+        "carat": np.bincount(np.searchsorted(edges, carat, side="right"), minlength=len(edges) + 1).tolist(),
+        "cut": [cut.count(category) for category in categories],
+    }
+
+
+def test_small_and_large_batches_count_the_same(baseline, config):
+    df = served(200, seed=1)
+    one_pass, row_by_row = DriftMonitor(baseline, config), DriftMonitor(baseline, config)
+    one_pass.update(df)   # vectorized path
+    for start in range(0, len(df), 5):   # dict-lookup path
+        row_by_row.update(df.iloc[start:start + 5])
+
+    expected = expected_counts(baseline, df)
+    for monitor in (one_pass, row_by_row):
+        assert monitor.n_observed == len(df)
+        assert {col: counts.tolist() for col, counts in monitor.counts.items()} == expected
+
+
+def test_served_like_training_does_not_drift_and_shifted_data_does(baseline, config, training_df):
+    monitor = DriftMonitor(baseline, config)
+    monitor.update(training_df)
+    assert not monitor.drift_scores()["drift_detected"]
+
+    monitor.reset()
+    monitor.update(training_df.assign(carat=training_df["carat"] * 3))
+    assert monitor.drift_scores()["drifted_features"] == ["carat"]
+
+
+def test_snapshots_are_written_every_n_updates(baseline, config):
+    config.snapshot_every = 2
+    monitor = DriftMonitor(baseline, config)
+    monitor.update(served(10, seed=2))
+    assert not os.path.exists(monitor.state_file_path())
+    monitor.update(served(10, seed=3))
+    with open(monitor.state_file_path()) as file_obj:
+        assert json.load(file_obj)["n_observed"] == 20
+
+
+def write_state(config, name, host, pid, age_seconds=0):
+    os.makedirs(config.state_dir, exist_ok=True)
+    path = os.path.join(config.state_dir, f"state_{name}.json")
+    with open(path, "w") as file_obj:
+        json.dump({"baseline_id": "b", "host": host, "pid": pid, "n_observed": 1, "counts": {}}, file_obj)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_read_drift_states_drops_exited_and_expired_workers(config):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    host = socket.gethostname()
+
+    live = write_state(config, "live", host, os.getpid())
+    dead = write_state(config, "dead", host, exited.pid)
+    expired = write_state(config, "expired", host, os.getpid(), age_seconds=config.state_ttl_seconds + 60)
+    remote = write_state(config, "remote", "another-host", exited.pid)   # its pid cannot be checked from here
+
+    states = read_drift_states(config)
+    assert sorted(state["host"] for state in states) == sorted([host, "another-host"])
+    assert os.path.exists(live) and os.path.exists(remote)
+    assert not os.path.exists(dead) and not os.path.exists(expired)
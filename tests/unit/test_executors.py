@@ -0,0 +1,92 @@
+"""Unit tests for the tournament executors (src/utils/executors.py)."""
+
+import os
+import operator
+
+import numpy as np
+import pytest
+
+from src.components.model_trainer import ModelTrainer
+from src.config.run_config import RunConfig
+from src.utils.executors import ExecutorConfig, get_executor, load_shared
+from src.utils.utils import evaluate_model
+
+
+JOBS = [(2, 3), (4, 5), (6, 7)]
+
+
+@pytest.fixture
+def shared_dir(tmp_path):
+    return str(tmp_path / "shared")
+
+
+@pytest.mark.parametrize("backend", ["in_process", "process_pool"])
+def test_map_returns_results_in_submission_order(backend, shared_dir):
+    with get_executor(ExecutorConfig(backend=backend, workers=2, shared_dir=shared_dir)) as executor:
+        assert executor.map(operator.mul, JOBS) == [6, 20, 42]
+
+
+def test_every_backend_trains_the_same_tournament(shared_dir):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    y = X @ np.array([3.0, -1.0, 0.5, 0.0, 2.0]) + rng.normal(0.0, 0.1, size=400)
+    X_train, X_test, y_train, y_test = X[:300], X[300:], y[:300], y[300:]
+
+    results = {}
+    for backend in ("in_process", "process_pool", "cluster"):
+        config = ExecutorConfig(backend=backend, workers=2, shared_dir=shared_dir, connect_timeout_seconds=60)
+        with get_executor(config) as executor:
+            report, predictions = evaluate_model(
+                X_train, y_train, X_test, y_test, ModelTrainer(RunConfig()).get_models(),
+                seed=42, return_predictions=True, executor=executor,
+            )
+        results[backend] = (report, predictions)
+
+    report, predictions = results.pop("in_process")
+    for backend, (other_report, other_predictions) in results.items():
+        assert list(other_predictions) == list(predictions), backend
+        for model_name in predictions:
+            np.testing.assert_array_equal(other_predictions[model_name], predictions[model_name], err_msg=backend)
+        assert other_report["Test R2"].tolist() == report["Test R2"].tolist(), backend
+
+
+def test_shared_arrays_round_trip_and_are_removed_on_close(shared_dir):
+    X = np.arange(12, dtype=np.float64).reshape(4, 3)
+    with get_executor(ExecutorConfig(backend="process_pool", workers=1, shared_dir=shared_dir)) as executor:
+        shared = executor.share({"X": X})
+        assert isinstance(shared["X"], str)
+        np.testing.assert_array_equal(load_shared(shared["X"]), X)
+    assert os.listdir(shared_dir) == []
+
+
+def test_cluster_runs_jobs_on_local_workers_and_reports_job_errors(shared_dir):
+    config = ExecutorConfig(backend="cluster", workers=1, shared_dir=shared_dir, connect_timeout_seconds=60)
+    with get_executor(config) as executor:
+        assert executor.map(operator.mul, JOBS) == [6, 20, 42]
+        with pytest.raises(RuntimeError, match="ZeroDivisionError"):
+            executor.map(operator.truediv, [(1, 0)])
+        # The coordinator keeps serving after a failed job
+        assert executor.map(operator.add, [(1, 2)]) == [3]
+
+
+def test_cluster_fails_when_no_worker_connects(shared_dir):
+    config = ExecutorConfig(backend="cluster", workers=0, shared_dir=shared_dir, connect_timeout_seconds=1)
+    with get_executor(config) as executor:
+        with pytest.raises(RuntimeError, match="No executor worker connected"):
+            executor.map(operator.mul, JOBS)
+
+
+def test_cluster_fails_when_every_local_worker_exited(shared_dir):
+    config = ExecutorConfig(backend="cluster", workers=1, shared_dir=shared_dir, connect_timeout_seconds=60)
+    with get_executor(config) as executor:
+        for process in executor.local_workers:
+            process.kill()
+            process.wait()
+        with pytest.raises(RuntimeError, match="Every local executor worker exited"):
+            executor.map(operator.mul, JOBS)
+
+
+def test_cluster_needs_an_authkey_for_remote_workers(shared_dir, monkeypatch):
+    monkeypatch.delenv("EXECUTOR_AUTHKEY", raising=False)
+    with pytest.raises(ValueError, match="EXECUTOR_AUTHKEY"):
+        get_executor(ExecutorConfig(backend="cluster", address="0.0.0.0:0", shared_dir=shared_dir))
@@ -0,0 +1,87 @@
+"""Unit tests for the linear combination-table scorer (src/components/linear_scorer.py)."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import ElasticNet, LinearRegression, Ridge
+
+from src.components.data_transformation import (
+    CATEGORICAL_COLS, CLARITY_CATEGORIES, COLOR_CATEGORIES, CUT_CATEGORIES, DataTransformation,
+)
+from src.components.linear_scorer import LinearScorer, LinearScorerExport, read_linear_scorer
+from src.utils.utils import save_object
+
+
+def make_stones(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.normal(loc, scale, n) for col, loc, scale in [
+        ("carat", 0.8, 0.4), ("depth", 61.5, 1.4), ("table", 57.5, 2.2),
+        ("x", 5.7, 1.1), ("y", 5.7, 1.1), ("z", 3.5, 0.7),
+    ]})
+    for col, categories in zip(CATEGORICAL_COLS, [CUT_CATEGORIES, COLOR_CATEGORIES, CLARITY_CATEGORIES]):
+        df[col] = rng.choice(categories, n)
+    df["price"] = 4000 * df["carat"] + 300 * df["cut"].map(CUT_CATEGORIES.index) + rng.normal(0, 200, n)
+    return df
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    train = make_stones(2000, seed=0)
+    preprocessor = DataTransformation().get_data_transformation()
+    X = preprocessor.fit_transform(train.drop(columns=["price"]))
+    return preprocessor, X, train["price"].to_numpy()
+
+
+@pytest.mark.parametrize("model", [LinearRegression(), Ridge(alpha=2.0), ElasticNet(alpha=0.1)])
+def test_table_matches_the_model(fitted, model):
+    preprocessor, X, y = fitted
+    model.fit(X, y)
+    features = make_stones(500, seed=1).drop(columns=["price"])
+
+    scorer = LinearScorer.from_model(preprocessor, model)
+    expected = model.predict(preprocessor.transform(features))
+    np.testing.assert_allclose(scorer.predict(features), expected, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(scorer.predict(features.head(1)), expected[:1], rtol=0, atol=1e-6)
+
+
+def test_round_trip_and_imputation(fitted):
+    preprocessor, X, y = fitted
+    model = Ridge().fit(X, y)
+    scorer = LinearScorer.from_dict(json.loads(json.dumps(LinearScorer.from_model(preprocessor, model).to_dict())))
+
+    features = make_stones(20, seed=2).drop(columns=["price"])
+    features.loc[features.index[:5], "carat"] = np.nan
+    features.loc[features.index[5:10], "color"] = np.nan
+    expected = model.predict(preprocessor.transform(features))
+    np.testing.assert_allclose(scorer.predict(features), expected, rtol=0, atol=1e-6)
+
+
+def test_unknown_category_is_rejected(fitted):
+    preprocessor, X, y = fitted
+    scorer = LinearScorer.from_model(preprocessor, LinearRegression().fit(X, y))
+    features = make_stones(3, seed=3).drop(columns=["price"])
+    features.loc[features.index[1], "cut"] = "Flawless"
+    with pytest.raises(ValueError, match="Flawless"):
+        scorer.predict(features)
+
+
+@pytest.mark.parametrize("model, enabled", [(Ridge(), True), (RandomForestRegressor(n_estimators=5), False)])
+def test_export_is_only_enabled_for_linear_models(fitted, tmp_path, model, enabled):
+    preprocessor, X, y = fitted
+    model.fit(X, y)
+    test_path, preprocessor_path, model_path = (str(tmp_path / name) for name in ("test.csv", "pre.pkl", "m.pkl"))
+    make_stones(200, seed=4).assign(id=range(200)).to_csv(test_path, index=False)
+    save_object(preprocessor_path, preprocessor)
+    save_object(model_path, model)
+
+    export = LinearScorerExport()
+    export.linear_scorer_config.scorer_file_path = str(tmp_path / "linear_scorer.json")
+    report = export.initiate_export(test_path, preprocessor_path, model_path)
+
+    assert report["enabled"] is enabled
+    assert (read_linear_scorer(export.linear_scorer_config.scorer_file_path) is not None) is enabled
+    if enabled:
+        assert report["max_price_error"] <= report["parity_tolerance"]
@@ -0,0 +1,60 @@
+"""Unit tests for the regression metrics engine (src/utils/metrics.py)."""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from src.utils.metrics import StreamingRegressionMetrics, regression_metrics, score_in_chunks
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    actual = rng.gamma(2.0, 2000.0, size=10_001)
+    pred = actual + rng.normal(0.0, 300.0, size=actual.size)
+    return actual, pred
+
+
+def assert_metrics_close(metrics, actual, pred, rtol=1e-9):
+    assert metrics["r2"] == pytest.approx(r2_score(actual, pred), rel=rtol)
+    assert metrics["mae"] == pytest.approx(mean_absolute_error(actual, pred), rel=rtol)
+    assert metrics["rmse"] == pytest.approx(np.sqrt(mean_squared_error(actual, pred)), rel=rtol)
+
+
+def test_regression_metrics_match_sklearn(data):
+    assert_metrics_close(regression_metrics(*data), *data)
+
+
+@pytest.mark.parametrize("bounds", [[10_001], [1, 5000, 5000, 10_001], [0, 3, 3, 9000, 10_001]])
+def test_streaming_chunks_merge_to_the_full_set_metrics(data, bounds):
+    actual, pred = data
+    metrics = StreamingRegressionMetrics()
+    start = 0
+    for stop in bounds:   # includes empty chunks
+        metrics.update(actual[start:stop], pred[start:stop])
+        start = stop
+    assert metrics.n == actual.size
+    assert_metrics_close(metrics.result(), actual, pred)
+
+
+def test_streaming_variance_stays_accurate_for_large_prices(data):
+    # sum(y^2) - n * mean^2 would lose most digits at this offset
+    actual, pred = data[0] + 1e9, data[1] + 1e9
+    metrics = StreamingRegressionMetrics()
+    for start in range(0, actual.size, 997):
+        metrics.update(actual[start:start + 997], pred[start:start + 997])
+    assert_metrics_close(metrics.result(), actual, pred, rtol=1e-6)
+
+
+def test_streaming_metrics_need_samples():
+    with pytest.raises(ValueError):
+        StreamingRegressionMetrics().update([], []).result()
+
+
+def test_score_in_chunks_matches_a_full_predict():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(1000, 3))
+    y = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(0.0, 0.1, size=1000)
+    model = LinearRegression().fit(X, y)
+    assert_metrics_close(score_in_chunks(model, X, y, chunk_size=128), y, model.predict(X))
@@ -0,0 +1,47 @@
+"""Unit tests for replaying captured requests (src/pipeline/replay.py)."""
+
+import os
+import json
+
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyRegressor
+
+from src.components.drift_monitor import build_drift_baseline
+from src.pipeline.prediction_pipeline import PredictPipeline, get_drift_monitor
+from src.pipeline.replay import replay
+from src.utils.artifact_store import publish_artifacts
+from src.utils.request_capture import RequestCaptureConfig, RequestCaptureWriter
+from src.utils.utils import save_object
+
+
+@pytest.fixture
+def features(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    features = pd.DataFrame({"carat": [0.3, 0.7, 1.1, 1.5], "cut": ["Ideal", "Good", "Ideal", "Premium"]})
+
+    os.makedirs("artifacts")
+    paths = [os.path.join("artifacts", name) for name in ("preprocessor.pkl", "model.pkl", "drift_baseline.json")]
+    save_object(paths[0], ColumnTransformer([("num", "passthrough", ["carat"])]).fit(features))
+    save_object(paths[1], DummyRegressor(strategy="constant", constant=500.0).fit([[0]], [0]))
+    with open(paths[2], "w") as file_obj:
+        json.dump(build_drift_baseline(features, ["carat"], ["cut"], n_bins=2), file_obj)
+    publish_artifacts(paths)
+    return features
+
+
+def test_replay_matches_the_capture_and_stays_out_of_the_drift_sketch(features, tmp_path):
+    PredictPipeline().predict(features)
+    monitor = get_drift_monitor()
+    assert monitor.n_observed == len(features)
+
+    capture_dir = str(tmp_path / "capture")
+    writer = RequestCaptureWriter(RequestCaptureConfig(sample_rate=1.0, capture_dir=capture_dir))
+    writer.capture(features, [500.0] * len(features))
+    writer.flush()
+
+    summary = replay(capture_dir, batch_size=2)
+    assert summary["rows"] == len(features) and summary["requests"] == 2
+    assert summary["mismatches"] == 0
+    assert get_drift_monitor() is monitor and monitor.n_observed == len(features)
@@ -0,0 +1,76 @@
+"""Unit tests for request capture rotation and pruning (src/utils/request_capture.py)."""
+
+import os
+import sys
+import gzip
+import glob
+import time
+import subprocess
+
+import pandas as pd
+import pytest
+
+from src.utils.request_capture import (
+    RequestCaptureConfig, RequestCaptureWriter, capture_file_pid, read_captured_requests,
+)
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Every batch fills a file, so each flush rotates
+    return RequestCaptureConfig(sample_rate=1.0, capture_dir=str(tmp_path / "capture"), max_file_bytes=1,
+                                flush_interval=0.05)
+
+
+def capture_batches(writer, n_batches):
+    for i in range(n_batches):
+        writer.capture(pd.DataFrame({"carat": [i + 0.1, i + 0.2], "cut": ["Ideal", "Good"]}), [float(i), float(i)])
+        writer.flush()
+
+
+def capture_files(config):
+    return glob.glob(os.path.join(config.capture_dir, "capture-*.jsonl.gz"))
+
+
+def write_foreign_file(config, pid, age_seconds):
+    os.makedirs(config.capture_dir, exist_ok=True)
+    path = os.path.join(config.capture_dir, f"capture-20250101-000000-{pid}-000001.jsonl.gz")
+    with gzip.open(path, "wt") as file_obj:
+        file_obj.write('{"columns":["carat"]}\n')
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_rotated_files_within_one_second_get_unique_names(config):
+    writer = RequestCaptureWriter(config)
+    capture_batches(writer, 4)   # well within one second
+
+    files = capture_files(config)
+    assert len(files) == 4
+    assert {capture_file_pid(path) for path in files} == {os.getpid()}
+
+    rows = list(read_captured_requests(config.capture_dir))
+    assert [prediction for _, _, prediction in rows] == [0.0, 0.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0]
+    assert rows[0][1] == {"carat": 0.1, "cut": "Ideal"}
+
+
+def test_pruning_keeps_the_newest_files_and_those_of_live_writers(config):
+    config.max_files = 3
+    live_writer = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    exited_writer = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited_writer.wait()
+    try:
+        live_file = write_foreign_file(config, live_writer.pid, age_seconds=600)
+        dead_file = write_foreign_file(config, exited_writer.pid, age_seconds=500)
+
+        capture_batches(RequestCaptureWriter(config), 5)
+
+        files = capture_files(config)
+        assert live_file in files and dead_file not in files
+        # The oldest own files went instead of the live writer's; the newest max_files remain
+        own_sequences = sorted(path[-15:-9] for path in files if capture_file_pid(path) == os.getpid())
+        assert own_sequences == ["000003", "000004", "000005"]
+    finally:
+        live_writer.kill()
+        live_writer.wait()
@@ -0,0 +1,98 @@
+"""Unit tests for the retrain trigger (src/components/retrain_trigger.py)."""
+
+import os
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.drift_monitor import DriftMonitor, DriftMonitorConfig, build_drift_baseline
+from src.components.retrain_trigger import RetrainTrigger, RetrainTriggerConfig
+
+
+HEADER = "id,carat,cut\n"
+
+
+def write_source(path, rows, age_seconds=3600):
+    """Write `rows` data lines and backdate the file so it counts as settled."""
+    with open(path, "w") as file_obj:
+        file_obj.write(HEADER + "".join(f"{i},{0.5 + i / 100},Ideal\n" for i in range(rows)))
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def source_path(tmp_path):
+    path = str(tmp_path / "train.csv")
+    write_source(path, 10)
+    return path
+
+
+@pytest.fixture
+def drift_config(tmp_path):
+    return DriftMonitorConfig(
+        baseline_file_path=str(tmp_path / "drift_baseline.json"), state_dir=str(tmp_path / "drift"),
+        snapshot_every=10**9,
+    )
+
+
+@pytest.fixture
+def trigger(tmp_path, source_path, drift_config):
+    config = RetrainTriggerConfig(
+        source_data_path=source_path, state_file_path=str(tmp_path / "retrain_trigger.json"),
+        debounce_seconds=60, drift_min_observations=100, drift_cooldown_seconds=3600,
+    )
+    return RetrainTrigger(config, drift_config)
+
+
+def test_first_check_retrains_and_unchanged_source_does_not(trigger):
+    decision = trigger.check()
+    assert decision["retrain"] and not decision["drift"]
+
+    trigger.mark_trained(decision["observation"])
+    assert not trigger.check()["retrain"]
+
+
+def test_appended_rows_retrain_once_settled(trigger, source_path):
+    trigger.mark_trained(trigger.check()["observation"])
+
+    write_source(source_path, 15, age_seconds=0)
+    decision = trigger.check()
+    assert not decision["retrain"] and "settle" in decision["reason"]
+
+    write_source(source_path, 15)
+    decision = trigger.check()
+    assert decision["retrain"] and decision["new_rows"] == 5
+
+
+def test_touched_but_identical_source_does_not_retrain(trigger, source_path):
+    trigger.mark_trained(trigger.check()["observation"])
+    os.utime(source_path, (time.time() - 600, time.time() - 600))
+    assert not trigger.check()["retrain"]
+
+
+def test_drift_retrains_and_its_cooldown_survives_a_skipped_run(trigger, drift_config):
+    baseline_df = pd.DataFrame({"carat": np.linspace(0.2, 2.0, 500), "cut": ["Ideal"] * 500})
+    monitor = DriftMonitor(build_drift_baseline(baseline_df, ["carat"], ["cut"]), drift_config)
+    with open(drift_config.baseline_file_path, "w") as file_obj:
+        json.dump(monitor.baseline, file_obj)
+
+    # Served stones are all much larger than the training ones
+    monitor.update(pd.DataFrame({"carat": np.full(200, 5.0), "cut": ["Premium"] * 200}))
+    monitor.save_state()
+
+    now = time.time()
+    trigger.mark_trained(trigger.check(now)["observation"], now=now - 7200)   # cooldown over
+    decision = trigger.check(now)
+    assert decision["retrain"] and decision["drift"]
+    assert decision["reason"].startswith("drift in")
+
+    # A run skipped as up to date only records the source: drift still fires
+    trigger.record_source(decision["observation"])
+    assert trigger.check(now)["drift"]
+
+    # A completed training starts the cooldown
+    trigger.mark_trained(decision["observation"], now=now)
+    assert not trigger.check(now)["retrain"]
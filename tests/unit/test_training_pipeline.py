@@ -0,0 +1,45 @@
+"""Unit tests for skipping unchanged runs (src/pipeline/training_pipeline.py)."""
+
+import os
+
+import pytest
+
+from src.config.run_config import RunConfig
+from src.pipeline.training_pipeline import TrainingPipeline
+from src.utils.artifact_store import publish_artifacts
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("artifacts")
+    for name in ("preprocessor.pkl", "model.pkl"):
+        with open(os.path.join("artifacts", name), "w") as file_obj:
+            file_obj.write(name)
+    return TrainingPipeline(RunConfig())
+
+
+def publish_working_artifacts(pipeline):
+    names = ("preprocessor.pkl", "model.pkl", os.path.basename(pipeline.run_config.fingerprint_path))
+    return publish_artifacts([os.path.join("artifacts", name) for name in names])
+
+
+def test_an_unpublished_run_is_not_up_to_date(pipeline):
+    # Training recorded its fingerprint, then publishing failed
+    pipeline.record_run({"r2": 0.9}, "fp-1")
+    assert not pipeline.is_up_to_date("fp-1")
+
+    publish_working_artifacts(pipeline)
+    assert pipeline.is_up_to_date("fp-1")
+    assert pipeline.published_run()["metrics"] == {"r2": 0.9}
+    assert not pipeline.is_up_to_date("fp-2")
+
+
+def test_the_published_fingerprint_wins_over_the_working_copy(pipeline):
+    pipeline.record_run({"r2": 0.9}, "fp-1")
+    publish_working_artifacts(pipeline)
+
+    # A later run records fp-2 but never publishes it
+    pipeline.record_run({"r2": 0.8}, "fp-2")
+    assert not pipeline.is_up_to_date("fp-2")
+    assert pipeline.is_up_to_date("fp-1")